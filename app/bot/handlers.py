@@ -4,50 +4,114 @@ Telegram Bot Handlers
 """
 
 import asyncio
+import hashlib
 import html
-from datetime import datetime
-from typing import Optional, Dict, List
+import json
+import re
+import ssl
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Optional, Dict, List, Tuple
 
 from aiogram import Bot, Dispatcher, F, Router
-from aiogram.filters import Command, CommandStart
-from aiogram.types import Message, CallbackQuery, FSInputFile, BotCommand, InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.filters import Command, CommandObject, CommandStart
+from aiogram.types import Message, CallbackQuery, BufferedInputFile, BotCommand, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from sqlalchemy import select, update, func
+from aiohttp import ClientSession, TCPConnector
+import certifi
+from sqlalchemy import select, update, func, text
 from sqlalchemy.ext.asyncio import AsyncSession
+import redis.asyncio as aioredis
 
 from app.config import settings
 from app.models.database import (
     PostDraft, Publication, RawArticle,
-    FeedbackLabel, PersonalPost, PostComment, get_db, APIUsage
+    FeedbackLabel, PersonalPost, PostComment, get_db, init_db, APIUsage,
+    AsyncSessionLocal
 )
 from app.bot.keyboards import (
+    DraftCB,
+    REJECTION_REASON_CODES,
     get_draft_review_keyboard,
     get_confirm_keyboard,
     get_reader_keyboard,
     get_main_menu_keyboard,
     get_rejection_reasons_keyboard,
+    get_reject_all_confirm_keyboard,
     get_opinion_keyboard,
     get_edit_mode_keyboard,
-    get_llm_selection_keyboard
+    get_edit_result_keyboard,
+    get_llm_selection_keyboard,
+    get_analytics_period_keyboard,
+    get_ai_analysis_period_keyboard
 )
-from app.bot.middleware import DbSessionMiddleware
+from app.bot.middleware import AdminCallbackMiddleware, DbSessionMiddleware
 from app.modules.llm_provider import get_llm_provider
-from app.modules.vector_search import get_vector_search
+from app.modules.ai_core import call_openai_chat
+from app.modules.settings_manager import (
+    get_setting,
+    set_setting,
+    get_category_settings,
+    get_dalle_config,
+    get_auto_publish_config,
+    get_llm_model,
+    init_default_settings
+)
+from app.modules.personal_posts_manager import (
+    create_personal_post,
+    enrich_post_with_metadata,
+    generate_post_with_ai,
+    get_user_posts,
+    delete_post
+)
 from app.modules.analytics import AnalyticsService
 from app.modules.channel_moderation import ChannelModeration
 import structlog
 
 logger = structlog.get_logger()
 
+# Максимум одновременных HTTP соединений к Bot API
+TELEGRAM_CONNECTION_LIMIT = 50
+
 # Глобальные переменные (Bot создается лениво чтобы избежать создания aiohttp клиента при импорте)
 _bot: Optional[Bot] = None
 _selected_llm_provider: str = settings.default_llm_provider  # Хранение выбранного LLM провайдера
 _channel_moderator: Optional[ChannelModeration] = None  # Модератор канала
+_edit_cache: Optional[aioredis.Redis] = None  # Кэш результатов AI-редактирования
+_publish_queue: Optional[asyncio.Queue] = None  # Очередь публикаций в канал
+_publish_worker_task: Optional[asyncio.Task] = None  # Воркер очереди публикаций
+_post_url_cache: Dict[int, str] = {}  # URL источника опубликованных постов {post_id: url}
+_drafts_fanout_lock = asyncio.Lock()  # Одна рассылка драфтов на модерацию за раз
 dp = Dispatcher()
 router = Router()
 
 
+class TelegramSession(AiohttpSession):
+    """
+    aiohttp сессия Bot API с ограниченным числом соединений.
+
+    AiohttpSession в aiogram 3.3 не принимает параметры TCPConnector,
+    поэтому коннектор с лимитом создается здесь.
+    """
+
+    async def create_session(self) -> ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(
+                connector=TCPConnector(
+                    limit=TELEGRAM_CONNECTION_LIMIT,
+                    ssl=ssl.create_default_context(cafile=certifi.where())
+                )
+            )
+        return self._session
+
+
 def get_bot() -> Bot:
     """
     Получить экземпляр бота (ленивая инициализация).
@@ -57,16 +121,280 @@ def get_bot() -> Bot:
     """
     global _bot
     if _bot is None:
-        _bot = Bot(token=settings.telegram_bot_token)
+        # Одна долгоживущая aiohttp сессия на процесс: keep-alive соединения к
+        # api.telegram.org переиспользуются между запросами. Закрывается в
+        # dp.start_polling (close_bot_session=True) при остановке бота
+        _bot = Bot(token=settings.telegram_bot_token, session=TelegramSession())
     return _bot
 
 
+def get_edit_cache() -> aioredis.Redis:
+    """
+    Получить Redis клиент для кэша AI-редактирования (ленивая инициализация).
+    """
+    global _edit_cache
+    if _edit_cache is None:
+        _edit_cache = aioredis.from_url(settings.redis_url, decode_responses=True)
+    return _edit_cache
+
+
+async def get_draft_photo(draft: PostDraft):
+    """
+    Фото драфта для send_photo без блокирующего чтения диска в event loop.
+
+    Если фото уже загружалось в Telegram - возвращается его file_id,
+    иначе файл читается в отдельном потоке.
+
+    Args:
+        draft: Драфт с image_path
+
+    Returns:
+        file_id или BufferedInputFile
+    """
+    if draft.telegram_photo_file_id:
+        return draft.telegram_photo_file_id
+
+    image_path = Path(draft.image_path)
+    data = await asyncio.to_thread(image_path.read_bytes)
+    return BufferedInputFile(data, filename=image_path.name)
+
+
 # FSM States для редактирования
 class EditDraft(StatesGroup):
     waiting_for_manual_edit = State()
     waiting_for_llm_edit = State()
 
 
+# ====================
+# Статические тексты и клавиатуры
+# ====================
+# Собираются один раз при импорте модуля, а не на каждый вызов обработчика
+
+HELP_TEXT = """
+📚 <b>Помощь по боту</b>
+
+<b>Команды:</b>
+/start - Главное меню
+/drafts - Показать новые драфты
+/stats - Статистика системы
+/fetch - Запустить сбор новостей вручную
+/reject_all [irrelevant|low_quality|duplicate|inaccurate|other] - Отклонить все ожидающие драфты
+/help - Эта справка
+
+<b>Модерация драфтов:</b>
+✅ Опубликовать - опубликовать пост в канал
+✏️ Редактировать - редактировать текст поста
+❌ Отклонить - отклонить драфт
+
+<b>Workflow:</b>
+1. Система автоматически собирает новости (09:00 MSK)
+2. AI анализирует и генерирует драфты
+3. Вы получаете уведомление о новых драфтах
+4. Вы модерируете каждый драфт
+5. Одобренные посты публикуются в канал
+
+⚠️ <b>Важно:</b> Все драфты требуют модерации перед публикацией!
+"""
+
+SETTINGS_TEXT = (
+    "⚙️ <b>Системные настройки</b>\n\n"
+    "Все параметры сохраняются в базе данных и применяются автоматически.\n\n"
+    "Выберите категорию:"
+)
+
+# Меню категорий настроек (с кнопкой возврата в главное меню)
+SETTINGS_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="📰 Источники новостей", callback_data="settings:sources")],
+    [InlineKeyboardButton(text="🤖 Модели LLM", callback_data="settings:llm")],
+    [InlineKeyboardButton(text="🎨 Генерация изображений (DALL-E)", callback_data="settings:dalle")],
+    [InlineKeyboardButton(text="📅 Автопубликация", callback_data="settings:autopublish")],
+    [InlineKeyboardButton(text="🔄 Сбор новостей", callback_data="settings:fetcher")],
+    [InlineKeyboardButton(text="🔔 Уведомления", callback_data="settings:alerts")],
+    [InlineKeyboardButton(text="🎯 Фильтрация и качество", callback_data="settings:quality")],
+    [InlineKeyboardButton(text="💰 Бюджет API", callback_data="settings:budget")],
+    [InlineKeyboardButton(text="« Назад", callback_data="back_to_main_menu")],
+])
+
+# Та же клавиатура для команды /settings (без кнопки "Назад")
+SETTINGS_COMMAND_KEYBOARD = InlineKeyboardMarkup(
+    inline_keyboard=SETTINGS_KEYBOARD.inline_keyboard[:-1]
+)
+
+# Инструкция перед текстом драфта при ручном редактировании
+EDIT_MANUAL_INSTRUCTIONS_TEXT = (
+    "✍️ <b>ТЕКУЩИЙ ТЕКСТ ПОСТА</b>\n"
+    "Скопируйте сообщение ниже ⬇️, отредактируйте и отправьте обратно.\n\n"
+    "📌 Используйте HTML разметку:\n"
+    "<b>жирный</b>, <i>курсив</i>, <code>код</code>\n\n"
+    "Отправьте /cancel для отмены."
+)
+
+# Промпт AI-редактирования драфта (подстановка через format_map)
+EDIT_SYSTEM_PROMPT = (
+    "Ты опытный редактор. Строго следуй инструкциям пользователя. "
+    "Возвращай только финальный текст, без объяснений."
+)
+
+EDIT_PROMPT_TEMPLATE = """Ты профессиональный редактор Telegram-постов о юридических новостях в сфере AI.
+
+📌 ИСХОДНЫЙ ПОСТ (который нужно отредактировать):
+{original}
+
+📰 ОРИГИНАЛЬНАЯ СТАТЬЯ (для справки):
+{article}
+
+✏️ ИНСТРУКЦИИ ПОЛЬЗОВАТЕЛЯ:
+{instructions}
+
+🎯 ТВОЯ ЗАДАЧА:
+Внимательно прочитай инструкции пользователя и ТОЧНО выполни их. Не добавляй ничего от себя, только то что просит пользователь.
+
+ВАЖНО:
+1. Выполни ТОЛЬКО то, что просит пользователь в инструкциях
+2. Сохрани общую структуру поста (заголовок, текст, хештеги)
+3. Используй HTML разметку (<b>, <i>, <code>)
+4. Если пользователь просит сделать короче - убери лишние детали
+5. Если просит добавить - добавь релевантную информацию
+6. Если просит изменить тон - измени стиль написания
+7. Не выдумывай факты, используй информацию из оригинальной статьи
+
+ВЕРНИ ТОЛЬКО отредактированный текст поста, без комментариев и пояснений."""
+
+# Сколько символов оригинальной статьи передавать в LLM для контекста
+EDIT_ARTICLE_CONTEXT_CHARS = 1000
+
+# Время жизни закэшированного результата AI-редактирования (секунды)
+EDIT_CACHE_TTL = 3600
+
+# Время жизни закэшированного AI анализа аналитики (секунды)
+AI_ANALYSIS_CACHE_TTL = 1800
+
+# Инструкции короче этого считаются случайным нажатием - LLM не вызывается
+EDIT_MIN_INSTRUCTIONS_CHARS = 3
+
+# Частота обновления сообщения при стриминге ответа LLM (секунды) и лимит превью
+EDIT_STREAM_INTERVAL = 1.0
+EDIT_STREAM_PREVIEW_CHARS = 4000
+
+# Статусы драфта, которые еще можно опубликовать, отклонить или отредактировать
+REVIEWABLE_DRAFT_STATUSES = ('pending_review', 'edited')
+
+
+# Текущее время по часам Postgres в UTC (колонки TIMESTAMP без зоны хранят UTC, как datetime.utcnow).
+# Только для UPDATE ... SET: в ORM-объектах SQL-выражение отключает пакетную вставку
+# (INSERT на каждую строку), поэтому туда передается значение, полученное через RETURNING
+DB_UTC_NOW = func.timezone('utc', func.now())
+
+# Лимит длины текста сообщения Telegram и разделитель блоков в постах
+TELEGRAM_TEXT_LIMIT = 4096
+SEPARATOR_LINE = "━━━━━━━━━━━━━━━━"
+
+# Разделитель разделов в отчётах аналитики - по нему же длинный отчёт режется на сообщения
+REPORT_SEPARATOR = "━" * 26
+REPORT_SEPARATOR_BLOCK = f"\n{REPORT_SEPARATOR}\n"
+REPORT_CHUNK_LIMIT = 4000  # Длина одного сообщения при разбиении отчёта (с запасом до лимита)
+# Параметры отправки частей отчёта (HTML без превью ссылок)
+REPORT_SEND_KWARGS = {"parse_mode": "HTML", "disable_web_page_preview": True}
+
+# Порядок дней недели в отчёте аналитики
+WEEKDAY_ORDER = ("Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс")
+
+# Статические блоки отчёта аналитики: заголовки разделов и заглушки при отсутствии данных
+REPORT_TOP_POSTS_HEADER = REPORT_SEPARATOR_BLOCK + "🔥 <b>Топ-3 поста:</b>\n\n"
+REPORT_WORST_POSTS_HEADER = f"{REPORT_SEPARATOR}\n💤 <b>Худшие посты (учимся на ошибках):</b>\n\n"
+# Шаблоны строк поста в топе / худших постах (заполняются через str.format)
+REPORT_TOP_POST_TEMPLATE = (
+    "{i}️⃣ <b>{title}</b>\n"
+    "   📅 {date}\n"
+    "   👍 {useful} | 🔥 {important} | 🤔 {controversial}\n"
+    "   📊 Quality: {quality}\n"
+)
+REPORT_WORST_POST_TEMPLATE = (
+    "{i}️⃣ <b>{title}</b>\n"
+    "   📅 {date}\n"
+    "   💤 {banal} | 👎 {poor_quality} | 🤷 {obvious}\n"
+    "   📊 Quality: {quality}\n"
+)
+# Основная проблема худшего поста: первая реакция из списка, которая встречается у поста
+REPORT_POST_PROBLEMS = (
+    ("banal", "   ⚠️ Проблема: Слишком общо, нет конкретики\n"),
+    ("obvious", "   ⚠️ Проблема: Очевидные выводы\n"),
+    ("poor_quality", "   ⚠️ Проблема: Низкое качество контента\n"),
+    ("low_content_quality", "   ⚠️ Проблема: Плохая подача материала\n"),
+    ("bad_source", "   ⚠️ Проблема: Ненадежный или некачественный источник\n"),
+)
+REPORT_WEEKDAY_HEADER = f"{REPORT_SEPARATOR}\n📅 <b>Статистика по дням недели:</b>\n\n"
+REPORT_SOURCES_HEADER = REPORT_SEPARATOR_BLOCK + "📰 <b>Топ источников:</b>\n\n"
+REPORT_VECTOR_HEADER = f"{REPORT_SEPARATOR}\n🗄️ <b>Векторная база Qdrant:</b>\n\n"
+REPORT_RECOMMENDATIONS_HEADER = REPORT_SEPARATOR_BLOCK + "⚡ <b>Рекомендации по источникам:</b>\n\n"
+REPORT_VIEWS_HEADER = REPORT_SEPARATOR_BLOCK + "📈 <b>Просмотры и Форварды:</b>\n\n"
+REPORT_VIEWS_UNAVAILABLE = (
+    "⚠️ <b>Данные недоступны</b>\n"
+    "├─ Метрики из Telegram еще не собраны\n"
+    "├─ Celery задача запускается каждые 6 часов\n"
+    "├─ Следующий запуск: 00:00 / 06:00 / 12:00 / 18:00 MSK\n"
+    "└─ Или проверьте логи: docker compose logs celery_worker | grep collect_telegram_metrics\n"
+)
+REPORT_BEST_TIME_HEADER = REPORT_SEPARATOR_BLOCK + "⏰ <b>Лучшее время для публикации:</b>\n\n"
+REPORT_BEST_TIME_NO_DATA = (
+    "⚠️ <b>Недостаточно данных</b>\n"
+    "└─ Требуется хотя бы 1 публикация с views для анализа\n"
+)
+REPORT_TRENDS_HEADER = REPORT_SEPARATOR_BLOCK + "🔥 <b>Трендовые темы:</b>\n\n"
+REPORT_TRENDS_NO_DATA = (
+    "⚠️ <b>Не найдено</b>\n"
+    "└─ Требуется больше публикаций с детальным контентом\n"
+)
+REPORT_ALERTS_HEADER = REPORT_SEPARATOR_BLOCK + "🚨 <b>Алерты и предупреждения:</b>\n\n"
+
+# Реакции читателей: готовые подписи "emoji текст" для статистики
+# (порядок словаря задает порядок строк в сводке)
+REACTION_LABELS = {
+    "useful": "👍 Полезно",
+    "important": "🔥 Важно",
+    "controversial": "🤔 Спорно",
+    "banal": "💤 Банально",
+    "obvious": "🤷 Очевидно",
+    "poor_quality": "👎 Плохое качество",
+    "low_content_quality": "📉 Низкое качество контента",
+    "bad_source": "📰 Плохой источник"
+}
+
+# Маркеры международных новостей в начале поста (ставятся генератором драфтов)
+INTL_MARKERS = (
+    "🌍 Международные новости:\n\n",
+    "🌎 За рубежом:\n\n",
+    "🌏 В мире:\n\n",
+    "🌐 Новости из-за рубежа:\n\n",
+    "🗺️ Зарубежный опыт:\n\n",
+)
+
+# Отображаемые названия LLM провайдеров и операций в статистике API
+PROVIDER_NAMES = {"deepseek": "DeepSeek", "openai": "OpenAI", "perplexity": "Perplexity"}
+OPERATION_NAMES = {
+    "ranking": "Ранжирование",
+    "draft_generation": "Генерация драфтов",
+    "analysis": "Анализ",
+    "editing": "Редактирование",
+    "completion": "Общие"
+}
+
+# Атомарный инкремент счетчика реакции в publications.reactions (JSONB)
+REACTION_INCREMENT_SQL = text("""
+    UPDATE publications
+    SET reactions = jsonb_set(
+        COALESCE(reactions, '{}'::jsonb),
+        ARRAY[CAST(:reaction_type AS text)],
+        to_jsonb(COALESCE((reactions ->> CAST(:reaction_type AS text))::int, 0) + 1)
+    )
+    WHERE draft_id = :post_id
+    RETURNING id, reactions
+""")
+
+# Максимум постов в кэше URL источников (самые старые вытесняются)
+POST_URL_CACHE_SIZE = 2048
+
+
 # ====================
 # Channel Moderation
 # ====================
@@ -127,13 +455,11 @@ async def moderate_channel_comment(message: Message):
 
             # Сохраняем статистику модерации в базу данных
             try:
-                from app.models.database import PostComment, get_db
                 async with get_db() as db:
                     # Ищем публикацию по message_id или reply_to_message
                     publication_id = None
                     if message.reply_to_message:
                         # Это ответ на сообщение, найдем публикацию
-                        from sqlalchemy import select
                         result = await db.execute(
                             select(PostComment.publication_id).where(
                                 PostComment.telegram_message_id == message.reply_to_message.message_id
@@ -167,8 +493,13 @@ async def moderate_channel_comment(message: Message):
 # Middleware для проверки прав
 # ====================
 
-async def check_admin(user_id: int) -> bool:
-    """Проверить, является ли пользователь администратором."""
+def check_admin(user_id: int) -> bool:
+    """
+    Проверить, является ли пользователь администратором.
+
+    Обычное сравнение с ID из настроек - без I/O, поэтому синхронная функция
+    и не требует ни await, ни кэширования.
+    """
     return user_id == settings.telegram_admin_id
 
 
@@ -181,7 +512,7 @@ async def cmd_start(message: Message):
     logger.info(f"Start command received from user {message.from_user.id}")
     logger.info(f"Message text: {message.text}")
     """Обработчик команды /start."""
-    if not await check_admin(message.from_user.id):
+    if not check_admin(message.from_user.id):
         await message.answer("⛔️ У вас нет прав доступа к этому боту.")
         return
 
@@ -196,168 +527,257 @@ async def cmd_start(message: Message):
     )
 
 
-@router.message(Command("drafts"))
-async def cmd_drafts(message: Message, db: AsyncSession):
-    """Показать новые драфты для модерации."""
-    if not await check_admin(message.from_user.id):
-        return
+async def count_pending_drafts(db: AsyncSession) -> int:
+    """Количество драфтов, ожидающих модерации (index-only по частичному индексу)."""
+    return await db.scalar(
+        select(func.count(PostDraft.id)).where(PostDraft.status == 'pending_review')
+    )
 
-    # Получаем ВСЕ драфты в статусе pending_review (без фильтра по дате)
-    result = await db.execute(
+
+async def stream_pending_drafts(db: AsyncSession, limit: int) -> AsyncIterator[PostDraft]:
+    """
+    Потоково получить драфты pending_review.
+
+    Строки читаются серверным курсором, поэтому первый драфт можно отправлять,
+    не дожидаясь загрузки остальных. Строки не блокируются (без FOR UPDATE):
+    курсор живет всю рассылку, и блокировка задержала бы публикацию или
+    отклонение уже полученного драфта до конца отправки. Повторную рассылку
+    исключает fan_out_pending_drafts, а публикация и отклонение сами проверяют статус.
+
+    Args:
+        db: Сессия БД
+        limit: Сколько драфтов взять
+
+    Returns:
+        Асинхронный итератор драфтов от новых к старым
+    """
+    return await db.stream_scalars(
         select(PostDraft)
         .where(PostDraft.status == 'pending_review')
         .order_by(PostDraft.created_at.desc())
+        .limit(limit)
     )
-    drafts = list(result.scalars().all())
 
-    if not drafts:
-        await message.answer("📭 Нет новых драфтов для модерации.")
+
+async def fan_out_pending_drafts(chat_id: int, db: AsyncSession) -> Optional[int]:
+    """
+    Отправить администратору драфты, ожидающие модерации.
+
+    Args:
+        chat_id: ID чата для отправки
+        db: Сессия БД
+
+    Returns:
+        Количество драфтов в очереди модерации или None, если рассылка уже идет
+    """
+    # Повторный /drafts или нажатие кнопки во время рассылки не отправляет драфты второй раз
+    if _drafts_fanout_lock.locked():
+        return None
+
+    async with _drafts_fanout_lock:
+        # Получаем ВСЕ драфты в статусе pending_review (без фильтра по дате)
+        pending_count = await count_pending_drafts(db)
+
+        if not pending_count:
+            await get_bot().send_message(chat_id, "📭 Нет новых драфтов для модерации.")
+            return 0
+
+        await get_bot().send_message(chat_id, f"📝 Найдено {pending_count} драфтов. Отправляю...")
+
+        # Отправляем драфты по мере чтения из БД (ограничиваем настройкой publisher_max_posts_per_day)
+        max_drafts = min(pending_count, settings.publisher_max_posts_per_day)
+        drafts = await stream_pending_drafts(db, max_drafts)
+        await send_drafts_for_review(chat_id, drafts, db)
+
+        return pending_count
+
+
+@router.message(Command("drafts"))
+async def cmd_drafts(message: Message, db: AsyncSession):
+    """Показать новые драфты для модерации."""
+    if not check_admin(message.from_user.id):
         return
 
-    await message.answer(f"📝 Найдено {len(drafts)} драфтов. Отправляю...")
+    if await fan_out_pending_drafts(message.chat.id, db) is None:
+        await message.answer("⏳ Драфты уже отправляются")
+
+
+# Кэш текста /stats: (time.monotonic() момента сборки, текст)
+STATS_CACHE_TTL = 30
+_stats_cache: Optional[Tuple[float, str]] = None
 
-    # Отправляем каждый драфт (ограничиваем настройкой publisher_max_posts_per_day)
-    max_drafts = min(len(drafts), settings.publisher_max_posts_per_day)
-    for index, draft in enumerate(drafts[:max_drafts], start=1):
-        await send_draft_for_review(message.chat.id, draft, db, draft_number=index)
+
+def invalidate_statistics_cache():
+    """Сбросить кэш статистики и отчётов аналитики (после публикации или отклонения драфта)."""
+    global _stats_cache
+    _stats_cache = None
+    _analytics_report_cache.clear()
 
 
 async def get_statistics(db: AsyncSession) -> str:
-    """Собрать и отформатировать статистику системы."""
-    from datetime import datetime, timedelta
-    from sqlalchemy import extract
+    """
+    Статистика системы с кэшированием на STATS_CACHE_TTL секунд.
+
+    Счетчики не обязаны быть точными до секунды, а повторные /stats
+    не должны каждый раз гонять COUNT по большим таблицам.
+    """
+    global _stats_cache
+    if _stats_cache is not None and time.monotonic() - _stats_cache[0] < STATS_CACHE_TTL:
+        return _stats_cache[1]
+
+    stats_text = await _build_statistics(db)
+    _stats_cache = (time.monotonic(), stats_text)
+    return stats_text
+
 
+def _format_cost(cost: float) -> str:
+    """Стоимость в долларах: маленькие суммы с большей точностью."""
+    return f"${cost:.6f}" if cost < 0.01 else f"${cost:.4f}"
+
+
+async def _fetch_stats_rows(stmt) -> list:
+    """Выполнить запрос статистики в отдельной сессии (для параллельного gather)."""
+    async with AsyncSessionLocal() as session:
+        return (await session.execute(stmt)).all()
+
+
+async def _build_statistics(db: AsyncSession) -> str:
+    """Собрать и отформатировать статистику системы."""
     now = datetime.utcnow()
     current_month_start = datetime(now.year, now.month, 1)
     current_year_start = datetime(now.year, 1, 1)
 
-    # Статистика по контенту
-    articles_count = (await db.execute(select(func.count(RawArticle.id)))).scalar()
-    drafts_count = (await db.execute(select(func.count(PostDraft.id)))).scalar()
-    pubs_count = (await db.execute(select(func.count(Publication.id)))).scalar()
-
-    # Драфты по статусам
-    pending_drafts = (await db.execute(
-        select(func.count(PostDraft.id)).where(PostDraft.status == 'pending')
-    )).scalar()
-    approved_drafts = (await db.execute(
-        select(func.count(PostDraft.id)).where(PostDraft.status == 'approved')
-    )).scalar()
-    rejected_drafts = (await db.execute(
-        select(func.count(PostDraft.id)).where(PostDraft.status == 'rejected')
-    )).scalar()
-
-    # Последняя публикация
-    last_pub = (await db.execute(
-        select(Publication).order_by(Publication.published_at.desc()).limit(1)
-    )).scalar_one_or_none()
+    in_month = APIUsage.created_at >= current_month_start
+
+    # Независимые запросы выполняются параллельно, каждый в своей сессии
+    # (AsyncSession не допускает параллельных запросов в одной сессии)
+    counts_rows, provider_stats, operation_stats, last_api_rows, budget_max = await asyncio.gather(
+        # Статистика по контенту и драфты по статусам - одним запросом
+        _fetch_stats_rows(
+            select(
+                select(func.count(RawArticle.id)).scalar_subquery().label("articles"),
+                select(func.count(Publication.id)).scalar_subquery().label("pubs"),
+                select(func.max(Publication.published_at)).scalar_subquery().label("last_pub_at"),
+                func.count(PostDraft.id).label("drafts"),
+                func.count(PostDraft.id).filter(PostDraft.status == 'pending').label("pending"),
+                func.count(PostDraft.id).filter(PostDraft.status == 'approved').label("approved"),
+                func.count(PostDraft.id).filter(PostDraft.status == 'rejected').label("rejected"),
+            ).select_from(PostDraft)
+        ),
+        # API за текущий месяц и год - один проход по году с FILTER для месяца
+        _fetch_stats_rows(
+            select(
+                APIUsage.provider,
+                func.sum(APIUsage.total_tokens).filter(in_month).label('month_tokens'),
+                func.sum(APIUsage.cost_usd).filter(in_month).label('month_cost'),
+                func.count(APIUsage.id).filter(in_month).label('month_calls'),
+                func.sum(APIUsage.total_tokens).label('year_tokens'),
+                func.sum(APIUsage.cost_usd).label('year_cost')
+            ).where(
+                APIUsage.created_at >= current_year_start
+            ).group_by(APIUsage.provider)
+        ),
+        # По операциям (за текущий месяц)
+        _fetch_stats_rows(
+            select(
+                APIUsage.operation,
+                func.sum(APIUsage.total_tokens).label('tokens'),
+                func.sum(APIUsage.cost_usd).label('cost')
+            ).where(in_month).group_by(APIUsage.operation)
+        ),
+        # Последний запрос
+        _fetch_stats_rows(
+            select(
+                APIUsage.provider, APIUsage.model, APIUsage.operation,
+                APIUsage.total_tokens, APIUsage.cost_usd
+            ).order_by(APIUsage.created_at.desc()).limit(1)
+        ),
+        # Бюджет - в основной сессии обработчика
+        get_setting("budget.max_per_month", db, default=0.6),
+    )
+
+    counts = counts_rows[0]
+    articles_count = counts.articles
+    drafts_count = counts.drafts
+    pubs_count = counts.pubs
+    pending_drafts = counts.pending
+    approved_drafts = counts.approved
+    rejected_drafts = counts.rejected
+
+    # Последняя публикация (MAX из того же запроса, без загрузки строки)
     last_pub_text = ""
-    if last_pub:
-        last_pub_text = f"\n📅 Последняя публикация: {last_pub.published_at.strftime('%d.%m.%Y %H:%M')}"
+    if counts.last_pub_at:
+        last_pub_text = f"\n📅 Последняя публикация: {counts.last_pub_at.strftime('%d.%m.%Y %H:%M')}"
 
     # ============ API USAGE СТАТИСТИКА ============
 
-    # За текущий месяц
-    month_stats = await db.execute(
-        select(
-            APIUsage.provider,
-            func.sum(APIUsage.total_tokens).label('tokens'),
-            func.sum(APIUsage.cost_usd).label('cost')
-        ).where(
-            APIUsage.created_at >= current_month_start
-        ).group_by(APIUsage.provider)
-    )
-    month_by_provider = {row.provider: {'tokens': row.tokens or 0, 'cost': float(row.cost or 0)}
-                         for row in month_stats}
-
-    # За текущий год
-    year_stats = await db.execute(
-        select(
-            APIUsage.provider,
-            func.sum(APIUsage.total_tokens).label('tokens'),
-            func.sum(APIUsage.cost_usd).label('cost')
-        ).where(
-            APIUsage.created_at >= current_year_start
-        ).group_by(APIUsage.provider)
-    )
-    year_by_provider = {row.provider: {'tokens': row.tokens or 0, 'cost': float(row.cost or 0)}
-                        for row in year_stats}
+    month_by_provider = {}
+    year_by_provider = {}
+    for row in provider_stats:
+        year_by_provider[row.provider] = {'tokens': row.year_tokens or 0, 'cost': float(row.year_cost or 0)}
+        if row.month_calls:
+            month_by_provider[row.provider] = {'tokens': row.month_tokens or 0, 'cost': float(row.month_cost or 0)}
 
-    # По операциям (за текущий месяц)
-    operation_stats = await db.execute(
-        select(
-            APIUsage.operation,
-            func.sum(APIUsage.total_tokens).label('tokens'),
-            func.sum(APIUsage.cost_usd).label('cost')
-        ).where(
-            APIUsage.created_at >= current_month_start
-        ).group_by(APIUsage.operation)
-    )
     by_operation = {row.operation: {'tokens': row.tokens or 0, 'cost': float(row.cost or 0)}
                    for row in operation_stats}
 
-    # Последний запрос
-    last_api_call = (await db.execute(
-        select(APIUsage).order_by(APIUsage.created_at.desc()).limit(1)
-    )).scalar_one_or_none()
+    last_api_call = last_api_rows[0] if last_api_rows else None
 
-    # Формируем статистику API
-    api_stats_text = ""
+    # Формируем статистику API (части собираются в список и склеиваются один раз)
+    api_parts: List[str] = []
 
     # Текущий месяц
     month_total_cost = sum(p['cost'] for p in month_by_provider.values())
     month_total_tokens = sum(p['tokens'] for p in month_by_provider.values())
 
     if month_total_tokens > 0:
-        api_stats_text += f"\n\n💰 <b>API расходы (текущий месяц):</b>"
-        api_stats_text += f"\n├─ Всего токенов: {month_total_tokens:,}"
-        # Используем адаптивное форматирование для маленьких сумм
-        cost_fmt = f"${month_total_cost:.6f}" if month_total_cost < 0.01 else f"${month_total_cost:.4f}"
-        api_stats_text += f"\n├─ Общая стоимость: {cost_fmt}"
+        api_parts.append("\n\n💰 <b>API расходы (текущий месяц):</b>")
+        api_parts.append(f"\n├─ Всего токенов: {month_total_tokens:,}")
+        api_parts.append(f"\n├─ Общая стоимость: {_format_cost(month_total_cost)}")
 
         # Бюджет и процент использования
-        from app.modules.settings_manager import get_setting
-        budget_max = await get_setting("budget.max_per_month", db, default=0.6)
         if budget_max > 0:
             budget_pct = (month_total_cost / budget_max) * 100
             budget_emoji = "🟢" if budget_pct < 50 else "🟡" if budget_pct < 80 else "🔴"
-            api_stats_text += f"\n├─ Бюджет: {budget_pct:.1f}% использовано {budget_emoji}"
+            api_parts.append(f"\n├─ Бюджет: {budget_pct:.1f}% использовано {budget_emoji}")
 
         if month_by_provider:
-            api_stats_text += "\n└─ <b>По провайдерам:</b>"
+            api_parts.append("\n└─ <b>По провайдерам:</b>")
             for provider, data in sorted(month_by_provider.items()):
-                provider_name = {"deepseek": "DeepSeek", "openai": "OpenAI", "perplexity": "Perplexity"}.get(provider, provider)
-                cost_fmt = f"${data['cost']:.6f}" if data['cost'] < 0.01 else f"${data['cost']:.4f}"
-                api_stats_text += f"\n   ├─ {provider_name}: {data['tokens']:,} токенов ({cost_fmt})"
+                provider_name = PROVIDER_NAMES.get(provider, provider)
+                api_parts.append(
+                    f"\n   ├─ {provider_name}: {data['tokens']:,} токенов ({_format_cost(data['cost'])})"
+                )
 
     # Текущий год
     year_total_cost = sum(p['cost'] for p in year_by_provider.values())
     year_total_tokens = sum(p['tokens'] for p in year_by_provider.values())
 
     if year_total_tokens > 0:
-        api_stats_text += f"\n\n📈 <b>API расходы (текущий год):</b>"
-        api_stats_text += f"\n├─ Всего токенов: {year_total_tokens:,}"
-        cost_fmt = f"${year_total_cost:.6f}" if year_total_cost < 0.01 else f"${year_total_cost:.4f}"
-        api_stats_text += f"\n└─ Общая стоимость: {cost_fmt}"
+        api_parts.append("\n\n📈 <b>API расходы (текущий год):</b>")
+        api_parts.append(f"\n├─ Всего токенов: {year_total_tokens:,}")
+        api_parts.append(f"\n└─ Общая стоимость: {_format_cost(year_total_cost)}")
 
     # По операциям
     if by_operation:
-        api_stats_text += f"\n\n⚙️ <b>По операциям (месяц):</b>"
+        api_parts.append("\n\n⚙️ <b>По операциям (месяц):</b>")
         for operation, data in sorted(by_operation.items(), key=lambda x: x[1]['cost'], reverse=True):
-            op_name = {"ranking": "Ранжирование", "draft_generation": "Генерация драфтов",
-                      "analysis": "Анализ", "editing": "Редактирование", "completion": "Общие"}.get(operation, operation)
-            cost_fmt = f"${data['cost']:.6f}" if data['cost'] < 0.01 else f"${data['cost']:.4f}"
-            api_stats_text += f"\n├─ {op_name}: {data['tokens']:,} токенов ({cost_fmt})"
+            op_name = OPERATION_NAMES.get(operation, operation)
+            api_parts.append(f"\n├─ {op_name}: {data['tokens']:,} токенов ({_format_cost(data['cost'])})")
 
     # Последний запрос
     if last_api_call:
-        provider_name = {"deepseek": "DeepSeek", "openai": "OpenAI", "perplexity": "Perplexity"}.get(last_api_call.provider, last_api_call.provider)
-        api_stats_text += f"\n\n🔄 <b>Последний API запрос:</b>"
-        api_stats_text += f"\n├─ Провайдер: {provider_name}"
-        api_stats_text += f"\n├─ Модель: {last_api_call.model}"
-        api_stats_text += f"\n├─ Операция: {last_api_call.operation or 'не указана'}"
-        api_stats_text += f"\n├─ Токены: {last_api_call.total_tokens:,}"
-        api_stats_text += f"\n└─ Стоимость: ${last_api_call.cost_usd:.6f}"
+        provider_name = PROVIDER_NAMES.get(last_api_call.provider, last_api_call.provider)
+        api_parts.append(
+            f"\n\n🔄 <b>Последний API запрос:</b>"
+            f"\n├─ Провайдер: {provider_name}"
+            f"\n├─ Модель: {last_api_call.model}"
+            f"\n├─ Операция: {last_api_call.operation or 'не указана'}"
+            f"\n├─ Токены: {last_api_call.total_tokens:,}"
+            f"\n└─ Стоимость: ${last_api_call.cost_usd:.6f}"
+        )
+
+    api_stats_text = "".join(api_parts)
 
     stats_text = f"""
 📊 <b>Статистика системы</b>
@@ -379,7 +799,7 @@ async def get_statistics(db: AsyncSession) -> str:
 @router.message(Command("stats"))
 async def cmd_stats(message: Message, db: AsyncSession):
     """Показать статистику."""
-    if not await check_admin(message.from_user.id):
+    if not check_admin(message.from_user.id):
         return
 
     # Собираем статистику
@@ -390,48 +810,25 @@ async def cmd_stats(message: Message, db: AsyncSession):
 @router.message(Command("help"))
 async def cmd_help(message: Message):
     """Показать помощь."""
-    if not await check_admin(message.from_user.id):
+    if not check_admin(message.from_user.id):
         return
 
-    help_text = """
-📚 <b>Помощь по боту</b>
-
-<b>Команды:</b>
-/start - Главное меню
-/drafts - Показать новые драфты
-/stats - Статистика системы
-/fetch - Запустить сбор новостей вручную
-/help - Эта справка
-
-<b>Модерация драфтов:</b>
-✅ Опубликовать - опубликовать пост в канал
-✏️ Редактировать - редактировать текст поста
-❌ Отклонить - отклонить драфт
-
-<b>Workflow:</b>
-1. Система автоматически собирает новости (09:00 MSK)
-2. AI анализирует и генерирует драфты
-3. Вы получаете уведомление о новых драфтах
-4. Вы модерируете каждый драфт
-5. Одобренные посты публикуются в канал
-
-⚠️ <b>Важно:</b> Все драфты требуют модерации перед публикацией!
-"""
-    await message.answer(help_text, parse_mode="HTML")
+    await message.answer(HELP_TEXT, parse_mode="HTML")
 
 
 @router.message(Command("fetch"))
 async def cmd_fetch(message: Message):
     """Запустить сбор новостей вручную."""
-    if not await check_admin(message.from_user.id):
+    if not check_admin(message.from_user.id):
         return
 
     await message.answer("🔄 Запускаю сбор новостей...")
 
     try:
         # Импортируем и запускаем задачу Celery
+        # (публикация в брокер синхронная - выполняем вне event loop)
         from app.tasks.celery_tasks import manual_workflow
-        task = manual_workflow.delay()
+        task = await asyncio.to_thread(manual_workflow.delay)
 
         await message.answer(
             f"✅ Задача запущена!\n"
@@ -449,14 +846,10 @@ async def cmd_fetch(message: Message):
 # Callback обработчики
 # ====================
 
-@router.callback_query(F.data.startswith("publish:"))
-async def callback_publish(callback: CallbackQuery, db: AsyncSession):
+@router.callback_query(DraftCB.filter(F.action == "publish"))
+async def callback_publish(callback: CallbackQuery, callback_data: DraftCB, db: AsyncSession):
     """Обработчик кнопки публикации."""
-    if not await check_admin(callback.from_user.id):
-        await callback.answer("⛔️ Нет прав доступа", show_alert=True)
-        return
-
-    draft_id = int(callback.data.split(":")[1])
+    draft_id = callback_data.draft_id
 
     # Запрашиваем подтверждение
     await callback.message.edit_reply_markup(
@@ -465,66 +858,28 @@ async def callback_publish(callback: CallbackQuery, db: AsyncSession):
     await callback.answer("Подтвердите публикацию")
 
 
-@router.callback_query(F.data.startswith("confirm_publish:"))
-async def callback_confirm_publish(callback: CallbackQuery, db: AsyncSession):
+@router.callback_query(DraftCB.filter(F.action == "confirm_publish"))
+async def callback_confirm_publish(callback: CallbackQuery, callback_data: DraftCB, db: AsyncSession):
     """Подтверждение публикации."""
     # ВАЖНО: отвечаем сразу, чтобы кнопка не зависала
     await callback.answer("Публикую...")
 
-    if not await check_admin(callback.from_user.id):
-        logger.warning("confirm_publish_no_access", user_id=callback.from_user.id)
-        return
-
-    draft_id = int(callback.data.split(":")[1])
-    logger.info("confirm_publish_start", draft_id=draft_id, user_id=callback.from_user.id)
+    draft_id = callback_data.draft_id
 
-    # Публикуем пост
-    success = await publish_draft(draft_id, db, callback.from_user.id)
-    logger.info("confirm_publish_result", draft_id=draft_id, success=success)
-
-    try:
-        logger.info("confirm_publish_updating_message", draft_id=draft_id, has_photo=bool(callback.message.photo))
-        if success:
-            # Проверяем тип сообщения (photo или text)
-            if callback.message.photo:
-                logger.info("confirm_publish_edit_caption", draft_id=draft_id)
-                await callback.message.edit_caption(
-                    caption=f"✅ Драфт #{draft_id} успешно опубликован!",
-                    reply_markup=None  # Убираем кнопки
-                )
-            else:
-                logger.info("confirm_publish_edit_text", draft_id=draft_id)
-                await callback.message.edit_text(
-                    text=f"✅ Драфт #{draft_id} успешно опубликован!",
-                    reply_markup=None  # Убираем кнопки
-                )
-            logger.info("confirm_publish_message_updated", draft_id=draft_id)
-        else:
-            if callback.message.photo:
-                await callback.message.edit_caption(
-                    caption=f"❌ Ошибка при публикации драфта #{draft_id}",
-                    reply_markup=None
-                )
-            else:
-                await callback.message.edit_text(
-                    text=f"❌ Ошибка при публикации драфта #{draft_id}",
-                    reply_markup=None
-                )
-    except Exception as e:
-        logger.error("callback_message_edit_error", error=str(e), draft_id=draft_id, error_type=type(e).__name__)
-        # Если не получилось отредактировать, отправим новое сообщение
-        status_msg = f"✅ Драфт #{draft_id} успешно опубликован!" if success else f"❌ Ошибка при публикации драфта #{draft_id}"
-        await callback.message.answer(status_msg)
+    # Публикация уходит в очередь - обработчик не ждет отправок в Telegram
+    await enqueue_publication(
+        callback.message,
+        draft_id,
+        callback.from_user.id,
+        success_text=f"✅ Драфт #{draft_id} успешно опубликован!",
+        db=db
+    )
 
 
-@router.callback_query(F.data.startswith("reject:"))
-async def callback_reject(callback: CallbackQuery, db: AsyncSession):
+@router.callback_query(DraftCB.filter(F.action == "reject"))
+async def callback_reject(callback: CallbackQuery, callback_data: DraftCB, db: AsyncSession):
     """Обработчик кнопки отклонения."""
-    if not await check_admin(callback.from_user.id):
-        await callback.answer("⛔️ Нет прав доступа", show_alert=True)
-        return
-
-    draft_id = int(callback.data.split(":")[1])
+    draft_id = callback_data.draft_id
 
     # Показываем причины отклонения
     await callback.message.edit_reply_markup(
@@ -533,46 +888,30 @@ async def callback_reject(callback: CallbackQuery, db: AsyncSession):
     await callback.answer("Выберите причину отклонения")
 
 
-@router.callback_query(F.data.startswith("reject_reason:"))
-async def callback_reject_reason(callback: CallbackQuery, db: AsyncSession):
+@router.callback_query(DraftCB.filter(F.action == "reject_reason"))
+async def callback_reject_reason(callback: CallbackQuery, callback_data: DraftCB, db: AsyncSession):
     """Обработка выбора причины отклонения."""
     # ВАЖНО: отвечаем сразу, чтобы кнопка не зависала
     await callback.answer("Отклоняю...")
 
-    if not await check_admin(callback.from_user.id):
-        return
-
-    parts = callback.data.split(":")
-    draft_id = int(parts[1])
-    reason = parts[2]
+    draft_id = callback_data.draft_id
+    reason = callback_data.reason
 
     # Отклоняем драфт
     success = await reject_draft(draft_id, reason, db, callback.from_user.id)
 
     if success:
-        # Проверяем тип сообщения (photo или text)
-        if callback.message.photo:
-            await callback.message.edit_caption(
-                caption=f"❌ Драфт #{draft_id} отклонен\nПричина: {reason}"
-            )
-        else:
-            await callback.message.edit_text(
-                f"❌ Драфт #{draft_id} отклонен\nПричина: {reason}"
-            )
+        await edit_message(callback.message, f"❌ Драфт #{draft_id} отклонен\nПричина: {reason}")
     else:
         await callback.message.answer("❌ Ошибка при отклонении драфта", show_alert=True)
 
 
-@router.callback_query(F.data.startswith("edit:"))
-async def callback_edit(callback: CallbackQuery):
+@router.callback_query(DraftCB.filter(F.action == "edit"))
+async def callback_edit(callback: CallbackQuery, callback_data: DraftCB):
     """Обработчик кнопки редактирования - показывает выбор способа."""
     await callback.answer()
 
-    if not await check_admin(callback.from_user.id):
-        await callback.message.answer("⛔️ Нет прав доступа")
-        return
-
-    draft_id = int(callback.data.split(":")[1])
+    draft_id = callback_data.draft_id
 
     await callback.message.answer(
         "✏️ Выберите способ редактирования драфта:",
@@ -580,79 +919,68 @@ async def callback_edit(callback: CallbackQuery):
     )
 
 
-@router.callback_query(F.data.startswith("edit_manual:"))
-async def callback_edit_manual(callback: CallbackQuery, state: FSMContext, db: AsyncSession):
+@router.callback_query(DraftCB.filter(F.action == "edit_manual"))
+async def callback_edit_manual(callback: CallbackQuery, callback_data: DraftCB, state: FSMContext, db: AsyncSession):
     """Обработчик ручного редактирования."""
     await callback.answer()
 
-    if not await check_admin(callback.from_user.id):
-        await callback.message.answer("⛔️ Нет прав доступа")
-        return
-
-    draft_id = int(callback.data.split(":")[1])
+    draft_id = callback_data.draft_id
 
     # Получаем текущий драфт
-    result = await db.execute(
-        select(PostDraft).where(PostDraft.id == draft_id)
-    )
-    draft = result.scalar_one_or_none()
+    draft = await db.get(PostDraft, draft_id)
 
     if not draft:
         await callback.answer("❌ Драфт не найден", show_alert=True)
         return
 
-    await state.update_data(draft_id=draft_id)
+    # Новая сессия редактирования: set_data записывает данные целиком,
+    # без чтения старых, как при update_data
     await state.set_state(EditDraft.waiting_for_manual_edit)
+    await state.set_data({"draft_id": draft_id})
 
-    # Отправляем текущий текст отдельным сообщением для удобного копирования
-    await callback.message.answer(
-        "✍️ <b>ТЕКУЩИЙ ТЕКСТ ПОСТА</b>\n"
-        "Скопируйте сообщение ниже ⬇️, отредактируйте и отправьте обратно:",
-        parse_mode="HTML"
-    )
+    # Инструкция одним сообщением: порядок сообщений важен, поэтому отправки
+    # последовательные, и каждое лишнее сообщение - лишний запрос к Telegram
+    await callback.message.answer(EDIT_MANUAL_INSTRUCTIONS_TEXT, parse_mode="HTML")
 
     # Текст поста отдельным сообщением (легко копировать долгим нажатием)
     await callback.message.answer(draft.content)
 
-    await callback.message.answer(
-        "📌 Используйте HTML разметку:\n"
-        "<b>жирный</b>, <i>курсив</i>, <code>код</code>\n\n"
-        "Отправьте /cancel для отмены.",
-        parse_mode="HTML"
-    )
-
 
-@router.callback_query(F.data.startswith("edit_llm:"))
-async def callback_edit_llm(callback: CallbackQuery, state: FSMContext, db: AsyncSession):
+@router.callback_query(DraftCB.filter(F.action == "edit_llm"))
+async def callback_edit_llm(callback: CallbackQuery, callback_data: DraftCB, state: FSMContext, db: AsyncSession):
     """Обработчик AI-редактирования."""
     await callback.answer()
 
-    if not await check_admin(callback.from_user.id):
-        await callback.message.answer("⛔️ Нет прав доступа")
-        return
-
-    draft_id = int(callback.data.split(":")[1])
+    draft_id = callback_data.draft_id
 
-    # Получаем текущий драфт
+    # Текст драфта и контекст статьи одним запросом (статья обрезается на стороне БД)
     result = await db.execute(
-        select(PostDraft).where(PostDraft.id == draft_id)
+        select(
+            PostDraft.content,
+            func.left(RawArticle.content, EDIT_ARTICLE_CONTEXT_CHARS)
+        )
+        .outerjoin(RawArticle, RawArticle.id == PostDraft.article_id)
+        .where(PostDraft.id == draft_id)
     )
-    draft = result.scalar_one_or_none()
+    row = result.one_or_none()
 
-    if not draft:
+    if not row:
         await callback.answer("❌ Драфт не найден", show_alert=True)
         return
 
-    # Сохраняем в state
-    await state.update_data(
-        draft_id=draft_id,
-        original_content=draft.content,
-        article_id=draft.article_id
-    )
+    content, article_excerpt = row
+
+    # Сохраняем в state - генерации вариантов больше не нужна БД.
+    # Новая сессия редактирования: данные записываются целиком, без чтения старых
     await state.set_state(EditDraft.waiting_for_llm_edit)
+    await state.set_data({
+        "draft_id": draft_id,
+        "original_content": content,
+        "article_excerpt": article_excerpt,
+    })
 
     await callback.message.answer(
-        f"<b>📝 Текущий драфт:</b>\n\n{draft.content}\n\n"
+        f"<b>📝 Текущий драфт:</b>\n\n{content}\n\n"
         f"━━━━━━━━━━━━━━━━\n\n"
         f"🤖 <b>Опишите, что нужно изменить:</b>\n"
         f"Например:\n"
@@ -679,20 +1007,20 @@ async def process_manual_edit(message: Message, state: FSMContext, db: AsyncSess
     data = await state.get_data()
     draft_id = data.get("draft_id")
 
-    # Получаем драфт
-    result = await db.execute(
-        select(PostDraft).where(PostDraft.id == draft_id)
+    # Обновляем драфт новым текстом и сразу получаем его для повторной отправки
+    # (один UPDATE ... RETURNING вместо SELECT + UPDATE)
+    draft = await db.scalar(
+        update(PostDraft)
+        .where(PostDraft.id == draft_id, PostDraft.status.in_(REVIEWABLE_DRAFT_STATUSES))
+        .values(content=message.text, status='edited', published_text=None)
+        .returning(PostDraft)
     )
-    draft = result.scalar_one_or_none()
 
     if not draft:
-        await message.answer(f"❌ Драфт #{draft_id} не найден")
+        await message.answer(f"❌ Драфт #{draft_id} не найден или уже обработан")
         await state.clear()
         return
 
-    # Обновляем драфт новым текстом
-    draft.content = message.text
-    draft.status = 'edited'
     await db.commit()
 
     await message.answer(f"✅ Драфт #{draft_id} обновлен!")
@@ -703,280 +1031,225 @@ async def process_manual_edit(message: Message, state: FSMContext, db: AsyncSess
     await state.clear()
 
 
-@router.message(EditDraft.waiting_for_llm_edit, F.voice)
-async def process_voice_edit(message: Message, state: FSMContext, db: AsyncSession):
-    """Обработка голосовых инструкций по редактированию."""
+def _edit_cache_key(provider: str, original_content: str, edit_instructions: str) -> str:
+    """Ключ кэша AI-редактирования: провайдер + хэш исходного текста и инструкций."""
+    digest = hashlib.blake2b(
+        f"{original_content}\x00{edit_instructions}".encode(),
+        digest_size=16
+    ).hexdigest()
+    return f"edit:{provider}:{digest}"
 
-    # Используем встроенное распознавание Telegram (БЕСПЛАТНО!)
-    if message.voice.transcription:
-        # Транскрипция доступна (Telegram Premium или бот запросил)
-        edit_instructions = message.voice.transcription
 
-        await message.answer(
-            f"✅ <b>Распознал:</b>\n<i>{edit_instructions}</i>\n\n⏳ Генерирую новый вариант...",
-            parse_mode="HTML"
+async def _get_cached_edit(provider: str, original_content: str, edit_instructions: str) -> Optional[str]:
+    """Получить закэшированный результат AI-редактирования (None при промахе или недоступности Redis)."""
+    try:
+        return await get_edit_cache().get(_edit_cache_key(provider, original_content, edit_instructions))
+    except Exception as e:
+        logger.warning("edit_cache_get_error", error=str(e))
+        return None
+
+
+async def _set_cached_edit(provider: str, original_content: str, edit_instructions: str, new_content: str):
+    """Сохранить результат AI-редактирования в кэш на EDIT_CACHE_TTL секунд."""
+    try:
+        await get_edit_cache().setex(
+            _edit_cache_key(provider, original_content, edit_instructions), EDIT_CACHE_TTL, new_content
         )
-    else:
-        # Транскрипция недоступна - предлагаем отправить текстом
-        await message.answer(
-            "❌ <b>Голосовое распознавание недоступно</b>\n\n"
-            "Пожалуйста, отправьте инструкции по редактированию <b>текстом</b>.\n\n"
-            "<i>💡 Совет: Telegram Premium пользователи получают автоматическое распознавание голоса!</i>",
-            parse_mode="HTML"
-        )
-        return
-
-    # Далее та же логика редактирования
-    data = await state.get_data()
-    draft_id = data.get("draft_id")
-    original_content = data.get("original_content")
-    article_id = data.get("article_id")
-
-    try:
-        # Получаем оригинальную статью
-        result = await db.execute(
-            select(RawArticle).where(RawArticle.id == article_id)
-        )
-        article = result.scalar_one_or_none()
-
-        # Используем выбранный LLM провайдер для редактирования
-        llm = get_llm_provider(_selected_llm_provider)
-
-        prompt = f"""Ты профессиональный редактор Telegram-постов о юридических новостях в сфере AI.
-
-📌 ИСХОДНЫЙ ПОСТ (который нужно отредактировать):
-{original_content}
-
-📰 ОРИГИНАЛЬНАЯ СТАТЬЯ (для справки):
-{article.content[:1000] if article else 'Не доступна'}
+    except Exception as e:
+        logger.warning("edit_cache_set_error", error=str(e))
 
-✏️ ИНСТРУКЦИИ ПОЛЬЗОВАТЕЛЯ:
-{edit_instructions}
 
-🎯 ТВОЯ ЗАДАЧА:
-Внимательно прочитай инструкции пользователя и ТОЧНО выполни их. Не добавляй ничего от себя, только то что просит пользователь.
+async def _stream_edit_to_message(placeholder: Message, chunks) -> str:
+    """
+    Собрать ответ LLM из потока, показывая промежуточный текст в плейсхолдере.
 
-ВАЖНО:
-1. Выполни ТОЛЬКО то, что просит пользователь в инструкциях
-2. Сохрани общую структуру поста (заголовок, текст, хештеги)
-3. Используй HTML разметку (<b>, <i>, <code>)
-4. Если пользователь просит сделать короче - убери лишние детали
-5. Если просит добавить - добавь релевантную информацию
-6. Если просит изменить тон - измени стиль написания
-7. Не выдумывай факты, используй информацию из оригинальной статьи
+    Промежуточный текст отправляется без parse_mode (HTML ещё может быть
+    незакрыт) и не чаще раза в EDIT_STREAM_INTERVAL секунд - лимиты Telegram на edit.
 
-ВЕРНИ ТОЛЬКО отредактированный текст поста, без комментариев и пояснений."""
+    Args:
+        placeholder: Сообщение бота, которое обновляется по ходу генерации
+        chunks: Асинхронный итератор фрагментов текста
 
-        new_content = await llm.generate_completion(
-            messages=[
-                {"role": "system", "content": "Ты опытный редактор. Строго следуй инструкциям пользователя. Возвращай только финальный текст, без объяснений."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=3500
-        )
+    Returns:
+        Полный сгенерированный текст
+    """
+    loop = asyncio.get_running_loop()
+    buf: List[str] = []
+    last_edit = loop.time()
+
+    async for token in chunks:
+        buf.append(token)
+        now = loop.time()
+        if now - last_edit >= EDIT_STREAM_INTERVAL:
+            last_edit = now
+            try:
+                await placeholder.edit_text("".join(buf)[:EDIT_STREAM_PREVIEW_CHARS] + " ▌")
+            except (TelegramBadRequest, TelegramRetryAfter):
+                # Промежуточный вид не критичен - пропускаем обновление
+                pass
 
-        # Сохраняем новую версию в state
-        await state.update_data(new_content=new_content)
+    return "".join(buf).strip()
 
-        # Показываем новый вариант с кнопками
-        from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text="✅ Опубликовать",
-                    callback_data=f"publish_edited:{draft_id}"
-                ),
-                InlineKeyboardButton(
-                    text="✏️ Редактировать дальше",
-                    callback_data=f"continue_edit:{draft_id}"
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text="❌ Отменить",
-                    callback_data=f"cancel_edit:{draft_id}"
-                )
-            ]
-        ])
+async def _generate_and_show_edit(
+    message: Message,
+    state: FSMContext,
+    edit_instructions: str,
+    ack_text: str = "⏳ Генерирую новый вариант...",
+):
+    """
+    Сгенерировать новый вариант драфта через LLM и показать его с кнопками.
 
-        await message.answer(
-            f"<b>📝 Новый вариант:</b>\n\n{new_content}",
-            reply_markup=keyboard,
-            parse_mode="HTML"
-        )
+    Общая часть текстового и голосового AI-редактирования.
 
-    except Exception as e:
-        logger.error("voice_edit_generation_error", error=str(e), provider=_selected_llm_provider)
+    Args:
+        message: Сообщение с инструкциями
+        state: FSM контекст с draft_id, original_content и article_excerpt
+        edit_instructions: Инструкции пользователя по редактированию
+        ack_text: Текст подтверждения, отправляемого до ответа LLM
+    """
+    edit_instructions = (edit_instructions or "").strip()
+    if len(edit_instructions) < EDIT_MIN_INSTRUCTIONS_CHARS:
         await message.answer(
-            f"❌ Ошибка при генерации: {str(e)}\n\nПопробуйте еще раз или отправьте /cancel"
+            "⚠️ Инструкция слишком короткая. Опишите, что нужно изменить, "
+            "или отправьте /cancel для отмены."
         )
+        return
 
-
-@router.message(EditDraft.waiting_for_llm_edit)
-async def process_edit(message: Message, state: FSMContext, db: AsyncSession):
-    """Обработка текстовых инструкций по редактированию через LLM."""
     data = await state.get_data()
     draft_id = data.get("draft_id")
     original_content = data.get("original_content")
-    article_id = data.get("article_id")
-    edit_instructions = message.text
-
-    await message.answer("⏳ Генерирую новый вариант...")
-
-    try:
-        # Получаем оригинальную статью
-        result = await db.execute(
-            select(RawArticle).where(RawArticle.id == article_id)
-        )
-        article = result.scalar_one_or_none()
-
-        # Используем выбранный LLM провайдер
-        llm = get_llm_provider(_selected_llm_provider)
-
-        prompt = f"""Ты профессиональный редактор Telegram-постов о юридических новостях в сфере AI.
-
-📌 ИСХОДНЫЙ ПОСТ (который нужно отредактировать):
-{original_content}
-
-📰 ОРИГИНАЛЬНАЯ СТАТЬЯ (для справки):
-{article.content[:1000] if article else 'Не доступна'}
-
-✏️ ИНСТРУКЦИИ ПОЛЬЗОВАТЕЛЯ:
-{edit_instructions}
+    article_excerpt = data.get("article_excerpt")
 
-🎯 ТВОЯ ЗАДАЧА:
-Внимательно прочитай инструкции пользователя и ТОЧНО выполни их. Не добавляй ничего от себя, только то что просит пользователь.
+    # Провайдер фиксируем один раз: кэш, генерация и логи используют одно значение,
+    # даже если выбор провайдера изменится во время генерации
+    provider = _selected_llm_provider
 
-ВАЖНО:
-1. Выполни ТОЛЬКО то, что просит пользователь в инструкциях
-2. Сохрани общую структуру поста (заголовок, текст, хештеги)
-3. Используй HTML разметку (<b>, <i>, <code>)
-4. Если пользователь просит сделать короче - убери лишние детали
-5. Если просит добавить - добавь релевантную информацию
-6. Если просит изменить тон - измени стиль написания
-7. Не выдумывай факты, используй информацию из оригинальной статьи
+    # Подтверждение отправляем в фоне - запрос к LLM стартует не дожидаясь Telegram
+    ack_task = asyncio.create_task(message.answer(ack_text, parse_mode="HTML"))
 
-ВЕРНИ ТОЛЬКО отредактированный текст поста, без комментариев и пояснений."""
+    try:
+        # Повторные одинаковые инструкции отдаем из кэша без запроса к LLM
+        new_content = await _get_cached_edit(provider, original_content, edit_instructions)
+
+        # Сообщение-подтверждение становится плейсхолдером для результата
+        placeholder = await ack_task
+
+        if new_content is None:
+            # Используем выбранный LLM провайдер
+            llm = get_llm_provider(provider)
+
+            prompt = EDIT_PROMPT_TEMPLATE.format_map({
+                "original": original_content,
+                "article": article_excerpt or "Не доступна",
+                "instructions": edit_instructions,
+            })
+
+            new_content = await _stream_edit_to_message(
+                placeholder,
+                llm.stream_completion(
+                    messages=[
+                        {"role": "system", "content": EDIT_SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.3,
+                    max_tokens=3500
+                )
+            )
 
-        new_content = await llm.generate_completion(
-            messages=[
-                {"role": "system", "content": "Ты опытный редактор. Строго следуй инструкциям пользователя. Возвращай только финальный текст, без объяснений."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=3500
-        )
+            await _set_cached_edit(provider, original_content, edit_instructions, new_content)
 
         # Сохраняем новую версию в state
         await state.update_data(new_content=new_content)
 
         # Показываем новый вариант с кнопками
-        from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text="✅ Опубликовать",
-                    callback_data=f"publish_edited:{draft_id}"
-                ),
-                InlineKeyboardButton(
-                    text="✏️ Редактировать дальше",
-                    callback_data=f"continue_edit:{draft_id}"
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text="❌ Отменить",
-                    callback_data=f"cancel_edit:{draft_id}"
-                )
-            ]
-        ])
-
-        await message.answer(
+        await edit_message(
+            placeholder,
             f"<b>📝 Новый вариант:</b>\n\n{new_content}",
-            reply_markup=keyboard,
+            reply_markup=get_edit_result_keyboard(draft_id),
             parse_mode="HTML"
         )
 
     except Exception as e:
-        logger.error("edit_generation_error", error=str(e), provider=_selected_llm_provider)
+        logger.error("edit_generation_error", error=str(e), provider=provider)
+        await asyncio.wait({ack_task})
         await message.answer(
             f"❌ Ошибка при генерации: {str(e)}\n\n"
             f"Попробуйте еще раз или отправьте /cancel"
         )
 
 
-@router.callback_query(F.data.startswith("publish_edited:"))
-async def callback_publish_edited(callback: CallbackQuery, state: FSMContext, db: AsyncSession):
-    """Опубликовать отредактированную версию."""
-    # ВАЖНО: отвечаем сразу, чтобы кнопка не зависала
-    await callback.answer("Публикую...")
+@router.message(EditDraft.waiting_for_llm_edit, F.voice)
+async def process_voice_edit(message: Message, state: FSMContext):
+    """Обработка голосовых инструкций по редактированию."""
 
-    if not await check_admin(callback.from_user.id):
+    # Используем встроенное распознавание Telegram (БЕСПЛАТНО!)
+    if not message.voice.transcription:
+        # Транскрипция недоступна - предлагаем отправить текстом
+        await message.answer(
+            "❌ <b>Голосовое распознавание недоступно</b>\n\n"
+            "Пожалуйста, отправьте инструкции по редактированию <b>текстом</b>.\n\n"
+            "<i>💡 Совет: Telegram Premium пользователи получают автоматическое распознавание голоса!</i>",
+            parse_mode="HTML"
+        )
         return
 
-    draft_id = int(callback.data.split(":")[1])
-    data = await state.get_data()
-    new_content = data.get("new_content")
+    # Транскрипция доступна (Telegram Premium или бот запросил)
+    edit_instructions = message.voice.transcription
 
-    # Обновляем драфт
-    result = await db.execute(
-        select(PostDraft).where(PostDraft.id == draft_id)
+    await _generate_and_show_edit(
+        message, state, edit_instructions,
+        ack_text=f"✅ <b>Распознал:</b>\n<i>{edit_instructions}</i>\n\n⏳ Генерирую новый вариант..."
     )
-    draft = result.scalar_one_or_none()
 
-    if draft and new_content:
-        draft.content = new_content
-        draft.status = 'edited'
-        await db.commit()
 
-        # Публикуем
-        success = await publish_draft(draft_id, db, callback.from_user.id)
+@router.message(EditDraft.waiting_for_llm_edit)
+async def process_edit(message: Message, state: FSMContext):
+    """Обработка текстовых инструкций по редактированию через LLM."""
+    await _generate_and_show_edit(message, state, message.text)
 
-        try:
-            if success:
-                # Проверяем тип сообщения (photo или text)
-                if callback.message.photo:
-                    await callback.message.edit_caption(
-                        caption=f"✅ Отредактированный драфт #{draft_id} успешно опубликован!",
-                        reply_markup=None
-                    )
-                else:
-                    await callback.message.edit_text(
-                        text=f"✅ Отредактированный драфт #{draft_id} успешно опубликован!",
-                        reply_markup=None
-                    )
-            else:
-                if callback.message.photo:
-                    await callback.message.edit_caption(
-                        caption=f"❌ Ошибка при публикации драфта #{draft_id}",
-                        reply_markup=None
-                    )
-                else:
-                    await callback.message.edit_text(
-                        text=f"❌ Ошибка при публикации драфта #{draft_id}",
-                        reply_markup=None
-                    )
-        except Exception as e:
-            logger.error("callback_publish_edited_error", error=str(e), draft_id=draft_id)
-            # Fallback - отправляем новое сообщение если редактирование не удалось
-            status_msg = f"✅ Отредактированный драфт #{draft_id} успешно опубликован!" if success else f"❌ Ошибка при публикации драфта #{draft_id}"
-            await callback.message.answer(status_msg)
+
+@router.callback_query(DraftCB.filter(F.action == "publish_edited"))
+async def callback_publish_edited(callback: CallbackQuery, callback_data: DraftCB, state: FSMContext, db: AsyncSession):
+    """Опубликовать отредактированную версию."""
+    # ВАЖНО: отвечаем сразу, чтобы кнопка не зависала
+    await callback.answer("Публикую...")
+
+    draft_id = callback_data.draft_id
+    data = await state.get_data()
+    new_content = data.get("new_content")
+
+    # Сохраняем новую версию без предварительной загрузки драфта -
+    # publish_draft сам получит нужные поля через UPDATE ... RETURNING
+    updated = False
+    if new_content:
+        result = await db.execute(
+            update(PostDraft)
+            .where(PostDraft.id == draft_id, PostDraft.status.in_(REVIEWABLE_DRAFT_STATUSES))
+            .values(content=new_content, status='edited', published_text=None)
+        )
+        await db.commit()
+        updated = result.rowcount > 0
+
+    if updated:
+        # Публикуем через очередь
+        await enqueue_publication(
+            callback.message,
+            draft_id,
+            callback.from_user.id,
+            success_text=f"✅ Отредактированный драфт #{draft_id} успешно опубликован!",
+            db=db
+        )
     else:
-        await callback.answer("❌ Ошибка: драфт не найден", show_alert=True)
+        await callback.answer("❌ Ошибка: драфт не найден или уже обработан", show_alert=True)
 
     await state.clear()
 
 
-@router.callback_query(F.data.startswith("continue_edit:"))
-async def callback_continue_edit(callback: CallbackQuery, state: FSMContext, db: AsyncSession):
+@router.callback_query(DraftCB.filter(F.action == "continue_edit"))
+async def callback_continue_edit(callback: CallbackQuery, callback_data: DraftCB, state: FSMContext, db: AsyncSession):
     """Продолжить редактирование."""
-    if not await check_admin(callback.from_user.id):
-        return
-
-    draft_id = int(callback.data.split(":")[1])
+    draft_id = callback_data.draft_id
     data = await state.get_data()
     new_content = data.get("new_content")
 
@@ -987,41 +1260,27 @@ async def callback_continue_edit(callback: CallbackQuery, state: FSMContext, db:
             f"━━━━━━━━━━━━━━━━\n\n"
             f"✏️ <b>Опишите дополнительные изменения:</b>")
 
-    # Проверяем тип сообщения (photo или text)
-    if callback.message.photo:
-        await callback.message.edit_caption(caption=text, parse_mode="HTML")
-    else:
-        await callback.message.edit_text(text, parse_mode="HTML")
+    await edit_message(callback.message, text, parse_mode="HTML")
 
     await callback.answer("Опишите дополнительные изменения")
 
 
-@router.callback_query(F.data.startswith("cancel_edit:"))
+@router.callback_query(DraftCB.filter(F.action == "cancel_edit"))
 async def callback_cancel_edit(callback: CallbackQuery, state: FSMContext):
     """Отменить редактирование."""
-    if not await check_admin(callback.from_user.id):
-        return
-
     await state.clear()
 
-    # Проверяем тип сообщения (photo или text)
-    if callback.message.photo:
-        await callback.message.edit_caption(caption="❌ Редактирование отменено.")
-    else:
-        await callback.message.edit_text("❌ Редактирование отменено.")
+    await edit_message(callback.message, "❌ Редактирование отменено.")
 
     await callback.answer("Отменено")
 
 
-@router.callback_query(F.data.startswith("cancel:"))
-async def callback_cancel_action(callback: CallbackQuery, db: AsyncSession):
+@router.callback_query(DraftCB.filter(F.action == "cancel"))
+async def callback_cancel_action(callback: CallbackQuery, callback_data: DraftCB, db: AsyncSession):
     """Обработчик кнопки 'Отмена' в диалогах подтверждения (publish/reject)."""
     await callback.answer("Отменено")
 
-    if not await check_admin(callback.from_user.id):
-        return
-
-    draft_id = int(callback.data.split(":")[1])
+    draft_id = callback_data.draft_id
 
     # Возвращаем исходную клавиатуру драфта (отменяем действие)
     await callback.message.edit_reply_markup(
@@ -1029,15 +1288,12 @@ async def callback_cancel_action(callback: CallbackQuery, db: AsyncSession):
     )
 
 
-@router.callback_query(F.data.startswith("back_to_draft:"))
-async def callback_back_to_draft(callback: CallbackQuery, db: AsyncSession):
+@router.callback_query(DraftCB.filter(F.action == "back_to_draft"))
+async def callback_back_to_draft(callback: CallbackQuery, callback_data: DraftCB, db: AsyncSession):
     """Обработчик кнопки 'Назад' - возвращает исходную клавиатуру драфта."""
     await callback.answer("Отменено")
 
-    if not await check_admin(callback.from_user.id):
-        return
-
-    draft_id = int(callback.data.split(":")[1])
+    draft_id = callback_data.draft_id
 
     # Возвращаем исходную клавиатуру драфта (не отправляем новое сообщение!)
     await callback.message.edit_reply_markup(
@@ -1052,45 +1308,24 @@ async def callback_back_to_draft(callback: CallbackQuery, db: AsyncSession):
 @router.callback_query(F.data == "show_drafts")
 async def callback_show_drafts(callback: CallbackQuery, db: AsyncSession):
     """Показать драфты через кнопку."""
-    if not await check_admin(callback.from_user.id):
-        await callback.answer("⛔️ Нет прав доступа", show_alert=True)
-        return
-
-    # Получаем ВСЕ драфты в статусе pending_review (без фильтра по дате)
-    result = await db.execute(
-        select(PostDraft)
-        .where(PostDraft.status == 'pending_review')
-        .order_by(PostDraft.created_at.desc())
-    )
-    drafts = list(result.scalars().all())
+    pending_count = await fan_out_pending_drafts(callback.message.chat.id, db)
 
-    if not drafts:
-        await callback.message.answer("📭 Нет новых драфтов для модерации.")
+    if pending_count is None:
+        await callback.answer("⏳ Драфты уже отправляются")
+    elif pending_count:
+        await callback.answer("Драфты отправлены")
+    else:
         await callback.answer()
-        return
-
-    await callback.message.answer(f"📝 Найдено {len(drafts)} драфтов. Отправляю...")
-
-    # Отправляем каждый драфт (ограничиваем настройкой publisher_max_posts_per_day)
-    max_drafts = min(len(drafts), settings.publisher_max_posts_per_day)
-    for index, draft in enumerate(drafts[:max_drafts], start=1):
-        await send_draft_for_review(callback.message.chat.id, draft, db, draft_number=index)
-
-    await callback.answer("Драфты отправлены")
 
 
 @router.callback_query(F.data == "run_fetch")
 async def callback_run_fetch(callback: CallbackQuery):
     """Запустить сбор новостей через кнопку."""
-    if not await check_admin(callback.from_user.id):
-        await callback.answer("⛔️ Нет прав доступа", show_alert=True)
-        return
-
     await callback.message.answer("🔄 Запускаю сбор новостей...")
 
     try:
         from app.tasks.celery_tasks import manual_workflow
-        task = manual_workflow.delay()
+        task = await asyncio.to_thread(manual_workflow.delay)
 
         await callback.message.answer(
             f"✅ Задача запущена!\n"
@@ -1109,10 +1344,6 @@ async def callback_run_fetch(callback: CallbackQuery):
 @router.callback_query(F.data == "show_stats")
 async def callback_show_stats(callback: CallbackQuery, db: AsyncSession):
     """Показать статистику через кнопку."""
-    if not await check_admin(callback.from_user.id):
-        await callback.answer("⛔️ Нет прав доступа", show_alert=True)
-        return
-
     stats_text = await get_statistics(db)
     await callback.message.answer(stats_text, parse_mode="HTML")
     await callback.answer()
@@ -1121,29 +1352,11 @@ async def callback_show_stats(callback: CallbackQuery, db: AsyncSession):
 @router.callback_query(F.data == "show_settings")
 async def callback_show_settings(callback: CallbackQuery, db: AsyncSession):
     """Показать настройки через кнопку."""
-    if not await check_admin(callback.from_user.id):
-        await callback.answer("⛔️ Нет прав доступа", show_alert=True)
-        return
-
     # Используем новую систему настроек
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="📰 Источники новостей", callback_data="settings:sources")],
-        [InlineKeyboardButton(text="🤖 Модели LLM", callback_data="settings:llm")],
-        [InlineKeyboardButton(text="🎨 Генерация изображений (DALL-E)", callback_data="settings:dalle")],
-        [InlineKeyboardButton(text="📅 Автопубликация", callback_data="settings:autopublish")],
-        [InlineKeyboardButton(text="🔄 Сбор новостей", callback_data="settings:fetcher")],
-        [InlineKeyboardButton(text="🔔 Уведомления", callback_data="settings:alerts")],
-        [InlineKeyboardButton(text="🎯 Фильтрация и качество", callback_data="settings:quality")],
-        [InlineKeyboardButton(text="💰 Бюджет API", callback_data="settings:budget")],
-        [InlineKeyboardButton(text="« Назад", callback_data="back_to_main_menu")],
-    ])
-
     await callback.message.edit_text(
-        "⚙️ <b>Системные настройки</b>\n\n"
-        "Все параметры сохраняются в базе данных и применяются автоматически.\n\n"
-        "Выберите категорию:",
+        SETTINGS_TEXT,
         parse_mode="HTML",
-        reply_markup=keyboard
+        reply_markup=SETTINGS_KEYBOARD
     )
     await callback.answer()
 
@@ -1153,9 +1366,6 @@ async def callback_show_llm_selection(callback: CallbackQuery):
     """Показать выбор LLM провайдера."""
     await callback.answer()
 
-    if not await check_admin(callback.from_user.id):
-        return
-
     await callback.message.answer(
         "🤖 <b>Выберите LLM провайдера:</b>\n\n"
         "• <b>OpenAI</b> - GPT-4o-mini для быстрой генерации текста\n"
@@ -1172,64 +1382,217 @@ async def callback_show_llm_selection(callback: CallbackQuery):
 # Утилитарные функции
 # ====================
 
-async def send_draft_for_review(chat_id: int, draft: PostDraft, db: AsyncSession, bot=None, draft_number: int = None):
+EDIT_MESSAGE_MAX_RETRIES = 3
+
+
+async def edit_message(message: Message, text: str, **kwargs):
+    """
+    Отредактировать текст сообщения бота независимо от его типа.
+
+    Для сообщений с фото редактируется подпись (caption), для остальных - текст.
+    При флуд-контроле Telegram (TelegramRetryAfter) ждём указанное время и повторяем.
+
+    Args:
+        message: Сообщение для редактирования
+        text: Новый текст (или подпись)
+        **kwargs: Дополнительные параметры (reply_markup, parse_mode и т.д.)
+    """
+    if message.photo:
+        edit, key = message.edit_caption, "caption"
+    else:
+        edit, key = message.edit_text, "text"
+
+    for attempt in range(1, EDIT_MESSAGE_MAX_RETRIES + 1):
+        try:
+            return await edit(**{key: text}, **kwargs)
+        except TelegramRetryAfter as e:
+            if attempt == EDIT_MESSAGE_MAX_RETRIES:
+                raise
+            logger.warning("edit_message_retry_after", retry_after=e.retry_after, attempt=attempt)
+            await asyncio.sleep(e.retry_after)
+
+
+@lru_cache(maxsize=512)
+def render_draft_preview(
+    display_number: int,
+    content: str,
+    confidence_score: float,
+    source_name: str,
+    created_at: datetime
+) -> Tuple[str, str]:
+    """
+    Сформировать preview драфта для модерации.
+
+    Ключ кэша - сами значения драфта, поэтому повторные отправки того же драфта
+    (и после редактирования - уже с новым content) собираются один раз.
+    content уже содержит HTML разметку поста и не экранируется; название
+    источника приходит из внешнего фида и экранируется (тоже один раз на ключ).
+
+    Returns:
+        (заголовок, текст поста с подвалом)
+    """
+    preview_header = f"🆕 <b>Новый драфт #{display_number}</b>"
+
+    preview_footer = f"""
+{SEPARATOR_LINE}
+📊 Confidence: {confidence_score:.2f}
+🔗 Источник: {html.escape(source_name)}
+⏰ Создан: {created_at.strftime('%d.%m.%Y %H:%M')}
+"""
+
+    # Бюджет под текст поста считаем заранее: сообщение с заголовком
+    # (вариант без фото) тоже должно уложиться в лимит Telegram
+    content_budget = TELEGRAM_TEXT_LIMIT - len(preview_header) - len(preview_footer) - 3
+
+    return preview_header, f"{content[:content_budget]}\n{preview_footer}"
+
+
+async def load_draft_articles(drafts: List[PostDraft], db: AsyncSession) -> Dict[int, RawArticle]:
+    """
+    Загрузить оригинальные статьи для списка драфтов одним запросом.
+
+    Args:
+        drafts: Драфты постов
+        db: Сессия БД
+
+    Returns:
+        Словарь {article_id: RawArticle}
+    """
+    # Нужны только для старых драфтов без денормализованного source_name
+    article_ids = {
+        draft.article_id for draft in drafts
+        if draft.source_name is None and draft.article_id is not None
+    }
+    if not article_ids:
+        return {}
+
+    result = await db.execute(
+        select(RawArticle).where(RawArticle.id.in_(article_ids))
+    )
+    return {article.id: article for article in result.scalars().all()}
+
+
+async def send_drafts_for_review(chat_id: int, drafts: AsyncIterator[PostDraft], db: AsyncSession) -> int:
+    """
+    Отправить драфты на модерацию параллельно, по мере их чтения из БД.
+
+    Драфты из итератора складываются в ограниченную очередь, которую разбирают
+    settings.telegram_send_concurrency воркеров (лимиты Bot API) - первый драфт
+    уходит в Telegram сразу, пока остальные еще читаются.
+    Источник берется из денормализованного draft.source_name.
+
+    Args:
+        chat_id: ID чата для отправки
+        drafts: Асинхронный итератор драфтов в порядке нумерации
+        db: Сессия БД
+
+    Returns:
+        Количество драфтов, поставленных на отправку
+    """
+    concurrency = settings.telegram_send_concurrency
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def _worker():
+        while (item := await queue.get()) is not None:
+            index, draft = item
+            try:
+                # db=None: сессия занята курсором и не используется конкурентно
+                await send_draft_for_review(chat_id, draft, None, draft_number=index)
+            except Exception as e:
+                logger.error("draft_send_error", draft_id=draft.id, error=str(e))
+
+    workers = [asyncio.create_task(_worker()) for _ in range(concurrency)]
+    count = 0
+    try:
+        async for draft in drafts:
+            count += 1
+            await queue.put((count, draft))
+    finally:
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+
+    # Сохраняем file_id загруженных фото одним коммитом после всех отправок
+    if db.dirty:
+        await db.commit()
+
+    return count
+
+
+async def send_draft_for_review(
+    chat_id: int,
+    draft: PostDraft,
+    db: Optional[AsyncSession],
+    bot=None,
+    draft_number: int = None,
+    article: Optional[RawArticle] = None
+):
     """
     Отправить драфт администратору на модерацию.
 
     Args:
         chat_id: ID чата для отправки
         draft: Драфт поста
-        db: Сессия БД
+        db: Сессия БД (None - не загружать статью, если она не передана)
         bot: Опциональный экземпляр Bot (для использования в Celery tasks)
         draft_number: Порядковый номер драфта за день (если None, используется draft.id)
+        article: Предзагруженная оригинальная статья (если None, загружается из БД)
     """
     try:
         if bot is None:
             bot = get_bot()
 
-        # Получаем информацию об оригинальной статье
-        result = await db.execute(
-            select(RawArticle).where(RawArticle.id == draft.article_id)
-        )
-        article = result.scalar_one_or_none()
+        # Источник денормализован в драфт; статью читаем только для старых драфтов
+        # без source_name (если не передана заранее).
+        # db=None означает, что статьи уже предзагружены и сессию трогать нельзя
+        # (параллельная отправка в send_drafts_for_review)
+        source_name = draft.source_name
+        if source_name is None:
+            if article is None and db is not None and draft.article_id is not None:
+                article = await db.get(RawArticle, draft.article_id)
+            source_name = article.source_name if article else 'Unknown'
 
         # Используем порядковый номер или ID
         display_number = draft_number if draft_number is not None else draft.id
 
-        # Формируем preview текст
-        preview_header = f"🆕 <b>Новый драфт #{display_number}</b>"
-
-        preview_footer = f"""
-━━━━━━━━━━━━━━━━
-📊 Confidence: {draft.confidence_score:.2f}
-🔗 Источник: {article.source_name if article else 'Unknown'}
-⏰ Создан: {draft.created_at.strftime('%d.%m.%Y %H:%M')}
-"""
+        # Формируем preview текст (кэшируется по значениям драфта)
+        preview_header, preview_body = render_draft_preview(
+            display_number,
+            draft.content,
+            draft.confidence_score,
+            source_name,
+            draft.created_at
+        )
 
-        full_preview_text = f"{preview_header}\n\n{draft.content}\n{preview_footer}"
+        keyboard = get_draft_review_keyboard(draft.id)
 
         # Отправляем с изображением если есть
         if draft.image_path:
             # Отправляем двумя сообщениями для обхода лимита caption (1024 символа)
-            photo = FSInputFile(draft.image_path)
-            await bot.send_photo(
+            photo_message = await bot.send_photo(
                 chat_id=chat_id,
-                photo=photo,
+                photo=await get_draft_photo(draft),
                 caption=preview_header
             )
 
+            # Запоминаем file_id - повторные отправки и публикация не загружают файл заново
+            if not draft.telegram_photo_file_id:
+                draft.telegram_photo_file_id = photo_message.photo[-1].file_id
+                if db is not None:
+                    await db.commit()
+
             # Отправляем полный текст preview с кнопками
             await bot.send_message(
                 chat_id=chat_id,
-                text=f"{draft.content}\n{preview_footer}",
-                reply_markup=get_draft_review_keyboard(draft.id),
+                text=preview_body,
+                reply_markup=keyboard,
                 parse_mode="HTML"
             )
         else:
             await bot.send_message(
                 chat_id=chat_id,
-                text=full_preview_text,
-                reply_markup=get_draft_review_keyboard(draft.id),
+                text=f"{preview_header}\n\n{preview_body}",
+                reply_markup=keyboard,
                 parse_mode="HTML"
             )
 
@@ -1239,179 +1602,399 @@ async def send_draft_for_review(chat_id: int, draft: PostDraft, db: AsyncSession
         logger.error("draft_send_error", draft_id=draft.id, error=str(e))
 
 
-async def _vectorize_publication_background(pub_id: int, content: str, draft_id: int):
-    """Фоновая векторизация публикации в Qdrant (не блокирует UI)."""
-    try:
-        vector_search = get_vector_search()
-        await vector_search.add_publication(
-            pub_id=pub_id,
-            content=content,
-            published_at=datetime.utcnow(),
-            reactions={}
-        )
-        logger.info("publication_vectorized", pub_id=pub_id, draft_id=draft_id)
-    except Exception as vec_error:
-        logger.warning(
-            "vectorization_failed",
-            draft_id=draft_id,
-            error=str(vec_error)
-        )
+# Необязательный маркер международных новостей в начале поста (сохраняется при удалении заголовка)
+INTL_MARKER_PATTERN = "|".join(re.escape(marker) for marker in INTL_MARKERS)
 
 
-async def publish_draft(draft_id: int, db: AsyncSession, admin_id: int) -> bool:
+@lru_cache(maxsize=1024)
+def _title_regex(title: str) -> re.Pattern:
+    """
+    Скомпилировать регулярное выражение заголовка поста (кэшируется по заголовку).
+
+    Args:
+        title: Заголовок драфта
+
+    Returns:
+        Паттерн: маркер (группа intl) + заголовок (в тегах <b> или без) + 1-2 перевода строки
+    """
+    escaped = re.escape(title)
+    return re.compile(rf"(?P<intl>{INTL_MARKER_PATTERN})?(?:<b>{escaped}</b>|{escaped})\n\n?")
+
+
+def strip_post_title(text: str, title: str) -> str:
+    """
+    Убрать заголовок из начала поста (для публикации с картинкой, где он уже есть).
+
+    Маркер международных новостей, если он стоит перед заголовком, сохраняется.
+
+    Args:
+        text: Текст поста
+        title: Заголовок драфта
+
+    Returns:
+        Текст без заголовка
+    """
+    # Один проход скомпилированного regex вместо перебора маркеров и вариантов заголовка
+    match = _title_regex(title).match(text)
+    if not match:
+        return text
+    return (match.group("intl") or "") + text[match.end():]
+
+
+def build_publish_text(draft, log=logger) -> str:
+    """
+    Сформировать итоговый текст поста для канала.
+
+    Args:
+        draft: Драфт (строка с полями content, title, image_path, source_name, article_url)
+        log: Логгер с контекстом публикации
+
+    Returns:
+        Текст с источником, обрезанный под лимит Telegram
+    """
+    # Формируем финальный текст с интерактивными элементами
+    final_text = draft.content
+    log.debug("publish_draft_before_title_removal", has_image=bool(draft.image_path), title=draft.title[:50] if draft.title else None, content_start=final_text[:100])
+
+    # Если есть изображение - убираем заголовок из текста (он уже на картинке)
+    if draft.image_path and draft.title:
+        final_text = strip_post_title(final_text, draft.title)
+
+        log.debug("publish_draft_after_title_removal", content_start=final_text[:100])
+
+    # Добавляем разделитель и источник
+    source_suffix = ""
+    if draft.article_url:
+        # Источник с attribution (денормализован в драфт при генерации)
+        source_name = html.escape(draft.source_name) if draft.source_name else "Источник"
+        source_suffix = f"\n\n{SEPARATOR_LINE}\n📰 {source_name}"
+
+    # Обрезаем сам текст под лимит Telegram (4096 символов), чтобы источник не отрезался
+    final_text = final_text[:TELEGRAM_TEXT_LIMIT - len(source_suffix)] + source_suffix
+
+    return final_text
+
+
+async def publish_draft(draft_id: int, db: AsyncSession, admin_id: int) -> Optional[bool]:
     """
     Опубликовать драфт в канал.
 
+    Статус approved фиксируется до отправки в Telegram: повторное подтверждение
+    того же драфта не опубликует его второй раз, а строка не остается
+    заблокированной на время сетевых вызовов. Если отправка не удалась,
+    статус возвращается обратно.
+
     Args:
         draft_id: ID драфта
         db: Сессия БД
         admin_id: ID администратора
 
     Returns:
-        True если успешно, False иначе
+        True если успешно, False при ошибке, None если драфт уже обработан
     """
+    # draft_id привязывается к логгеру один раз для всех событий публикации
+    log = logger.bind(draft_id=draft_id)
+
+    # Прежний статус читается из подзапроса: RETURNING отдает только новые значения
+    previous = (
+        select(PostDraft.id, PostDraft.status)
+        .where(PostDraft.id == draft_id)
+        .with_for_update()
+        .subquery()
+    )
+    draft = None
+    message = None
+
     try:
-        # Получаем драфт
+        # Забираем драфт на публикацию и сразу получаем нужные поля (UPDATE ... RETURNING).
+        # Драфт, уже одобренный или отклоненный, условию по статусу не подходит
         result = await db.execute(
-            select(PostDraft).where(PostDraft.id == draft_id)
+            update(PostDraft)
+            .where(
+                PostDraft.id == previous.c.id,
+                PostDraft.status.in_(REVIEWABLE_DRAFT_STATUSES)
+            )
+            .values(
+                status='approved', reviewed_at=DB_UTC_NOW, reviewed_by=admin_id,
+                publish_queued_at=None
+            )
+            .returning(
+                previous.c.status.label('previous_status'),
+                PostDraft.id, PostDraft.title, PostDraft.content,
+                PostDraft.source_name, PostDraft.article_url,
+                PostDraft.image_path, PostDraft.telegram_photo_file_id,
+                PostDraft.published_text, PostDraft.reviewed_at
+            )
         )
-        draft = result.scalar_one_or_none()
+        draft = result.one_or_none()
 
         if not draft:
-            return False
-
-        # Получаем оригинальную статью для ссылки
-        result = await db.execute(
-            select(RawArticle).where(RawArticle.id == draft.article_id)
-        )
-        article = result.scalar_one_or_none()
-
-        # Формируем финальный текст с интерактивными элементами
-        final_text = draft.content
-        logger.info("publish_draft_before_title_removal", draft_id=draft_id, has_image=bool(draft.image_path), title=draft.title[:50] if draft.title else None, content_start=final_text[:100])
-
-        # Если есть изображение - убираем заголовок из текста (он уже на картинке)
-        if draft.image_path and draft.title:
-            # Сначала ищем маркеры международных новостей
-            intl_markers = ["🌍 Международные новости:\n\n", "🌎 За рубежом:\n\n", "🌏 В мире:\n\n",
-                           "🌐 Новости из-за рубежа:\n\n", "🗺️ Зарубежный опыт:\n\n"]
-
-            intl_prefix = ""
-            for marker in intl_markers:
-                if final_text.startswith(marker):
-                    intl_prefix = marker
-                    final_text = final_text[len(marker):]  # Временно убираем маркер
-                    break
-
-            # Убираем заголовок (обычно в начале в тегах <b>...</b>)
-            title_patterns = [
-                f"<b>{draft.title}</b>\n\n",
-                f"<b>{draft.title}</b>\n",
-                f"{draft.title}\n\n",
-                f"{draft.title}\n"
-            ]
-            for pattern in title_patterns:
-                if final_text.startswith(pattern):
-                    logger.info("publish_draft_title_pattern_matched", draft_id=draft_id, pattern=pattern[:50])
-                    final_text = final_text[len(pattern):]
-                    break
-
-            # Возвращаем маркер международных новостей если был
-            final_text = intl_prefix + final_text
-
-            logger.info("publish_draft_after_title_removal", draft_id=draft_id, content_start=final_text[:100])
-
-        # Добавляем разделитель и источник
-        if article:
-            final_text += f"\n\n━━━━━━━━━━━━━━━━"
+            await db.rollback()
+            log.info("publish_already_handled")
+            return None
+
+        # Текст публикации строится один раз и сохраняется в драфте
+        final_text = draft.published_text
+        if final_text is None:
+            final_text = build_publish_text(draft, log)
+            await db.execute(
+                update(PostDraft)
+                .where(PostDraft.id == draft_id)
+                .values(published_text=final_text)
+            )
 
-            # Источник с attribution
-            source_name = article.source_name if article.source_name else "Источник"
-            final_text += f"\n📰 {source_name}"
+        await db.commit()
 
         # Публикуем в канал
+        bot = get_bot()
         if draft.image_path:
             # Публикуем двумя последовательными сообщениями для обхода лимита caption (1024 символа)
             # 1. Фото БЕЗ подписи (заголовок уже на изображении)
-            photo = FSInputFile(draft.image_path)
-            photo_message = await get_bot().send_photo(
+            # Если фото уже загружалось на модерацию - переиспользуем file_id
+            await bot.send_photo(
                 chat_id=settings.telegram_channel_id,
-                photo=photo
+                photo=await get_draft_photo(draft)
             )
 
-            # 2. Полный текст с интерактивными кнопками (до 4096 символов)
-            text = final_text[:4096] if len(final_text) > 4096 else final_text
-            message = await get_bot().send_message(
-                chat_id=settings.telegram_channel_id,
-                text=text,
-                parse_mode="HTML",
-                reply_markup=get_reader_keyboard(
-                    article.url,
-                    post_id=draft.id
-                ) if article else None
-            )
-        else:
-            # Telegram ограничивает text до 4096 символов
-            text = final_text[:4096] if len(final_text) > 4096 else final_text
-            message = await get_bot().send_message(
-                chat_id=settings.telegram_channel_id,
-                text=text,
-                parse_mode="HTML",
-                reply_markup=get_reader_keyboard(
-                    article.url,
-                    post_id=draft.id
-                ) if article else None
-            )
+        # Полный текст с интерактивными кнопками
+        message = await bot.send_message(
+            chat_id=settings.telegram_channel_id,
+            text=final_text,
+            parse_mode="HTML",
+            reply_markup=get_reader_keyboard(
+                draft.article_url,
+                post_id=draft.id
+            ) if draft.article_url else None
+        )
 
-        # Сохраняем публикацию в БД
+        # Сохраняем публикацию и feedback в БД одной пачкой.
+        # Время - reviewed_at из RETURNING: одни часы БД для драфта, публикации и feedback
         publication = Publication(
             draft_id=draft.id,
             message_id=message.message_id,
             channel_id=settings.telegram_channel_id_numeric,
+            published_at=draft.reviewed_at,
         )
-        db.add(publication)
-
-        # Обновляем статус драфта
-        draft.status = 'approved'
-        draft.reviewed_at = datetime.utcnow()
-        draft.reviewed_by = admin_id
-
-        # Сохраняем feedback
-        feedback = FeedbackLabel(
-            draft_id=draft.id,
-            admin_action='published'
-        )
-        db.add(feedback)
+        db.add_all([
+            publication,
+            FeedbackLabel(draft_id=draft.id, admin_action='published', created_at=draft.reviewed_at),
+        ])
 
+        # Один flush при commit; publication.id заполняется из RETURNING, refresh не нужен
         await db.commit()
-        await db.refresh(publication)
 
         # Векторизация через Celery (не блокирует UI)
         if settings.qdrant_enabled:
             try:
                 from app.tasks.celery_tasks import vectorize_publication_task
-                vectorize_publication_task.delay(
-                    pub_id=publication.id,
-                    content=draft.content,
-                    draft_id=draft.id
-                )
-                logger.info("vectorization_task_queued", pub_id=publication.id, draft_id=draft.id)
+                # Только pub_id - текст поста воркер прочитает из БД
+                await asyncio.to_thread(vectorize_publication_task.delay, pub_id=publication.id)
+                log.info("vectorization_task_queued", pub_id=publication.id)
             except Exception as e:
-                logger.warning("vectorization_task_queue_error", error=str(e))
+                log.warning("vectorization_task_queue_error", error=str(e))
 
-        logger.info(
-            "draft_published",
-            draft_id=draft.id,
-            message_id=message.message_id
-        )
+        invalidate_statistics_cache()
+        if draft.article_url:
+            remember_post_url(draft.id, draft.article_url)
+
+        log.info("draft_published", message_id=message.message_id)
 
         return True
 
     except Exception as e:
-        logger.error("publish_error", draft_id=draft_id, error=str(e))
+        log.error("publish_error", error=str(e))
+        await db.rollback()
+        if message is not None:
+            # Пост уже в канале - статус approved остается, не сохранилась только запись публикации
+            return True
+        if draft is not None:
+            await revert_publish_claim(draft_id, draft.previous_status, db)
         return False
 
 
+async def revert_publish_claim(draft_id: int, previous_status: str, db: AsyncSession):
+    """
+    Вернуть драфт на модерацию, если публикация не дошла до канала.
+
+    Args:
+        draft_id: ID драфта
+        previous_status: Статус драфта до публикации
+        db: Сессия БД
+    """
+    try:
+        await db.execute(
+            update(PostDraft)
+            .where(PostDraft.id == draft_id, PostDraft.status == 'approved')
+            .values(status=previous_status, reviewed_at=None, reviewed_by=None)
+        )
+        await db.commit()
+    except Exception as e:
+        logger.error("publish_revert_error", draft_id=draft_id, error=str(e))
+        await db.rollback()
+
+
+# ====================
+# Очередь публикаций
+# ====================
+
+def get_publish_queue() -> asyncio.Queue:
+    """
+    Получить очередь публикаций (ленивая инициализация в event loop бота).
+    """
+    global _publish_queue
+    if _publish_queue is None:
+        _publish_queue = asyncio.Queue()
+    return _publish_queue
+
+
+async def enqueue_publication(
+    status_message: Message,
+    draft_id: int,
+    admin_id: int,
+    success_text: str,
+    db: AsyncSession
+):
+    """
+    Поставить драфт в очередь на публикацию.
+
+    Сама очередь живет в памяти процесса, поэтому перед постановкой в нее
+    в драфте сохраняется publish_queued_at - после перезапуска бота
+    recover_publish_queue() вернет такие драфты в очередь.
+    Кнопки под драфтом сразу убираются (защита от повторного нажатия),
+    итог публикации воркер запишет в это же сообщение.
+
+    Args:
+        status_message: Сообщение драфта, в котором показывается статус
+        draft_id: ID драфта
+        admin_id: ID администратора
+        success_text: Текст статуса при успешной публикации
+        db: Сессия БД
+    """
+    result = await db.execute(
+        update(PostDraft)
+        .where(PostDraft.id == draft_id, PostDraft.status.in_(REVIEWABLE_DRAFT_STATUSES))
+        .values(publish_queued_at=DB_UTC_NOW)
+        .returning(PostDraft.id)
+    )
+    queued = result.scalar_one_or_none() is not None
+    await db.commit()
+
+    status_text = (
+        f"⏳ Драфт #{draft_id} в очереди на публикацию..." if queued
+        else f"ℹ️ Драфт #{draft_id} уже обработан"
+    )
+    try:
+        await edit_message(status_message, status_text, reply_markup=None)
+    except Exception as e:
+        logger.warning("publish_queue_status_error", draft_id=draft_id, error=str(e))
+
+    if not queued:
+        logger.info("publish_already_handled", draft_id=draft_id)
+        return
+
+    await get_publish_queue().put((status_message, draft_id, admin_id, success_text))
+    logger.info("publish_queued", draft_id=draft_id, admin_id=admin_id)
+
+
+async def recover_publish_queue() -> int:
+    """
+    Вернуть в очередь драфты, поставленные на публикацию до перезапуска бота.
+
+    Сообщения модерации этих драфтов остались без кнопок, поэтому итог
+    публикации воркер отправит администратору отдельным сообщением.
+
+    Returns:
+        Количество восстановленных драфтов
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(PostDraft.id)
+            .where(
+                PostDraft.publish_queued_at.is_not(None),
+                PostDraft.status.in_(REVIEWABLE_DRAFT_STATUSES)
+            )
+            .order_by(PostDraft.publish_queued_at)
+        )
+        draft_ids = list(result.scalars().all())
+
+    queue = get_publish_queue()
+    for draft_id in draft_ids:
+        await queue.put((
+            None, draft_id, settings.telegram_admin_id,
+            f"✅ Драфт #{draft_id} опубликован (из очереди до перезапуска бота)"
+        ))
+
+    if draft_ids:
+        logger.info("publish_queue_recovered", count=len(draft_ids))
+    return len(draft_ids)
+
+
+async def _report_publish_status(status_message: Optional[Message], draft_id: int, text: str, reply_markup=None):
+    """Показать итог публикации в сообщении драфта (или новым сообщением администратору)."""
+    if status_message is None:
+        await get_bot().send_message(settings.telegram_admin_id, text, reply_markup=reply_markup)
+        return
+
+    try:
+        await edit_message(status_message, text, reply_markup=reply_markup)
+    except Exception as e:
+        logger.error("publish_status_edit_error", error=str(e), draft_id=draft_id, error_type=type(e).__name__)
+        # Если не получилось отредактировать, отправим новое сообщение
+        await status_message.answer(text, reply_markup=reply_markup)
+
+
+async def _publish_worker():
+    """
+    Воркер очереди публикаций.
+
+    Публикует драфты по одному в порядке подтверждения: посты попадают в канал
+    в том порядке, в котором их одобрил администратор. Каждая публикация
+    выполняется в своей сессии БД - сессия обработчика к этому моменту закрыта.
+    """
+    queue = get_publish_queue()
+    while True:
+        status_message, draft_id, admin_id, success_text = await queue.get()
+        try:
+            try:
+                async with AsyncSessionLocal() as db:
+                    success = await publish_draft(draft_id, db, admin_id)
+                    if not success:
+                        # Драфт больше не в очереди: снова ждет решения администратора или уже обработан
+                        await db.execute(
+                            update(PostDraft)
+                            .where(PostDraft.id == draft_id)
+                            .values(publish_queued_at=None)
+                        )
+                        await db.commit()
+            except Exception as e:
+                logger.error("publish_worker_error", draft_id=draft_id, error=str(e))
+                success = False
+            logger.info("publish_processed", draft_id=draft_id, admin_id=admin_id, success=success)
+
+            if success:
+                await _report_publish_status(status_message, draft_id, success_text)
+            elif success is None:
+                await _report_publish_status(status_message, draft_id, f"ℹ️ Драфт #{draft_id} уже обработан")
+            else:
+                # Возвращаем кнопки модерации, чтобы публикацию можно было повторить
+                await _report_publish_status(
+                    status_message, draft_id,
+                    f"❌ Ошибка при публикации драфта #{draft_id}",
+                    reply_markup=get_draft_review_keyboard(draft_id)
+                )
+        except Exception as e:
+            logger.error("publish_status_error", draft_id=draft_id, error=str(e))
+        finally:
+            queue.task_done()
+
+
+def start_publish_worker():
+    """Запустить воркер очереди публикаций (один на процесс бота)."""
+    global _publish_worker_task
+    if _publish_worker_task is None or _publish_worker_task.done():
+        _publish_worker_task = asyncio.create_task(_publish_worker())
+
+
 async def reject_draft(
     draft_id: int,
     reason: str,
@@ -1431,30 +2014,36 @@ async def reject_draft(
         True если успешно, False иначе
     """
     try:
+        # Обновляем статус одним запросом без предварительного SELECT
         result = await db.execute(
-            select(PostDraft).where(PostDraft.id == draft_id)
+            update(PostDraft)
+            .where(PostDraft.id == draft_id, PostDraft.status.in_(REVIEWABLE_DRAFT_STATUSES))
+            .values(
+                status='rejected',
+                rejection_reason=reason,
+                reviewed_at=DB_UTC_NOW,
+                reviewed_by=admin_id
+            )
+            .returning(PostDraft.reviewed_at)
         )
-        draft = result.scalar_one_or_none()
-
-        if not draft:
+        reviewed_at = result.scalar_one_or_none()
+        if reviewed_at is None:
             return False
 
-        draft.status = 'rejected'
-        draft.rejection_reason = reason
-        draft.reviewed_at = datetime.utcnow()
-        draft.reviewed_by = admin_id
-
-        # Сохраняем feedback
+        # Сохраняем feedback (время ревью из RETURNING)
         feedback = FeedbackLabel(
-            draft_id=draft.id,
+            draft_id=draft_id,
             admin_action='rejected',
-            rejection_reason=reason
+            rejection_reason=reason,
+            created_at=reviewed_at
         )
         db.add(feedback)
 
         await db.commit()
 
-        logger.info("draft_rejected", draft_id=draft.id, reason=reason)
+        invalidate_statistics_cache()
+
+        logger.info("draft_rejected", draft_id=draft_id, reason=reason)
 
         return True
 
@@ -1463,14 +2052,172 @@ async def reject_draft(
         return False
 
 
-@router.callback_query(F.data.startswith("opinion:"))
-async def callback_opinion(callback: CallbackQuery, db: AsyncSession):
+async def reject_drafts(
+    reason: str,
+    db: AsyncSession,
+    admin_id: int,
+    max_draft_id: Optional[int] = None
+) -> int:
+    """
+    Отклонить все драфты, ожидающие модерации, одной транзакцией.
+
+    UPDATE сам выбирает драфты по status='pending_review' - драфт, который
+    успели опубликовать, не будет отклонен. Feedback пишется через add_all
+    с временем ревью из RETURNING (обычное значение, не SQL-выражение) -
+    SQLAlchemy собирает его в один многострочный INSERT.
+
+    Args:
+        reason: Код причины отклонения
+        db: Сессия БД
+        admin_id: ID администратора
+        max_draft_id: Не трогать драфты с ID больше этого (появившиеся после подтверждения)
+
+    Returns:
+        Количество отклоненных драфтов
+    """
+    stmt = update(PostDraft).where(PostDraft.status == 'pending_review')
+    if max_draft_id is not None:
+        stmt = stmt.where(PostDraft.id <= max_draft_id)
+
+    try:
+        result = await db.execute(
+            stmt
+            .values(
+                status='rejected',
+                rejection_reason=reason,
+                reviewed_at=DB_UTC_NOW,
+                reviewed_by=admin_id
+            )
+            .returning(PostDraft.id, PostDraft.reviewed_at)
+        )
+        rejected = result.all()
+
+        db.add_all([
+            FeedbackLabel(
+                draft_id=row.id,
+                admin_action='rejected',
+                rejection_reason=reason,
+                created_at=row.reviewed_at
+            )
+            for row in rejected
+        ])
+
+        await db.commit()
+
+        if rejected:
+            invalidate_statistics_cache()
+
+        logger.info("drafts_rejected", count=len(rejected), reason=reason)
+
+        return len(rejected)
+
+    except Exception as e:
+        logger.error("bulk_reject_error", error=str(e))
+        await db.rollback()
+        return 0
+
+
+def normalize_rejection_reason(reason: Optional[str]) -> str:
+    """Код причины отклонения; неизвестные значения сводятся к 'other'."""
+    reason = (reason or "").strip().lower()
+    return reason if reason in REJECTION_REASON_CODES else "other"
+
+
+@router.message(Command("reject_all"))
+async def cmd_reject_all(message: Message, command: CommandObject, db: AsyncSession):
+    """Отклонить все драфты, ожидающие модерации (/reject_all [причина]), после подтверждения."""
+    if not check_admin(message.from_user.id):
+        return
+
+    reason = normalize_rejection_reason(command.args)
+
+    result = await db.execute(
+        select(func.count(PostDraft.id), func.max(PostDraft.id))
+        .where(PostDraft.status == 'pending_review')
+    )
+    pending_count, max_draft_id = result.one()
+
+    if not pending_count:
+        await message.answer("📭 Нет драфтов для отклонения.")
+        return
+
+    await message.answer(
+        f"❓ Отклонить {pending_count} драфтов?\nПричина: {reason}",
+        reply_markup=get_reject_all_confirm_keyboard(reason, max_draft_id)
+    )
+
+
+@router.callback_query(DraftCB.filter(F.action == "confirm_reject_all"))
+async def callback_confirm_reject_all(callback: CallbackQuery, callback_data: DraftCB, db: AsyncSession):
+    """Подтверждение массового отклонения."""
+    # ВАЖНО: отвечаем сразу, чтобы кнопка не зависала
+    await callback.answer("Отклоняю...")
+
+    reason = normalize_rejection_reason(callback_data.reason)
+    rejected_count = await reject_drafts(
+        reason, db, callback.from_user.id, max_draft_id=callback_data.draft_id
+    )
+
+    if rejected_count:
+        await edit_message(callback.message, f"❌ Отклонено драфтов: {rejected_count}\nПричина: {reason}")
+    else:
+        await edit_message(callback.message, "📭 Нет драфтов для отклонения.")
+
+
+@router.callback_query(DraftCB.filter(F.action == "cancel_reject_all"))
+async def callback_cancel_reject_all(callback: CallbackQuery):
+    """Отмена массового отклонения."""
+    await callback.answer("Отменено")
+    await edit_message(callback.message, "↩️ Массовое отклонение отменено")
+
+
+def remember_post_url(post_id: int, url: str):
+    """
+    Запомнить URL источника поста для восстановления клавиатуры читателя.
+
+    Args:
+        post_id: ID драфта опубликованного поста
+        url: URL источника
+    """
+    if len(_post_url_cache) >= POST_URL_CACHE_SIZE:
+        # dict хранит порядок вставки - вытесняем самую старую запись
+        del _post_url_cache[next(iter(_post_url_cache))]
+    _post_url_cache[post_id] = url
+
+
+async def get_post_url(post_id: int, db: AsyncSession) -> str:
+    """
+    Получить URL источника поста: из кэша, при промахе - из БД.
+
+    Args:
+        post_id: ID драфта опубликованного поста
+        db: Сессия БД
+
+    Returns:
+        URL источника или пустая строка
+    """
+    url = _post_url_cache.get(post_id)
+    if url is None:
+        # URL денормализован в драфт; статью читаем только для старых драфтов без article_url
+        draft = (await db.execute(
+            select(PostDraft.article_url, PostDraft.article_id).where(PostDraft.id == post_id)
+        )).first()
+        url = draft.article_url if draft else None
+        if url is None and draft is not None and draft.article_id is not None:
+            url = await db.scalar(select(RawArticle.url).where(RawArticle.id == draft.article_id))
+        url = url or ""
+        remember_post_url(post_id, url)
+    return url
+
+
+async def _handle_opinion(callback: CallbackQuery, db: AsyncSession, payload: str):
     """
     Показать клавиатуру для выбора мнения о посте (редактирует клавиатуру под постом).
+
+    payload - часть callback_data после префикса: post_id
     """
     try:
-        # Извлекаем post_id из callback_data
-        post_id = int(callback.data.split(":")[1])
+        post_id = int(payload)
 
         # Редактируем клавиатуру под постом (не создаем новое сообщение!)
         await callback.message.edit_reply_markup(
@@ -1485,98 +2232,67 @@ async def callback_opinion(callback: CallbackQuery, db: AsyncSession):
         await callback.answer("❌ Произошла ошибка", show_alert=True)
 
 
-@router.callback_query(F.data.startswith("react:"))
-async def callback_react(callback: CallbackQuery, db: AsyncSession):
+async def _handle_react(callback: CallbackQuery, db: AsyncSession, payload: str):
     """
     Обработать реакцию пользователя на пост.
+
+    payload - часть callback_data после префикса: post_id:reaction_type
     """
     try:
-        # Извлекаем данные из callback_data: react:post_id:reaction_type
-        parts = callback.data.split(":")
-        if len(parts) != 3:
+        post_id, sep, reaction_type = payload.partition(":")
+        if not sep:
             await callback.answer("❌ Неверный формат данных", show_alert=True)
             return
-            
-        post_id = int(parts[1])
-        reaction_type = parts[2]
-        
+
+        post_id = int(post_id)
+
+        # Ключ подставляется в JSON-путь - пропускаем только известные реакции
+        if reaction_type not in REACTION_LABELS:
+            await callback.answer("❌ Неизвестная реакция", show_alert=True)
+            return
+
         logger.info("callback_react_started", callback_data=callback.data)
-        
-        # Поиск публикации
+
+        # Атомарно увеличиваем счетчик одним UPDATE (без SELECT и гонки read-modify-write)
         result = await db.execute(
-            select(Publication)
-            .join(PostDraft)
-            .where(PostDraft.id == post_id)
+            REACTION_INCREMENT_SQL,
+            {"reaction_type": reaction_type, "post_id": post_id}
         )
-        publication = result.scalar_one_or_none()
-        
-        if not publication:
+        row = result.first()
+
+        if row is None:
             logger.warning("publication_not_found", post_id=post_id)
             await callback.answer("❌ Публикация не найдена", show_alert=True)
             return
-        
-        # Обновляем реакции
-        current_reactions = publication.reactions or {}
-        current_count = current_reactions.get(reaction_type, 0)
-        current_reactions[reaction_type] = current_count + 1
-        publication.reactions = current_reactions
-        
+
         await db.commit()
-        
-        # Получаем обновленные реакции для отображения
-        reactions = publication.reactions or {}
-        
-        # Формируем текст с реакциями
-        reaction_emoji = {
-            "useful": "👍",
-            "important": "🔥",
-            "controversial": "🤔",
-            "banal": "💤",
-            "obvious": "🤷",
-            "poor_quality": "👎",
-            "low_content_quality": "📉",
-            "bad_source": "📰"
-        }
-        
-        reaction_text = {
-            "useful": "Полезно",
-            "important": "Важно",
-            "controversial": "Спорно",
-            "banal": "Банально",
-            "obvious": "Очевидно",
-            "poor_quality": "Плохое качество",
-            "low_content_quality": "Низкое качество контента",
-            "bad_source": "Плохой источник"
-        }
-        
-        reaction_lines = []
-        for reaction, emoji in reaction_emoji.items():
-            count = reactions.get(reaction, 0)
-            if count > 0:
-                text = reaction_text.get(reaction, reaction)
-                reaction_lines.append(f"{emoji} {text}: {count}")
+
+        # Обновленные реакции для отображения
+        reactions = row.reactions or {}
+
+        reaction_lines = [
+            f"{label}: {count}"
+            for reaction, label in REACTION_LABELS.items()
+            if (count := reactions.get(reaction, 0)) > 0
+        ]
         
         reaction_summary = "\n".join(reaction_lines) if reaction_lines else "Пока нет реакций"
         
         # Отправляем уведомление
         await callback.answer(f"✅ Спасибо! Ваша реакция учтена.\n\n📊 Текущая статистика:\n{reaction_summary}", show_alert=True)
 
+        # quality_score в Qdrant обновляется через Celery (не блокирует ответ читателю)
+        if settings.qdrant_enabled:
+            try:
+                from app.tasks.celery_tasks import update_quality_score_task
+                await asyncio.to_thread(update_quality_score_task.delay, pub_id=row.id, reactions=reactions)
+            except Exception as e:
+                logger.warning("quality_score_task_queue_error", post_id=post_id, error=str(e))
+
         # Убираем кнопки реакций, оставляем только ссылку на источник (БЕЗ кнопки "Ваше мнение")
         try:
-            # Получаем draft и article для клавиатуры
-            draft_result = await db.execute(
-                select(PostDraft).where(PostDraft.id == post_id)
-            )
-            draft = draft_result.scalar_one_or_none()
-
-            article_url = ""
-            if draft and draft.article_id:
-                article_result = await db.execute(
-                    select(RawArticle).where(RawArticle.id == draft.article_id)
-                )
-                article = article_result.scalar_one_or_none()
-                if article:
-                    article_url = article.url
+            # URL источника из кэша (заполняется при публикации), в БД - только при промахе
+            article_url = await get_post_url(post_id, db)
 
             # Возвращаем клавиатуру БЕЗ кнопки "Ваше мнение" (post_id=None скрывает кнопку)
             await callback.message.edit_reply_markup(
@@ -1590,107 +2306,43 @@ async def callback_react(callback: CallbackQuery, db: AsyncSession):
     except Exception as e:
         logger.error("react_callback_error", error=str(e))
         await callback.answer("❌ Произошла ошибка при обработке реакции", show_alert=True)
-    pending_count = await db.scalar(
-        select(func.count(PostDraft.id)).where(PostDraft.status == 'pending_review')
-    )
-
-    # Статистика личных постов
-    personal_posts_count = await db.scalar(select(func.count(PersonalPost.id)))
-    personal_published_count = await db.scalar(
-        select(func.count(PersonalPost.id)).where(PersonalPost.published == True)
-    )
-
-    # Статистика views/reactions для личных постов
-    personal_views_sum = await db.scalar(
-        select(func.sum(PersonalPost.views_count)).where(PersonalPost.published == True)
-    ) or 0
-    personal_reactions_sum = await db.scalar(
-        select(func.sum(PersonalPost.reactions_count)).where(PersonalPost.published == True)
-    ) or 0
-
-    # Получаем стоимость API за текущий месяц
-    api_cost_data = await get_current_month_cost(db)
-
-    # Получаем статистику AI анализа
-    analytics = AnalyticsService(db)
-    ai_stats = await analytics.get_ai_analysis_stats()
-
-    stats_text = f"""
-📊 <b>Статистика системы</b>
 
-📰 Всего статей: {articles_count}
-📝 Всего драфтов: {drafts_count}
-✅ Опубликовано: {publications_count}
-⏳ Ожидают модерации: {pending_count}
 
-━━━━━━━━━━━━━━━━
+# Кнопки под постами в канале: префикс callback_data -> обработчик
+# Префиксы кнопок читателей - доступны всем, а не только администратору
+READER_CALLBACK_PREFIXES = ("opinion:", "react:")
 
-✍️ <b>Личные заметки</b>
+READER_CALLBACK_HANDLERS = {
+    "opinion": _handle_opinion,
+    "react": _handle_react,
+}
 
-📔 Всего заметок: {personal_posts_count}
-📤 Опубликовано: {personal_published_count}
-👁 Всего просмотров: {personal_views_sum:,}
-👍 Всего реакций: {personal_reactions_sum}
 
-━━━━━━━━━━━━━━━━
+@router.callback_query(F.data.startswith(READER_CALLBACK_PREFIXES))
+async def callback_reader(callback: CallbackQuery, db: AsyncSession):
+    """
+    Единая точка входа для кнопок читателей под постами в канале.
 
-💰 <b>Стоимость API за {api_cost_data['month_name']}</b>
+    Префикс разбирается один раз и обработчик выбирается по словарю,
+    вместо отдельного фильтра на каждый префикс.
+    """
+    kind, _, payload = callback.data.partition(":")
+    await READER_CALLBACK_HANDLERS[kind](callback, db, payload)
 
-💵 Общая стоимость: ${api_cost_data['total_cost_usd']:.4f}
-📊 Всего токенов: {api_cost_data['total_tokens']:,}
-🔢 Всего запросов: {api_cost_data['total_requests']}
-"""
 
-    # Добавляем статистику по провайдерам
-    if api_cost_data['by_provider']:
-        stats_text += "\n<b>По провайдерам:</b>\n"
-        for provider, data in api_cost_data['by_provider'].items():
-            provider_name = "OpenAI" if provider == "openai" else "Perplexity"
-            stats_text += f"├─ {provider_name}:\n"
-            stats_text += f"│  ├─ Стоимость: ${data['cost_usd']:.4f}\n"
-            stats_text += f"│  ├─ Токенов: {data['tokens']:,}\n"
-            stats_text += f"│  └─ Запросов: {data['requests']}\n"
-
-    # Ссылка на проверку баланса Perplexity
-    stats_text += "\n🔗 <a href='https://www.perplexity.ai/account/api/billing'>Проверить баланс Perplexity API</a>\n"
-
-    # Добавляем статистику AI анализа
-    stats_text += "\n━━━━━━━━━━━━━━━━\n\n"
-    stats_text += "🤖 <b>AI Анализ аналитики</b>\n\n"
-
-    if ai_stats['month']['count'] > 0 or ai_stats['year']['count'] > 0:
-        stats_text += f"<b>За текущий месяц:</b>\n"
-        stats_text += f"├─ Запросов: {ai_stats['month']['count']}\n"
-        stats_text += f"├─ Токенов: {ai_stats['month']['total_tokens']:,}\n"
-        stats_text += f"└─ Стоимость: ${ai_stats['month']['total_cost_usd']:.4f}\n"
-
-        # Разбивка по моделям за месяц
-        if ai_stats['month']['by_model']:
-            for model, data in ai_stats['month']['by_model'].items():
-                model_name = model.replace('gpt-', 'GPT-').upper()
-                stats_text += f"   └─ {model_name}: {data['count']} запросов, ${data['cost_usd']:.4f}\n"
-
-        stats_text += f"\n<b>За текущий год:</b>\n"
-        stats_text += f"├─ Запросов: {ai_stats['year']['count']}\n"
-        stats_text += f"├─ Токенов: {ai_stats['year']['total_tokens']:,}\n"
-        stats_text += f"└─ Стоимость: ${ai_stats['year']['total_cost_usd']:.2f}\n"
-
-        # Разбивка по моделям за год
-        if ai_stats['year']['by_model']:
-            for model, data in ai_stats['year']['by_model'].items():
-                model_name = model.replace('gpt-', 'GPT-').upper()
-                stats_text += f"   └─ {model_name}: {data['count']} запросов, ${data['cost_usd']:.2f}\n"
-    else:
-        stats_text += "Анализы ещё не запускались\n"
+# ====================
+# Analytics Dashboard
+# ====================
 
-    stats_text += f"\n📅 Обновлено: {datetime.now().strftime('%d.%m.%Y %H:%M')}\n"
+def _percent(part: int, total: int) -> int:
+    """Доля part от total в целых процентах с округлением (целочисленная арифметика, total > 0)."""
+    return (part * 200 + total) // (total * 2)
 
-    return stats_text
 
+def _trunc_escape(text: str, limit: int) -> str:
+    """Обрезать строку до limit символов (с «…») и экранировать для HTML."""
+    return html.escape(text if len(text) <= limit else text[:limit] + "…")
 
-# ====================
-# Analytics Dashboard
-# ====================
 
 def format_analytics_report(
     stats: Dict,
@@ -1721,9 +2373,17 @@ def format_analytics_report(
     """
     period_days = stats.get("period_days", 7)
 
-    report = f"""📊 <b>Аналитика канала @legal_ai_pro</b>
+    # Фрагменты собираются в список и склеиваются один раз в конце
+    parts: List[str] = []
+    append = parts.append
 
-━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # Частые обращения к вложенным словарям - через локальные переменные
+    reactions = stats['reactions']
+    total_reactions = max(stats['total_reactions'], 1)
+
+    append(f"""📊 <b>Аналитика канала @legal_ai_pro</b>
+
+{REPORT_SEPARATOR}
 📈 <b>За последние {period_days} дней:</b>
 
 <b>Публикации:</b>
@@ -1733,103 +2393,87 @@ def format_analytics_report(
 └─ 📊 Avg quality score: {stats['avg_quality_score']}
 
 <b>Реакции:</b>
-├─ 👍 Полезно: {stats['reactions']['useful']} ({stats['reactions']['useful']/max(stats['total_reactions'],1)*100:.0f}%)
-├─ 🔥 Важно: {stats['reactions']['important']} ({stats['reactions']['important']/max(stats['total_reactions'],1)*100:.0f}%)
-├─ 🤔 Спорно: {stats['reactions']['controversial']} ({stats['reactions']['controversial']/max(stats['total_reactions'],1)*100:.0f}%)
-├─ 💤 Банальщина: {stats['reactions']['banal']} ({stats['reactions']['banal']/max(stats['total_reactions'],1)*100:.0f}%)
-├─ 🤷 Очевидно: {stats['reactions']['obvious']} ({stats['reactions']['obvious']/max(stats['total_reactions'],1)*100:.0f}%)
-├─ 👎 Плохое: {stats['reactions']['poor_quality']} ({stats['reactions']['poor_quality']/max(stats['total_reactions'],1)*100:.0f}%)
-├─ 📉 Низкое качество: {stats['reactions']['low_content_quality']} ({stats['reactions']['low_content_quality']/max(stats['total_reactions'],1)*100:.0f}%)
-└─ 📰 Плохой источник: {stats['reactions']['bad_source']} ({stats['reactions']['bad_source']/max(stats['total_reactions'],1)*100:.0f}%)
+├─ 👍 Полезно: {reactions['useful']} ({_percent(reactions['useful'], total_reactions)}%)
+├─ 🔥 Важно: {reactions['important']} ({_percent(reactions['important'], total_reactions)}%)
+├─ 🤔 Спорно: {reactions['controversial']} ({_percent(reactions['controversial'], total_reactions)}%)
+├─ 💤 Банальщина: {reactions['banal']} ({_percent(reactions['banal'], total_reactions)}%)
+├─ 🤷 Очевидно: {reactions['obvious']} ({_percent(reactions['obvious'], total_reactions)}%)
+├─ 👎 Плохое: {reactions['poor_quality']} ({_percent(reactions['poor_quality'], total_reactions)}%)
+├─ 📉 Низкое качество: {reactions['low_content_quality']} ({_percent(reactions['low_content_quality'], total_reactions)}%)
+└─ 📰 Плохой источник: {reactions['bad_source']} ({_percent(reactions['bad_source'], total_reactions)}%)
 
 <b>Engagement:</b>
 ├─ 📊 Всего реакций: {stats['total_reactions']}
 ├─ 💬 Постов с реакциями: {stats['engaged_publications']} из {stats['total_publications']}
 └─ 🎯 Engagement rate: {stats['engagement_rate']}%
-"""
+""")
 
     # Топ посты
     if top_posts:
-        report += "\n━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-        report += "🔥 <b>Топ-3 поста:</b>\n\n"
-
-        for i, post in enumerate(top_posts[:3], 1):
-            title_raw = post['title'][:80] + "..." if len(post['title']) > 80 else post['title']
-            title = html.escape(title_raw)
-            date = post['published_at'].strftime('%d.%m.%Y %H:%M')
-            reactions = post['reactions']
-
-            report += f"{i}️⃣ <b>{title}</b>\n"
-            report += f"   📅 {date}\n"
-            report += f"   👍 {reactions.get('useful', 0)} | 🔥 {reactions.get('important', 0)} | 🤔 {reactions.get('controversial', 0)}\n"
-            report += f"   📊 Quality: {post['quality_score']}\n"
+        append(REPORT_TOP_POSTS_HEADER)
+
+        for i, post in enumerate(islice(top_posts, 3), 1):
+            get = post['reactions'].get
+
+            append(REPORT_TOP_POST_TEMPLATE.format(
+                i=i,
+                title=_trunc_escape(post['title'], 80),
+                date=post['published_at'].strftime('%d.%m.%Y %H:%M'),
+                useful=get('useful', 0),
+                important=get('important', 0),
+                controversial=get('controversial', 0),
+                quality=post['quality_score']
+            ))
             if post['telegram_message_id']:
                 msg_id = post['telegram_message_id']
-                report += f'   🔗 <a href="https://t.me/legal_ai_pro/{msg_id}">Перейти к посту</a>\n'
-            report += "\n"
+                append(f'   🔗 <a href="https://t.me/legal_ai_pro/{msg_id}">Перейти к посту</a>\n')
+            append("\n")
 
     # Худшие посты
     if worst_posts:
-        report += "━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-        report += "💤 <b>Худшие посты (учимся на ошибках):</b>\n\n"
-
-        for i, post in enumerate(worst_posts[:3], 1):
-            title_raw = post['title'][:80] + "..." if len(post['title']) > 80 else post['title']
-            title = html.escape(title_raw)
-            date = post['published_at'].strftime('%d.%m.%Y %H:%M')
-            reactions = post['reactions']
-
-            report += f"{i}️⃣ <b>{title}</b>\n"
-            report += f"   📅 {date}\n"
-            report += f"   💤 {reactions.get('banal', 0)} | 👎 {reactions.get('poor_quality', 0)} | 🤷 {reactions.get('obvious', 0)}\n"
-            report += f"   📊 Quality: {post['quality_score']}\n"
-
-            # Определить основную проблему
-            if reactions.get('banal', 0) > 0:
-                report += "   ⚠️ Проблема: Слишком общо, нет конкретики\n"
-            elif reactions.get('obvious', 0) > 0:
-                report += "   ⚠️ Проблема: Очевидные выводы\n"
-            elif reactions.get('poor_quality', 0) > 0:
-                report += "   ⚠️ Проблема: Низкое качество контента\n"
-            elif reactions.get('low_content_quality', 0) > 0:
-                report += "   ⚠️ Проблема: Плохая подача материала\n"
-            elif reactions.get('bad_source', 0) > 0:
-                report += "   ⚠️ Проблема: Ненадежный или некачественный источник\n"
-
-            report += "\n"
+        append(REPORT_WORST_POSTS_HEADER)
 
-    # Статистика по дням недели (если есть данные)
-    if weekday_stats:
-        report += "━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-        report += "📅 <b>Статистика по дням недели:</b>\n\n"
+        for i, post in enumerate(islice(worst_posts, 3), 1):
+            get = post['reactions'].get
+
+            append(REPORT_WORST_POST_TEMPLATE.format(
+                i=i,
+                title=_trunc_escape(post['title'], 80),
+                date=post['published_at'].strftime('%d.%m.%Y %H:%M'),
+                banal=get('banal', 0),
+                poor_quality=get('poor_quality', 0),
+                obvious=get('obvious', 0),
+                quality=post['quality_score']
+            ))
 
-        best_day = None
-        best_score = -999.0
+            # Определить основную проблему (пустая строка, если реакций-проблем нет)
+            append(next((problem for reaction, problem in REPORT_POST_PROBLEMS if get(reaction, 0) > 0), ""))
+            append("\n")
 
-        for day in ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]:
-            if day in weekday_stats:
-                day_data = weekday_stats[day]
-                total = day_data['total_posts']
-                avg_score = day_data['avg_quality_score']
+    # Статистика по дням недели (если есть данные)
+    if weekday_stats:
+        append(REPORT_WEEKDAY_HEADER)
 
-                if avg_score > best_score:
-                    best_score = avg_score
-                    best_day = day
+        # Лучший день определяется заранее, чтобы ⭐ стояла только у него
+        # (а не у каждого дня, лидировавшего на момент вывода)
+        present_days = [day for day in WEEKDAY_ORDER if day in weekday_stats]
+        best_day = max(present_days, key=lambda day: weekday_stats[day]['avg_quality_score'], default=None)
 
-                marker = "⭐" if day == best_day and total > 0 else ""
-                report += f"{day}: {total} постов | Avg quality: {avg_score} {marker}\n"
+        for day in present_days:
+            day_data = weekday_stats[day]
+            total = day_data['total_posts']
+            marker = "⭐" if day == best_day and total > 0 else ""
+            append(f"{day}: {total} постов | Avg quality: {day_data['avg_quality_score']} {marker}\n")
 
         if best_day:
-            report += f"\n🏆 Лучший день: <b>{best_day}</b> (avg quality: {best_score})\n"
+            append(f"\n🏆 Лучший день: <b>{best_day}</b> (avg quality: {weekday_stats[best_day]['avg_quality_score']})\n")
 
     # Эффективность источников
     if sources:
-        report += "\n━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-        report += "📰 <b>Топ источников:</b>\n\n"
+        append(REPORT_SOURCES_HEADER)
 
-        for i, source in enumerate(sources[:5], 1):
-            name_raw = source['source_name'][:40] + "..." if len(source['source_name']) > 40 else source['source_name']
-            name = html.escape(name_raw)
+        for i, source in enumerate(islice(sources, 5), 1):
+            name = _trunc_escape(source['source_name'], 40)
             collected = source['total_collected']
             published = source['total_published']
             pub_rate = source['publication_rate']
@@ -1843,134 +2487,358 @@ def format_analytics_report(
             else:
                 status = "❌"
 
-            report += f"{i}. <b>{name}</b> {status}\n"
-            report += f"   ├─ Отобрано: {collected} новостей\n"
-            report += f"   ├─ Опубликовано: {published} ({pub_rate:.0f}%)\n"
-            report += f"   └─ Avg quality: {quality}\n"
-            report += "\n"
+            append(f"{i}. <b>{name}</b> {status}\n")
+            append(f"   ├─ Отобрано: {collected} новостей\n")
+            append(f"   ├─ Опубликовано: {published} ({pub_rate:.0f}%)\n")
+            append(f"   └─ Avg quality: {quality}\n")
+            append("\n")
 
     # Статистика векторной базы
     if vector_stats:
-        report += "━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-        report += "🗄️ <b>Векторная база Qdrant:</b>\n\n"
-        report += f"├─ 📦 Всего векторов: {vector_stats['total_vectors']}\n"
-        report += f"├─ ✅ Позитивных примеров: {vector_stats['positive_examples']} (score &gt; 0.5)\n"
-        report += f"├─ ❌ Негативных примеров: {vector_stats['negative_examples']} (score &lt; -0.3)\n"
-        report += f"├─ ⚖️ Нейтральных: {vector_stats['neutral_examples']}\n"
-        report += f"└─ 📊 Avg score всей базы: {vector_stats['avg_quality_score']}\n"
-
-    # Рекомендации по источникам
-    if source_recommendations:
-        report += "\n━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-        report += "⚡ <b>Рекомендации по источникам:</b>\n\n"
-
-        for rec in source_recommendations[:5]:  # Показываем топ-5
+        append(REPORT_VECTOR_HEADER)
+        append(f"├─ 📦 Всего векторов: {vector_stats['total_vectors']}\n")
+        append(f"├─ ✅ Позитивных примеров: {vector_stats['positive_examples']} (score &gt; 0.5)\n")
+        append(f"├─ ❌ Негативных примеров: {vector_stats['negative_examples']} (score &lt; -0.3)\n")
+        append(f"├─ ⚖️ Нейтральных: {vector_stats['neutral_examples']}\n")
+        append(f"└─ 📊 Avg score всей базы: {vector_stats['avg_quality_score']}\n")
+
+    # Рекомендации по источникам (None - рекомендации не запрашивались)
+    if source_recommendations is not None:
+        append(REPORT_RECOMMENDATIONS_HEADER)
+
+        for rec in islice(source_recommendations, 5):  # Показываем топ-5
             source_name_escaped = html.escape(rec["source_name"])
-            report += f"<b>{source_name_escaped}</b>\n"
-            report += f"   {rec['recommendation']}\n"
-            report += f"   ├─ Публикаций: {rec['total_publications']}\n"
-            report += f"   ├─ Avg quality: {rec['avg_quality_score']}\n"
-            report += f"   ├─ Реакций 'Плохой источник': {rec['bad_source_reactions']}\n"
-            report += f"   └─ Реакций 'Низкое качество': {rec['low_quality_reactions']}\n"
-            report += "\n"
+            append(f"<b>{source_name_escaped}</b>\n")
+            append(f"   {rec['recommendation']}\n")
+            append(f"   ├─ Публикаций: {rec['total_publications']}\n")
+            append(f"   ├─ Avg quality: {rec['avg_quality_score']}\n")
+            append(f"   ├─ Реакций 'Плохой источник': {rec['bad_source_reactions']}\n")
+            append(f"   └─ Реакций 'Низкое качество': {rec['low_quality_reactions']}\n")
+            append("\n")
 
         if not source_recommendations:
-            report += "✅ Все источники работают хорошо!\n"
+            append("✅ Все источники работают хорошо!\n")
 
     # Views и Forwards статистика
     # Просмотры и форварды (Telegram metrics)
-    report += "\n━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-    report += "📈 <b>Просмотры и Форварды:</b>\n\n"
+    append(REPORT_VIEWS_HEADER)
 
     if views_stats and views_stats.get('total_views', 0) > 0:
-        report += f"├─ 👁️ Всего просмотров: {views_stats['total_views']:,}\n"
-        report += f"├─ 📤 Всего форвардов: {views_stats['total_forwards']:,}\n"
-        report += f"├─ 📊 Avg просмотров/пост: {views_stats['avg_views']}\n"
-        report += f"├─ 📊 Avg форвардов/пост: {views_stats['avg_forwards']}\n"
-        report += f"├─ 🔥 Макс просмотров: {views_stats['max_views']:,}\n"
-        report += f"├─ 🔥 Макс форвардов: {views_stats['max_forwards']:,}\n"
-        report += f"└─ 🌊 Viral coefficient: {views_stats['viral_coefficient']}%\n"
+        append(f"├─ 👁️ Всего просмотров: {views_stats['total_views']:,}\n")
+        append(f"├─ 📤 Всего форвардов: {views_stats['total_forwards']:,}\n")
+        append(f"├─ 📊 Avg просмотров/пост: {views_stats['avg_views']}\n")
+        append(f"├─ 📊 Avg форвардов/пост: {views_stats['avg_forwards']}\n")
+        append(f"├─ 🔥 Макс просмотров: {views_stats['max_views']:,}\n")
+        append(f"├─ 🔥 Макс форвардов: {views_stats['max_forwards']:,}\n")
+        append(f"└─ 🌊 Viral coefficient: {views_stats['viral_coefficient']}%\n")
     else:
-        report += "⚠️ <b>Данные недоступны</b>\n"
-        report += "├─ Метрики из Telegram еще не собраны\n"
-        report += "├─ Celery задача запускается каждые 6 часов\n"
-        report += "├─ Следующий запуск: 00:00 / 06:00 / 12:00 / 18:00 MSK\n"
-        report += "└─ Или проверьте логи: docker compose logs celery_worker | grep collect_telegram_metrics\n"
+        append(REPORT_VIEWS_UNAVAILABLE)
 
     # A/B тестирование времени публикации
-    report += "\n━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-    report += "⏰ <b>Лучшее время для публикации:</b>\n\n"
+    append(REPORT_BEST_TIME_HEADER)
 
     if best_time and best_time.get('best_hour') is not None:
-        report += f"🎯 {best_time['recommendation']}\n"
-        report += f"├─ Engagement rate: {best_time['best_engagement_rate']}%\n"
-        report += f"└─ На основе анализа за 30 дней\n"
+        append(f"🎯 {best_time['recommendation']}\n")
+        append(f"├─ Engagement rate: {best_time['best_engagement_rate']}%\n")
+        append(f"└─ На основе анализа за 30 дней\n")
     else:
-        report += "⚠️ <b>Недостаточно данных</b>\n"
-        report += "└─ Требуется хотя бы 1 публикация с views для анализа\n"
+        append(REPORT_BEST_TIME_NO_DATA)
 
     # Трендовые темы
-    report += "\n━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-    report += "🔥 <b>Трендовые темы:</b>\n\n"
+    append(REPORT_TRENDS_HEADER)
 
     if trending_topics:
-        for i, topic in enumerate(trending_topics[:5], 1):
-            report += f"{i}. <b>{topic['topic']}</b>\n"
-            report += f"   ├─ Упоминаний: {topic['mentions']}\n"
-            report += f"   └─ Relevance: {topic['relevance_score']}%\n"
+        for i, topic in enumerate(islice(trending_topics, 5), 1):
+            append(f"{i}. <b>{topic['topic']}</b>\n")
+            append(f"   ├─ Упоминаний: {topic['mentions']}\n")
+            append(f"   └─ Relevance: {topic['relevance_score']}%\n")
     else:
-        report += "⚠️ <b>Не найдено</b>\n"
-        report += "└─ Требуется больше публикаций с детальным контентом\n"
+        append(REPORT_TRENDS_NO_DATA)
 
     # Алерты и предупреждения
     if alerts:
-        report += "\n━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-        report += "🚨 <b>Алерты и предупреждения:</b>\n\n"
+        append(REPORT_ALERTS_HEADER)
         for alert in alerts:
-            report += f"{alert['message']}\n"
-            report += f"   └─ {alert['details']}\n\n"
+            append(f"{alert['message']}\n")
+            append(f"   └─ {alert['details']}\n\n")
+
+    append(REPORT_SEPARATOR_BLOCK)
+    append(f"📅 Обновлено: {datetime.now().strftime('%d.%m.%Y %H:%M')}\n")
+
+    return "".join(parts)
+
+
+def format_ai_analytics_data(
+    days: int,
+    stats: Dict,
+    top_posts: List[Dict],
+    worst_posts: List[Dict],
+    views_stats: Dict,
+    best_time: Dict,
+    trending_topics: List[Dict],
+    alerts: List[Dict],
+    source_recommendations: List[Dict]
+) -> str:
+    """
+    Сформировать блок данных аналитики для промпта AI анализа.
+
+    Args:
+        days: Период анализа в днях
+        stats: Общая статистика
+        top_posts: Топ постов
+        worst_posts: Худшие посты
+        views_stats: Статистика просмотров и форвардов
+        best_time: Лучшее время публикации
+        trending_topics: Трендовые темы
+        alerts: Алерты
+        source_recommendations: Рекомендации по источникам
+
+    Returns:
+        Текст с метриками для промпта
+    """
+    reactions = stats['reactions']
+    lines = [
+        "",
+        f"ПЕРИОД АНАЛИЗА: {days} дней",
+        "",
+        "ОСНОВНЫЕ МЕТРИКИ:",
+        f"- Публикаций: {stats['total_publications']}",
+        f"- Одобрено драфтов: {stats['approved_drafts']} из {stats['total_drafts']} ({stats['approval_rate']:.1f}%)",
+        f"- Engagement rate: {stats['engagement_rate']:.1f}%",
+        f"- Avg quality score: {stats['avg_quality_score']}",
+        "",
+        "РЕАКЦИИ:",
+        f"- Полезно: {reactions['useful']}",
+        f"- Важно: {reactions['important']}",
+        f"- Спорно: {reactions['controversial']}",
+        f"- Банально: {reactions['banal']}",
+        f"- Плохое качество: {reactions['poor_quality']}",
+        "",
+        "VIEWS И FORWARDS:",
+        f"- Всего просмотров: {views_stats.get('total_views', 0)}",
+        f"- Avg просмотров/пост: {views_stats.get('avg_views', 0)}",
+        f"- Всего форвардов: {views_stats.get('total_forwards', 0)}",
+        f"- Viral coefficient: {views_stats.get('viral_coefficient', 0)}%",
+        "",
+        "ЛУЧШЕЕ ВРЕМЯ ПУБЛИКАЦИИ:",
+        best_time.get('recommendation', 'Нет данных'),
+        "",
+        "ТРЕНДОВЫЕ ТЕМЫ:",
+    ]
+    extend = lines.extend
+
+    if trending_topics:
+        extend(f"- {t['topic']} ({t['mentions']} упоминаний)" for t in trending_topics[:5])
+    else:
+        lines.append("Нет данных")
+
+    lines += ("", "ТОП-3 ПОСТА:")
+    if top_posts:
+        extend(f"- {p['title'][:60]}... (quality: {p['quality_score']})" for p in top_posts[:3])
+    else:
+        lines.append("Нет данных")
+
+    lines += ("", "ХУДШИЕ ПОСТЫ:")
+    if worst_posts:
+        extend(f"- {p['title'][:60]}... (quality: {p['quality_score']})" for p in worst_posts[:3])
+    else:
+        lines.append("Нет данных")
+
+    lines += ("", "ПРОБЛЕМНЫЕ ИСТОЧНИКИ:")
+    if source_recommendations:
+        extend(f"- {s['source_name']}: {s['recommendation']}" for s in source_recommendations[:3])
+    else:
+        lines.append("Нет проблем")
+
+    lines += ("", "АЛЕРТЫ:")
+    if alerts:
+        extend(f"[{a['severity'].upper()}] {a['message']}" for a in alerts)
+    else:
+        lines.append("Нет алертов")
+
+    lines.append("")
+    return "\n".join(lines)
+
+
+async def _analytics_query(query: Callable[[AnalyticsService], Awaitable]):
+    """
+    Выполнить запрос AnalyticsService в отдельной сессии (для параллельного gather).
+
+    Args:
+        query: Функция, вызывающая нужный метод сервиса аналитики
+
+    Returns:
+        Результат метода AnalyticsService
+    """
+    async with AsyncSessionLocal() as session:
+        return await query(AnalyticsService(session))
 
-    report += "\n━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-    report += f"📅 Обновлено: {datetime.now().strftime('%d.%m.%Y %H:%M')}\n"
 
+# Кэш отчётов /analytics: {days: (time.monotonic() момента сборки, текст)}
+ANALYTICS_CACHE_TTL = 120
+_analytics_report_cache: Dict[int, Tuple[float, str]] = {}
+
+
+async def get_analytics_report(days: int) -> str:
+    """
+    Отчёт аналитики за период с кэшированием на ANALYTICS_CACHE_TTL секунд.
+
+    Повторный запрос того же периода (например, двумя администраторами)
+    не гоняет заново все запросы аналитики. Кэш сбрасывается при публикации.
+
+    Args:
+        days: Период в днях
+
+    Returns:
+        Отформатированный текст отчёта
+    """
+    cached = _analytics_report_cache.get(days)
+    if cached is not None and time.monotonic() - cached[0] < ANALYTICS_CACHE_TTL:
+        return cached[1]
+
+    # Собираем все данные параллельно - запросы независимы, каждый в своей сессии
+    # (AsyncSession не допускает параллельных запросов в одной сессии)
+    (
+        stats, top_posts, worst_posts, sources, weekday_stats, vector_stats,
+        source_recommendations, views_stats, best_time, trending_topics, alerts
+    ) = await asyncio.gather(
+        _analytics_query(lambda a: a.get_period_stats(days)),
+        _analytics_query(lambda a: a.get_top_posts(3, days)),
+        _analytics_query(lambda a: a.get_worst_posts(3, days)),
+        _analytics_query(lambda a: a.get_source_stats(days)),
+        _analytics_query(lambda a: a.get_weekday_stats(min(days, 30))),  # Максимум 30 дней для статистики по дням
+        _analytics_query(lambda a: a.get_vector_db_stats()),
+        _analytics_query(lambda a: a.get_source_recommendations(min(days, 30))),
+        _analytics_query(lambda a: a.get_views_and_forwards_stats(days)),
+        _analytics_query(lambda a: a.get_best_publish_time(min(days, 30))),
+        _analytics_query(lambda a: a.get_trending_topics(days, top_n=5)),
+        _analytics_query(lambda a: a.get_performance_alerts(days)),
+    )
+
+    # Форматирование - чистая работа со строками, выполняем вне event loop
+    report = await asyncio.to_thread(
+        format_analytics_report,
+        stats=stats,
+        top_posts=top_posts,
+        worst_posts=worst_posts,
+        sources=sources,
+        weekday_stats=weekday_stats,
+        vector_stats=vector_stats,
+        source_recommendations=source_recommendations,
+        views_stats=views_stats,
+        best_time=best_time,
+        trending_topics=trending_topics,
+        alerts=alerts
+    )
+    _analytics_report_cache[days] = (time.monotonic(), report)
     return report
 
 
+def _ai_analysis_cache_key(analytics_data: str) -> str:
+    """Ключ кэша AI анализа: хэш данных аналитики, переданных в промпт."""
+    return f"ai_analysis:{hashlib.blake2b(analytics_data.encode(), digest_size=16).hexdigest()}"
+
+
+async def _get_cached_ai_analysis(analytics_data: str) -> Optional[Tuple[str, Dict]]:
+    """Получить закэшированный AI анализ (None при промахе или недоступности Redis)."""
+    try:
+        cached = await get_edit_cache().get(_ai_analysis_cache_key(analytics_data))
+    except Exception as e:
+        logger.warning("ai_analysis_cache_get_error", error=str(e))
+        return None
+    if cached is None:
+        return None
+    data = json.loads(cached)
+    return data["response"], data["usage"]
+
+
+async def _set_cached_ai_analysis(analytics_data: str, ai_response: str, usage_stats: Dict):
+    """Сохранить AI анализ в кэш на AI_ANALYSIS_CACHE_TTL секунд."""
+    try:
+        await get_edit_cache().setex(
+            _ai_analysis_cache_key(analytics_data),
+            AI_ANALYSIS_CACHE_TTL,
+            json.dumps({"response": ai_response, "usage": usage_stats})
+        )
+    except Exception as e:
+        logger.warning("ai_analysis_cache_set_error", error=str(e))
+
+
+@asynccontextmanager
+async def _loading_message(message: Message, text: str, parse_mode: Optional[str] = None) -> AsyncIterator[Message]:
+    """
+    Показать сообщение о загрузке на время выполнения блока.
+
+    Сообщение удаляется при выходе из блока - и при успехе, и при ошибке;
+    ошибка удаления не маскирует исключение из блока.
+
+    Args:
+        message: Сообщение, в чат которого отправляется индикатор
+        text: Текст индикатора загрузки
+        parse_mode: Режим разметки текста (None - обычный текст)
+    """
+    loading_msg = await message.answer(text, parse_mode=parse_mode)
+    try:
+        yield loading_msg
+    finally:
+        try:
+            await loading_msg.delete()
+        except Exception as e:
+            logger.warning("loading_message_delete_error", error=str(e))
+
+
+def split_report(report: str) -> List[str]:
+    """
+    Разбить отчёт на сообщения под лимит Telegram.
+
+    Отчёт режется по разделителям разделов; разделы копятся в буфере
+    с подсчетом длины и склеиваются один раз при отправке части.
+
+    Args:
+        report: Текст отчёта
+
+    Returns:
+        Части отчёта (один элемент, если отчёт помещается в сообщение)
+    """
+    if len(report) <= TELEGRAM_TEXT_LIMIT:
+        return [report]
+
+    chunks: List[str] = []
+    buf: List[str] = []
+    buf_len = 0
+    for part in report.split(REPORT_SEPARATOR):
+        piece = REPORT_SEPARATOR + part if buf else part
+        if buf and buf_len + len(piece) > REPORT_CHUNK_LIMIT:
+            chunks.append("".join(buf))
+            buf, buf_len = [part], len(part)
+        else:
+            buf.append(piece)
+            buf_len += len(piece)
+
+    if buf:
+        chunks.append("".join(buf))
+    return chunks
+
+
 @router.message(Command("analytics"))
 async def cmd_analytics(message: Message, db: AsyncSession):
     """Показать аналитику канала."""
 
-    if not await check_admin(message.from_user.id):
+    if not check_admin(message.from_user.id):
         await message.answer("⛔ У вас нет доступа к этой команде")
         return
 
-    # Клавиатура выбора периода
-    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [
-            InlineKeyboardButton(text="📅 7 дней", callback_data="analytics:7"),
-            InlineKeyboardButton(text="📅 30 дней", callback_data="analytics:30"),
-        ],
-        [
-            InlineKeyboardButton(text="📅 Всё время", callback_data="analytics:all"),
-        ],
-        [
-            InlineKeyboardButton(text="🤖 AI Анализ", callback_data="show_ai_analysis_menu"),
-        ]
-    ])
-
     await message.answer(
         "📊 <b>Выберите период для аналитики:</b>",
         parse_mode="HTML",
-        reply_markup=keyboard
+        reply_markup=get_analytics_period_keyboard()
     )
 
 
 @router.message(Command("moderation"))
 async def cmd_moderation(message: Message):
     """Показать статистику модерации канала."""
-    if not await check_admin(message.from_user.id):
+    if not check_admin(message.from_user.id):
         await message.answer("⛔ У вас нет доступа к этой команде")
         return
 
@@ -2102,12 +2970,11 @@ async def handle_moderation_actions(callback: CallbackQuery):
 @router.message(Command("lead_analytics"))
 async def cmd_lead_analytics(message: Message, db: AsyncSession):
     """Показать аналитику лидов."""
-    if not await check_admin(message.from_user.id):
+    if not check_admin(message.from_user.id):
         await message.answer("⛔ У вас нет доступа к этой команде")
         return
 
     try:
-        from app.modules.analytics import AnalyticsService
         analytics = AnalyticsService(db)
 
         # Получаем аналитику за 30 дней
@@ -2167,14 +3034,9 @@ async def cmd_lead_analytics(message: Message, db: AsyncSession):
 @router.callback_query(F.data.startswith("leads:"))
 async def handle_lead_analytics_callbacks(callback: CallbackQuery, db: AsyncSession):
     """Обработка callback-запросов аналитики лидов."""
-    if not await check_admin(callback.from_user.id):
-        await callback.answer("⛔ Нет доступа", show_alert=True)
-        return
-
     action = callback.data.split(":")[1]
 
     try:
-        from app.modules.analytics import AnalyticsService
         analytics = AnalyticsService(db)
 
         if action == "daily_stats":
@@ -2293,29 +3155,14 @@ async def handle_lead_analytics_callbacks(callback: CallbackQuery, db: AsyncSess
 async def cmd_settings(message: Message, db: AsyncSession):
     """Системные настройки."""
 
-    if not await check_admin(message.from_user.id):
+    if not check_admin(message.from_user.id):
         await message.answer("⛔ У вас нет доступа к этой команде")
         return
 
-    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="📰 Источники новостей", callback_data="settings:sources")],
-        [InlineKeyboardButton(text="🤖 Модели LLM", callback_data="settings:llm")],
-        [InlineKeyboardButton(text="🎨 Генерация изображений (DALL-E)", callback_data="settings:dalle")],
-        [InlineKeyboardButton(text="📅 Автопубликация", callback_data="settings:autopublish")],
-        [InlineKeyboardButton(text="🔄 Сбор новостей", callback_data="settings:fetcher")],
-        [InlineKeyboardButton(text="🔔 Уведомления", callback_data="settings:alerts")],
-        [InlineKeyboardButton(text="🎯 Фильтрация и качество", callback_data="settings:quality")],
-        [InlineKeyboardButton(text="💰 Бюджет API", callback_data="settings:budget")],
-    ])
-
     await message.answer(
-        "⚙️ <b>Системные настройки</b>\n\n"
-        "Все параметры сохраняются в базе данных и применяются автоматически.\n\n"
-        "Выберите категорию:",
+        SETTINGS_TEXT,
         parse_mode="HTML",
-        reply_markup=keyboard
+        reply_markup=SETTINGS_COMMAND_KEYBOARD
     )
 
 
@@ -2324,13 +3171,10 @@ async def callback_settings_sources(callback: CallbackQuery, db: AsyncSession):
     """Настройки источников новостей."""
     await callback.answer()
 
-    from app.modules.settings_manager import get_category_settings
-
     # Получаем текущее состояние источников
     sources = await get_category_settings("sources", db)
 
     # Формируем клавиатуру с галочками
-    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
     source_config = {
         "google_news_ru": "Google News RSS (RU)",
@@ -2378,8 +3222,6 @@ async def callback_toggle_source(callback: CallbackQuery, db: AsyncSession):
     """Переключить источник."""
     source_key = callback.data.split(":")[1]
 
-    from app.modules.settings_manager import get_setting, set_setting
-
     # Получаем текущее значение
     setting_key = f"sources.{source_key}.enabled"
     current_value = await get_setting(setting_key, db, default=True)
@@ -2398,34 +3240,16 @@ async def callback_back_to_settings(callback: CallbackQuery, db: AsyncSession):
     """Вернуться в главное меню настроек."""
     await callback.answer()
 
-    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="📰 Источники новостей", callback_data="settings:sources")],
-        [InlineKeyboardButton(text="🤖 Модели LLM", callback_data="settings:llm")],
-        [InlineKeyboardButton(text="🎨 Генерация изображений (DALL-E)", callback_data="settings:dalle")],
-        [InlineKeyboardButton(text="📅 Автопубликация", callback_data="settings:autopublish")],
-        [InlineKeyboardButton(text="🔄 Сбор новостей", callback_data="settings:fetcher")],
-        [InlineKeyboardButton(text="🔔 Уведомления", callback_data="settings:alerts")],
-        [InlineKeyboardButton(text="🎯 Фильтрация и качество", callback_data="settings:quality")],
-        [InlineKeyboardButton(text="💰 Бюджет API", callback_data="settings:budget")],
-        [InlineKeyboardButton(text="« Назад", callback_data="back_to_main_menu")],
-    ])
-
     await callback.message.edit_text(
-        "⚙️ <b>Системные настройки</b>\n\n"
-        "Все параметры сохраняются в базе данных и применяются автоматически.\n\n"
-        "Выберите категорию:",
+        SETTINGS_TEXT,
         parse_mode="HTML",
-        reply_markup=keyboard
+        reply_markup=SETTINGS_KEYBOARD
     )
 
 
 @router.callback_query(F.data == "settings:llm")
 async def callback_settings_llm(callback: CallbackQuery, db: AsyncSession):
     """Настройки моделей LLM."""
-    from app.modules.settings_manager import get_setting
-
     current_analysis = await get_setting("llm.analysis.model", db, default="deepseek-chat")
     current_draft = await get_setting("llm.draft_generation.model", db, default="deepseek-chat")
     current_ranking = await get_setting("llm.ranking.model", db, default="deepseek-chat")
@@ -2454,8 +3278,6 @@ async def callback_settings_llm(callback: CallbackQuery, db: AsyncSession):
 @router.callback_query(F.data.startswith("llm_select:"))
 async def callback_llm_select(callback: CallbackQuery, db: AsyncSession):
     """Выбор модели LLM для операции."""
-    from app.modules.settings_manager import get_setting
-
     operation = callback.data.split(":")[1]
 
     operation_names = {
@@ -2506,7 +3328,6 @@ async def callback_llm_select(callback: CallbackQuery, db: AsyncSession):
 async def callback_llm_set(callback: CallbackQuery, db: AsyncSession):
     """Установить модель LLM."""
     _, operation, model = callback.data.split(":")
-    from app.modules.settings_manager import set_setting
 
     setting_key = f"llm.{operation}.model"
     await set_setting(setting_key, model, db)
@@ -2520,8 +3341,6 @@ async def callback_llm_set(callback: CallbackQuery, db: AsyncSession):
 @router.callback_query(F.data == "settings:dalle")
 async def callback_settings_dalle(callback: CallbackQuery, db: AsyncSession):
     """Настройки DALL-E генерации изображений."""
-    from app.modules.settings_manager import get_dalle_config
-
     config = await get_dalle_config(db)
 
     enabled_icon = "✅" if config["enabled"] else "☐"
@@ -2557,7 +3376,6 @@ async def callback_settings_dalle(callback: CallbackQuery, db: AsyncSession):
 async def callback_toggle_setting(callback: CallbackQuery, db: AsyncSession):
     """Переключить булевую настройку."""
     setting_key = callback.data.split(":")[1]
-    from app.modules.settings_manager import get_setting, set_setting
 
     current_value = await get_setting(setting_key, db, default=False)
     new_value = not current_value
@@ -2642,7 +3460,6 @@ async def callback_dalle_size_select(callback: CallbackQuery, db: AsyncSession):
 async def callback_dalle_set(callback: CallbackQuery, db: AsyncSession):
     """Установить параметр DALL-E."""
     _, param, value = callback.data.split(":")
-    from app.modules.settings_manager import set_setting
 
     setting_key = f"dalle.{param}"
     await set_setting(setting_key, value, db)
@@ -2654,8 +3471,6 @@ async def callback_dalle_set(callback: CallbackQuery, db: AsyncSession):
 @router.callback_query(F.data == "settings:autopublish")
 async def callback_settings_autopublish(callback: CallbackQuery, db: AsyncSession):
     """Настройки автопубликации."""
-    from app.modules.settings_manager import get_auto_publish_config
-
     config = await get_auto_publish_config(db)
 
     enabled_icon = "✅" if config["enabled"] else "☐"
@@ -2741,7 +3556,6 @@ async def callback_autopublish_max_select(callback: CallbackQuery, db: AsyncSess
 async def callback_autopublish_set(callback: CallbackQuery, db: AsyncSession):
     """Установить параметр автопубликации."""
     _, param, value = callback.data.split(":")
-    from app.modules.settings_manager import set_setting
 
     setting_key = f"auto_publish.{param}"
     # Convert to int if it's max_per_day
@@ -2757,8 +3571,6 @@ async def callback_autopublish_set(callback: CallbackQuery, db: AsyncSession):
 @router.callback_query(F.data == "settings:alerts")
 async def callback_settings_alerts(callback: CallbackQuery, db: AsyncSession):
     """Настройки уведомлений."""
-    from app.modules.settings_manager import get_category_settings
-
     alerts = await get_category_settings("alerts", db)
 
     low_eng_icon = "✅" if alerts.get("alerts.low_engagement.enabled", True) else "☐"
@@ -2848,8 +3660,6 @@ async def callback_budget_param(callback: CallbackQuery):
 @router.callback_query(F.data == "settings:quality")
 async def callback_settings_quality(callback: CallbackQuery, db: AsyncSession):
     """Настройки фильтрации и качества."""
-    from app.modules.settings_manager import get_category_settings
-
     quality = await get_category_settings("quality", db)
 
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -2877,8 +3687,6 @@ async def callback_settings_quality(callback: CallbackQuery, db: AsyncSession):
 @router.callback_query(F.data == "settings:budget")
 async def callback_settings_budget(callback: CallbackQuery, db: AsyncSession):
     """Настройки бюджета API."""
-    from app.modules.settings_manager import get_category_settings
-
     budget = await get_category_settings("budget", db)
 
     stop_icon = "✅" if budget.get("budget.stop_on_exceed", False) else "☐"
@@ -2917,8 +3725,6 @@ async def callback_show_personal_posts(callback: CallbackQuery, db: AsyncSession
     """Показать меню личных постов."""
     await callback.answer()
 
-    from app.modules.personal_posts_manager import get_user_posts
-
     # Получаем последние посты пользователя
     posts = await get_user_posts(callback.from_user.id, db, limit=5)
 
@@ -3000,8 +3806,6 @@ async def callback_post_manual(callback: CallbackQuery, state: FSMContext):
 @router.message(PersonalPostStates.waiting_manual_text)
 async def process_manual_post(message: Message, state: FSMContext, db: AsyncSession):
     """Обработать текст ручного поста."""
-    from app.modules.personal_posts_manager import create_personal_post, enrich_post_with_metadata
-
     content = message.text
 
     # Показываем индикатор typing
@@ -3056,7 +3860,7 @@ async def callback_post_ai_assisted(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
     await state.set_state(PersonalPostStates.waiting_ai_ideas)
-    await state.update_data(previous_attempts=[])
+    await state.set_data({"previous_attempts": []})
 
     await callback.message.edit_text(
         "🤖 <b>Создать заметку с помощью AI</b>\n\n"
@@ -3071,9 +3875,6 @@ async def callback_post_ai_assisted(callback: CallbackQuery, state: FSMContext):
 @router.message(PersonalPostStates.waiting_ai_ideas)
 async def process_ai_ideas(message: Message, state: FSMContext, db: AsyncSession):
     """Обработать идеи для AI генерации."""
-    from app.modules.personal_posts_manager import generate_post_with_ai, create_personal_post
-    from app.modules.settings_manager import get_llm_model
-
     user_input = message.text
 
     # Показываем индикатор typing
@@ -3135,8 +3936,6 @@ async def callback_ai_post_save(callback: CallbackQuery, state: FSMContext, db:
     """Сохранить AI-сгенерированный пост."""
     await callback.answer()
 
-    from app.modules.personal_posts_manager import create_personal_post, enrich_post_with_metadata
-
     data = await state.get_data()
     content = data.get("current_content")
     raw_input = data.get("raw_input")
@@ -3289,8 +4088,6 @@ async def callback_voice_save_raw(callback: CallbackQuery, state: FSMContext, db
     """Сохранить расшифровку голоса как есть."""
     await callback.answer()
 
-    from app.modules.personal_posts_manager import create_personal_post, enrich_post_with_metadata
-
     data = await state.get_data()
     content = data.get("transcribed_text")
 
@@ -3345,9 +4142,6 @@ async def callback_voice_improve_ai(callback: CallbackQuery, state: FSMContext,
     """Улучшить расшифровку голоса с помощью AI."""
     await callback.answer()
 
-    from app.modules.personal_posts_manager import generate_post_with_ai
-    from app.modules.settings_manager import get_llm_model
-
     data = await state.get_data()
     transcribed_text = data.get("transcribed_text")
 
@@ -3402,8 +4196,6 @@ async def callback_list_personal_posts(callback: CallbackQuery, db: AsyncSession
     """Показать список всех личных постов."""
     await callback.answer()
 
-    from app.modules.personal_posts_manager import get_user_posts
-
     posts = await get_user_posts(callback.from_user.id, db, limit=20)
 
     if not posts:
@@ -3452,7 +4244,7 @@ async def callback_view_post(callback: CallbackQuery, db: AsyncSession):
     """Просмотр отдельной заметки."""
     await callback.answer()
 
-    post_id = int(callback.data.split(":")[1])
+    post_id = int(callback.data.partition(":")[2])
 
     # Получаем заметку
     result = await db.execute(
@@ -3527,7 +4319,7 @@ async def callback_view_post(callback: CallbackQuery, db: AsyncSession):
 @router.callback_query(F.data.startswith("publish_post:"))
 async def callback_publish_post(callback: CallbackQuery, db: AsyncSession):
     """Опубликовать личную заметку в канал (можно публиковать повторно)."""
-    post_id = int(callback.data.split(":")[1])
+    post_id = int(callback.data.partition(":")[2])
 
     # Получаем заметку (без проверки published - разрешаем повторную публикацию)
     result = await db.execute(
@@ -3547,9 +4339,6 @@ async def callback_publish_post(callback: CallbackQuery, db: AsyncSession):
 
     # Публикуем в канал
     try:
-        from app.config import settings
-        import html
-        import re
 
         # Очищаем текст от служебной информации
         clean_content = post.content
@@ -3604,9 +4393,7 @@ async def callback_publish_post(callback: CallbackQuery, db: AsyncSession):
 @router.callback_query(F.data.startswith("delete_post:"))
 async def callback_delete_post(callback: CallbackQuery, db: AsyncSession):
     """Удалить заметку."""
-    post_id = int(callback.data.split(":")[1])
-
-    from app.modules.personal_posts_manager import delete_post
+    post_id = int(callback.data.partition(":")[2])
 
     success = await delete_post(post_id, callback.from_user.id, db)
 
@@ -3620,7 +4407,7 @@ async def callback_delete_post(callback: CallbackQuery, db: AsyncSession):
 @router.callback_query(F.data.startswith("view_comments:"))
 async def callback_view_comments(callback: CallbackQuery, db: AsyncSession):
     """Показать комментарии к заметке."""
-    post_id = int(callback.data.split(":")[1])
+    post_id = int(callback.data.partition(":")[2])
 
     # Получаем заметку
     result = await db.execute(
@@ -3680,7 +4467,7 @@ async def callback_view_comments(callback: CallbackQuery, db: AsyncSession):
 @router.callback_query(F.data.startswith("add_comment:"))
 async def callback_add_comment(callback: CallbackQuery, state: FSMContext, db: AsyncSession):
     """Начать добавление комментария."""
-    post_id = int(callback.data.split(":")[1])
+    post_id = int(callback.data.partition(":")[2])
 
     # Проверяем что заметка существует
     result = await db.execute(
@@ -3720,9 +4507,9 @@ async def callback_add_comment(callback: CallbackQuery, state: FSMContext, db: A
 @router.callback_query(F.data.startswith("comment_type:"))
 async def callback_comment_type(callback: CallbackQuery, state: FSMContext):
     """Выбран тип комментария."""
-    parts = callback.data.split(":")
-    comment_type = parts[1]
-    post_id = int(parts[2])
+    _, _, payload = callback.data.partition(":")
+    comment_type, _, post_id = payload.partition(":")
+    post_id = int(post_id)
 
     # Сохраняем тип комментария
     await state.update_data(comment_type=comment_type)
@@ -3801,7 +4588,7 @@ async def process_comment(message: Message, state: FSMContext, db: AsyncSession)
 @router.callback_query(F.data.startswith("edit_post:"))
 async def callback_edit_post(callback: CallbackQuery, state: FSMContext, db: AsyncSession):
     """Начать редактирование заметки."""
-    post_id = int(callback.data.split(":")[1])
+    post_id = int(callback.data.partition(":")[2])
 
     # Получаем заметку
     result = await db.execute(
@@ -3833,8 +4620,6 @@ async def callback_edit_post(callback: CallbackQuery, state: FSMContext, db: Asy
 @router.message(PersonalPostStates.waiting_edit_text)
 async def process_edit_post(message: Message, state: FSMContext, db: AsyncSession):
     """Обработать отредактированный текст."""
-    from app.modules.personal_posts_manager import enrich_post_with_metadata
-
     # Получаем ID редактируемого поста из FSM
     data = await state.get_data()
     post_id = data.get("editing_post_id")
@@ -3921,25 +4706,13 @@ async def callback_show_ai_analysis_menu(callback: CallbackQuery):
     """Показать меню выбора периода для AI анализа."""
     await callback.answer()
 
-    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [
-            InlineKeyboardButton(text="🤖 7 дней", callback_data="ai_analysis:7"),
-            InlineKeyboardButton(text="🤖 30 дней", callback_data="ai_analysis:30"),
-        ],
-        [
-            InlineKeyboardButton(text="« Назад", callback_data="back_to_analytics_menu"),
-        ]
-    ])
-
     await callback.message.edit_text(
         "🤖 <b>AI Анализ и Рекомендации</b>\n\n"
         "Выберите период для анализа:\n\n"
         "GPT-4 проанализирует все метрики и даст конкретные рекомендации "
         "по улучшению engagement, контент-стратегии и оптимизации источников.",
         parse_mode="HTML",
-        reply_markup=keyboard
+        reply_markup=get_ai_analysis_period_keyboard()
     )
 
 
@@ -3948,207 +4721,91 @@ async def callback_back_to_analytics_menu(callback: CallbackQuery):
     """Вернуться к меню аналитики."""
     await callback.answer()
 
-    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [
-            InlineKeyboardButton(text="📅 7 дней", callback_data="analytics:7"),
-            InlineKeyboardButton(text="📅 30 дней", callback_data="analytics:30"),
-        ],
-        [
-            InlineKeyboardButton(text="📅 Всё время", callback_data="analytics:all"),
-        ],
-        [
-            InlineKeyboardButton(text="🤖 AI Анализ", callback_data="show_ai_analysis_menu"),
-        ]
-    ])
-
     await callback.message.edit_text(
         "📊 <b>Выберите период для аналитики:</b>",
         parse_mode="HTML",
-        reply_markup=keyboard
+        reply_markup=get_analytics_period_keyboard()
     )
 
 
 @router.callback_query(F.data.startswith("analytics:"))
-async def callback_analytics(callback: CallbackQuery, db: AsyncSession):
+async def callback_analytics(callback: CallbackQuery):
     """Отобразить аналитику за период."""
-
     await callback.answer()
 
-    if not await check_admin(callback.from_user.id):
-        await callback.message.answer("⛔ У вас нет доступа")
-        return
-
     try:
         period = callback.data.split(":")[1]
         days = int(period) if period != "all" else 9999
 
-        # Показываем loading сообщение
-        loading_msg = await callback.message.answer(
-            "⏳ <b>Собираю аналитику...</b>\n\n"
-            "Анализирую публикации, метрики и источники...",
-            parse_mode="HTML"
-        )
-
         logger.info("analytics_requested", period=period, days=days, user_id=callback.from_user.id)
 
-        # Создаём сервис аналитики
-        analytics = AnalyticsService(db)
-
-        # Собираем все данные (базовые + новые)
-        stats = await analytics.get_period_stats(days)
-        top_posts = await analytics.get_top_posts(3, days)
-        worst_posts = await analytics.get_worst_posts(3, days)
-        sources = await analytics.get_source_stats(days)
-        weekday_stats = await analytics.get_weekday_stats(min(days, 30))  # Максимум 30 дней для статистики по дням
-        vector_stats = await analytics.get_vector_db_stats()
-        source_recommendations = await analytics.get_source_recommendations(min(days, 30))
-
-        # НОВЫЕ методы аналитики
-        views_stats = await analytics.get_views_and_forwards_stats(days)
-        best_time = await analytics.get_best_publish_time(min(days, 30))
-        trending_topics = await analytics.get_trending_topics(days, top_n=5)
-        alerts = await analytics.get_performance_alerts(days)
-
-        # Форматируем отчёт
-        report = format_analytics_report(
-            stats=stats,
-            top_posts=top_posts,
-            worst_posts=worst_posts,
-            sources=sources,
-            weekday_stats=weekday_stats,
-            vector_stats=vector_stats,
-            source_recommendations=source_recommendations,
-            views_stats=views_stats,
-            best_time=best_time,
-            trending_topics=trending_topics,
-            alerts=alerts
-        )
-
-
-        # Удаляем loading сообщение
-        await loading_msg.delete()
-
-        # Telegram ограничивает сообщения до 4096 символов
-        # Если отчёт длинный - разбиваем на части
-        if len(report) > 4096:
-            # Разбиваем по разделителям
-            parts = report.split("━━━━━━━━━━━━━━━━━━━━━━━━━━")
+        # Показываем loading сообщение (обычный текст без разметки - Telegram не разбирает HTML)
+        async with _loading_message(
+            callback.message,
+            "⏳ Собираю аналитику...\n\n"
+            "Анализирую публикации, метрики и источники..."
+        ):
+            # Отчёт (из кэша, если этот период недавно уже запрашивали)
+            report = await get_analytics_report(days)
 
-            current_part = ""
-            for part in parts:
-                if len(current_part + part) > 4000:
-                    # Отправляем текущую часть
-                    await callback.message.answer(current_part, parse_mode="HTML", disable_web_page_preview=True)
-                    current_part = part
-                else:
-                    current_part += "━━━━━━━━━━━━━━━━━━━━━━━━━━" + part if current_part else part
-
-            # Отправляем последнюю часть
-            if current_part:
-                await callback.message.answer(current_part, parse_mode="HTML", disable_web_page_preview=True)
-        else:
-            # Отправляем целиком
-            await callback.message.answer(report, parse_mode="HTML", disable_web_page_preview=True)
+        # Telegram ограничивает сообщения до 4096 символов - длинный отчёт разбиваем на части
+        for chunk in split_report(report):
+            await callback.message.answer(chunk, **REPORT_SEND_KWARGS)
 
         logger.info("analytics_sent", period=period, report_length=len(report))
 
     except Exception as e:
         logger.error("analytics_error", error=str(e), period=callback.data)
-        # Удаляем loading сообщение если оно существует
-        try:
-            await loading_msg.delete()
-        except:
-            pass
         await callback.message.answer(
             "❌ Произошла ошибка при сборе аналитики. Попробуйте позже.",
             parse_mode="HTML"
         )
 
 
-@router.callback_query(F.data.startswith("ai_analysis:"))
-async def callback_ai_analysis(callback: CallbackQuery, db: AsyncSession):
-    """AI-анализ аналитики с рекомендациями от GPT-4."""
-
-    await callback.answer()
-
-    if not await check_admin(callback.from_user.id):
-        await callback.message.answer("⛔ У вас нет доступа")
-        return
-
-    try:
-        period = callback.data.split(":")[1]
-        days = int(period) if period != "all" else 30  # Ограничиваем для AI анализа
+async def build_ai_analysis_report(days: int, db: AsyncSession) -> str:
+    """
+    Собрать AI анализ аналитики: метрики за период, рекомендации GPT и стоимость.
 
-        loading_msg = await callback.message.answer(
-            "🤖 <b>AI Анализ запущен...</b>\n\n"
-            "⏳ Собираю данные и анализирую метрики...\n"
-            "⏳ Отправляю запрос к GPT-4...",
-            parse_mode="HTML"
-        )
+    Args:
+        days: Период анализа в днях
+        db: Сессия БД (учет расхода API и статистика AI анализов)
 
-        logger.info("ai_analysis_requested", period=period, days=days, user_id=callback.from_user.id)
+    Returns:
+        Отформатированный текст отчёта
+    """
+    # Собираем данные аналитики параллельно, каждый запрос в своей сессии
+    analytics = AnalyticsService(db)
 
-        # Собираем данные аналитики
-        analytics = AnalyticsService(db)
+    (
+        stats, top_posts, worst_posts, views_stats, best_time,
+        trending_topics, alerts, source_recommendations
+    ) = await asyncio.gather(
+        _analytics_query(lambda a: a.get_period_stats(days)),
+        _analytics_query(lambda a: a.get_top_posts(3, days)),
+        _analytics_query(lambda a: a.get_worst_posts(3, days)),
+        _analytics_query(lambda a: a.get_views_and_forwards_stats(days)),
+        _analytics_query(lambda a: a.get_best_publish_time(min(days, 30))),
+        _analytics_query(lambda a: a.get_trending_topics(days, top_n=5)),
+        _analytics_query(lambda a: a.get_performance_alerts(days)),
+        _analytics_query(lambda a: a.get_source_recommendations(min(days, 30))),
+    )
 
-        stats = await analytics.get_period_stats(days)
-        top_posts = await analytics.get_top_posts(3, days)
-        worst_posts = await analytics.get_worst_posts(3, days)
-        sources = await analytics.get_source_stats(days)
-        views_stats = await analytics.get_views_and_forwards_stats(days)
-        best_time = await analytics.get_best_publish_time(min(days, 30))
-        trending_topics = await analytics.get_trending_topics(days, top_n=5)
-        alerts = await analytics.get_performance_alerts(days)
-        source_recommendations = await analytics.get_source_recommendations(min(days, 30))
-
-        # Формируем данные для GPT
-        analytics_data = f"""
-ПЕРИОД АНАЛИЗА: {days} дней
-
-ОСНОВНЫЕ МЕТРИКИ:
-- Публикаций: {stats['total_publications']}
-- Одобрено драфтов: {stats['approved_drafts']} из {stats['total_drafts']} ({stats['approval_rate']:.1f}%)
-- Engagement rate: {stats['engagement_rate']:.1f}%
-- Avg quality score: {stats['avg_quality_score']}
-
-РЕАКЦИИ:
-- Полезно: {stats['reactions']['useful']}
-- Важно: {stats['reactions']['important']}
-- Спорно: {stats['reactions']['controversial']}
-- Банально: {stats['reactions']['banal']}
-- Плохое качество: {stats['reactions']['poor_quality']}
-
-VIEWS И FORWARDS:
-- Всего просмотров: {views_stats.get('total_views', 0)}
-- Avg просмотров/пост: {views_stats.get('avg_views', 0)}
-- Всего форвардов: {views_stats.get('total_forwards', 0)}
-- Viral coefficient: {views_stats.get('viral_coefficient', 0)}%
-
-ЛУЧШЕЕ ВРЕМЯ ПУБЛИКАЦИИ:
-{best_time.get('recommendation', 'Нет данных')}
-
-ТРЕНДОВЫЕ ТЕМЫ:
-{chr(10).join([f"- {t['topic']} ({t['mentions']} упоминаний)" for t in trending_topics[:5]]) if trending_topics else 'Нет данных'}
-
-ТОП-3 ПОСТА:
-{chr(10).join([f"- {p['title'][:60]}... (quality: {p['quality_score']})" for p in top_posts[:3]]) if top_posts else 'Нет данных'}
-
-ХУДШИЕ ПОСТЫ:
-{chr(10).join([f"- {p['title'][:60]}... (quality: {p['quality_score']})" for p in worst_posts[:3]]) if worst_posts else 'Нет данных'}
-
-ПРОБЛЕМНЫЕ ИСТОЧНИКИ:
-{chr(10).join([f"- {s['source_name']}: {s['recommendation']}" for s in source_recommendations[:3]]) if source_recommendations else 'Нет проблем'}
-
-АЛЕРТЫ:
-{chr(10).join([f"[{a['severity'].upper()}] {a['message']}" for a in alerts]) if alerts else 'Нет алертов'}
-"""
+    # Формируем данные для GPT
+    analytics_data = format_ai_analytics_data(
+        days=days,
+        stats=stats,
+        top_posts=top_posts,
+        worst_posts=worst_posts,
+        views_stats=views_stats,
+        best_time=best_time,
+        trending_topics=trending_topics,
+        alerts=alerts,
+        source_recommendations=source_recommendations
+    )
 
-        # Вызываем GPT-4 для анализа
-        from app.modules.ai_core import call_openai_chat
+    # Вызываем GPT-4 для анализа
 
-        prompt = f"""Ты - эксперт по аналитике Telegram каналов и контент-маркетингу.
+    prompt = f"""Ты - эксперт по аналитике Telegram каналов и контент-маркетингу.
 
 Проанализируй следующие данные аналитики канала @legal_ai_pro (новости о внедрении ИИ в юриспруденцию и бизнес):
 
@@ -4179,6 +4836,14 @@ VIEWS И FORWARDS:
 
 Формат ответа: структурированный, с эмодзи, конкретными цифрами и actionable советами. Не более 800 слов."""
 
+    # Те же данные за последние AI_ANALYSIS_CACHE_TTL секунд уже анализировались -
+    # берем ответ из кэша без повторного (платного) запроса к GPT
+    cached = await _get_cached_ai_analysis(analytics_data)
+    if cached is not None:
+        ai_response, usage_stats = cached
+        cost_text = "$0.0000 (ответ из кэша)"
+        logger.info("ai_analysis_cache_hit", days=days)
+    else:
         ai_response, usage_stats = await call_openai_chat(
             messages=[{"role": "user", "content": prompt}],
             model="gpt-4o",  # Используем GPT-4o для качественного анализа и рекомендаций
@@ -4187,56 +4852,63 @@ VIEWS И FORWARDS:
             db=db,
             operation="ai_analysis"
         )
+        cost_text = f"${usage_stats['cost_usd']:.4f}"
+        await _set_cached_ai_analysis(analytics_data, ai_response, usage_stats)
 
-        # Получаем общую статистику AI анализов
-        ai_stats = await analytics.get_ai_analysis_stats()
+    # Получаем общую статистику AI анализов
+    ai_stats = await analytics.get_ai_analysis_stats()
 
-        # Форматируем ответ
-        report = f"""🤖 <b>AI АНАЛИЗ АНАЛИТИКИ</b>
+    # Форматируем ответ
+    report = f"""🤖 <b>AI АНАЛИЗ АНАЛИТИКИ</b>
 
-━━━━━━━━━━━━━━━━━━━━━━━━━━
+{REPORT_SEPARATOR}
 
 {ai_response}
 
-━━━━━━━━━━━━━━━━━━━━━━━━━━
+{REPORT_SEPARATOR}
 
 <i>Анализ выполнен GPT-4 на основе данных за {days} дней</i>
 📅 {datetime.now().strftime('%d.%m.%Y %H:%M')}
 
 💰 <b>Стоимость анализа:</b>
 📊 Токенов: {usage_stats['total_tokens']:,} (prompt: {usage_stats['prompt_tokens']:,}, completion: {usage_stats['completion_tokens']:,})
-💵 Стоимость: ${usage_stats['cost_usd']:.4f}
+💵 Стоимость: {cost_text}
 
 📈 <b>Общая статистика AI анализов:</b>
 • За месяц: {ai_stats['month']['count']} запросов, {ai_stats['month']['total_tokens']:,} токенов, ${ai_stats['month']['total_cost_usd']:.2f}
 • За год: {ai_stats['year']['count']} запросов, {ai_stats['year']['total_tokens']:,} токенов, ${ai_stats['year']['total_cost_usd']:.2f}"""
 
-        # Удаляем loading сообщение
-        await loading_msg.delete()
+    return report
+
+
+@router.callback_query(F.data.startswith("ai_analysis:"))
+async def callback_ai_analysis(callback: CallbackQuery, db: AsyncSession):
+    """AI-анализ аналитики с рекомендациями от GPT-4."""
+    await callback.answer()
+
+    try:
+        period = callback.data.split(":")[1]
+        days = int(period) if period != "all" else 30  # Ограничиваем для AI анализа
+
+        logger.info("ai_analysis_requested", period=period, days=days, user_id=callback.from_user.id)
+
+        async with _loading_message(
+            callback.message,
+            "🤖 <b>AI Анализ запущен...</b>\n\n"
+            "⏳ Собираю данные и анализирую метрики...\n"
+            "⏳ Отправляю запрос к GPT-4...",
+            parse_mode="HTML"
+        ):
+            report = await build_ai_analysis_report(days, db)
 
         # Отправляем ответ (может быть длинным, поэтому разбиваем если нужно)
-        if len(report) > 4096:
-            # Разбиваем на части
-            parts = report.split("━━━━━━━━━━━━━━━━━━━━━━━━━━")
-            for i, part in enumerate(parts):
-                if part.strip():
-                    await callback.message.answer(
-                        part if i == 0 else "━━━━━━━━━━━━━━━━━━━━━━━━━━" + part,
-                        parse_mode="HTML",
-                        disable_web_page_preview=True
-                    )
-        else:
-            await callback.message.answer(report, parse_mode="HTML", disable_web_page_preview=True)
+        for chunk in split_report(report):
+            await callback.message.answer(chunk, **REPORT_SEND_KWARGS)
 
-        logger.info("ai_analysis_sent", period=period, response_length=len(ai_response))
+        logger.info("ai_analysis_sent", period=period, report_length=len(report))
 
     except Exception as e:
         logger.error("ai_analysis_error", error=str(e), period=callback.data)
-        # Удаляем loading сообщение если оно существует
-        try:
-            await loading_msg.delete()
-        except:
-            pass
         await callback.message.answer(
             "❌ Произошла ошибка при AI анализе. Попробуйте позже.\n\n"
             f"Ошибка: {str(e)}",
@@ -4247,8 +4919,7 @@ VIEWS И FORWARDS:
 @router.message(Command("alerts"))
 async def cmd_alerts(message: Message, db: AsyncSession):
     """Проверить алерты и предупреждения о проблемах."""
-
-    if not await check_admin(message.from_user.id):
+    if not check_admin(message.from_user.id):
         await message.answer("⛔ У вас нет доступа к этой команде")
         return
 
@@ -4311,28 +4982,29 @@ async def cmd_alerts(message: Message, db: AsyncSession):
 # Настройка команд бота
 # ====================
 
+# Меню команд бота (кнопка меню слева внизу) - собирается один раз при импорте
+BOT_COMMANDS = [
+    BotCommand(command="start", description="🏠 Главное меню"),
+    BotCommand(command="drafts", description="📝 Новые драфты"),
+    BotCommand(command="fetch", description="🔄 Запустить сбор новостей"),
+    BotCommand(command="analytics", description="📊 Аналитика канала"),
+    BotCommand(command="moderation", description="🛡️ Статистика модерации"),
+    BotCommand(command="lead_analytics", description="🎯 Аналитика лидов"),
+    BotCommand(command="alerts", description="🚨 Проверить проблемы"),
+    BotCommand(command="stats", description="📈 Статистика системы"),
+    BotCommand(command="help", description="❓ Помощь"),
+]
+
+
 async def setup_bot_commands():
     """Установить меню команд бота (кнопка меню слева внизу)."""
-    commands = [
-        BotCommand(command="start", description="🏠 Главное меню"),
-        BotCommand(command="drafts", description="📝 Новые драфты"),
-        BotCommand(command="fetch", description="🔄 Запустить сбор новостей"),
-        BotCommand(command="analytics", description="📊 Аналитика канала"),
-        BotCommand(command="moderation", description="🛡️ Статистика модерации"),
-        BotCommand(command="lead_analytics", description="🎯 Аналитика лидов"),
-        BotCommand(command="alerts", description="🚨 Проверить проблемы"),
-        BotCommand(command="stats", description="📈 Статистика системы"),
-        BotCommand(command="help", description="❓ Помощь"),
-    ]
-    await get_bot().set_my_commands(commands)
-    logger.info("bot_commands_set", count=len(commands))
+    await get_bot().set_my_commands(BOT_COMMANDS)
+    logger.info("bot_commands_set", count=len(BOT_COMMANDS))
 
 
 @router.callback_query(F.data == "settings:fetcher")
 async def callback_settings_fetcher(callback: CallbackQuery, db: AsyncSession):
     """Настройки сбора новостей."""
-    from app.modules.settings_manager import get_setting
-
     max_articles = await get_setting("fetcher.max_articles_per_source", db, 300)
 
     await callback.message.edit_text(
@@ -4358,9 +5030,6 @@ async def callback_settings_fetcher(callback: CallbackQuery, db: AsyncSession):
 @router.callback_query(F.data.startswith("fetcher:inc:") | F.data.startswith("fetcher:dec:"))
 async def callback_fetcher_adjust(callback: CallbackQuery, db: AsyncSession):
     """Изменить настройки сбора новостей."""
-    from app.modules.settings_manager import get_setting, set_setting
-    from aiogram.exceptions import TelegramBadRequest
-
     # Parse action and value
     parts = callback.data.split(":")
     action = parts[1]  # "inc" or "dec"
@@ -4415,8 +5084,6 @@ async def callback_fetcher_adjust(callback: CallbackQuery, db: AsyncSession):
 async def start_bot():
     """Запустить бота."""
     # Инициализация базы данных (создаём таблицы если их нет)
-    from app.models.database import init_db, get_db
-    from app.modules.settings_manager import init_default_settings
     try:
         await init_db()
         logger.info("database_initialized")
@@ -4430,6 +5097,11 @@ async def start_bot():
     except Exception as e:
         logger.error("database_init_error", error=str(e))
 
+    # Кнопки (кроме кнопок читателей) доступны только администратору
+    dp.callback_query.outer_middleware(
+        AdminCallbackMiddleware(settings.telegram_admin_id, READER_CALLBACK_PREFIXES)
+    )
+
     # Регистрируем middleware для БД сессий
     dp.message.middleware(DbSessionMiddleware())
     dp.callback_query.middleware(DbSessionMiddleware())
@@ -4440,16 +5112,32 @@ async def start_bot():
     logger.info("bot_starting")
 
     # Удаляем вебхуки если есть
+    bot = get_bot()
+
     logger.info("deleting_webhook")
-    await get_bot().delete_webhook(drop_pending_updates=True)
+    await bot.delete_webhook(drop_pending_updates=True)
 
     # Устанавливаем меню команд
     await setup_bot_commands()
 
+    # Публикации в канал обрабатываются фоновым воркером
+    start_publish_worker()
+    try:
+        await recover_publish_queue()
+    except Exception as e:
+        logger.error("publish_queue_recover_error", error=str(e))
+
     # Запускаем polling
-    await dp.start_polling(get_bot())
+    await dp.start_polling(bot)
 
 
 if __name__ == "__main__":
+    # uvloop только для процесса бота (в Celery worker он намеренно отключен)
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        logger.warning("uvloop_not_available", fallback="asyncio default event loop")
+
     asyncio.run(start_bot())
 
@@ -3,11 +3,38 @@ Telegram Bot Keyboards
 Клавиатуры для модерации и управления ботом.
 """
 
+import os
+from functools import lru_cache
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, WebAppInfo
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 
+class DraftCB(CallbackData, prefix="d"):
+    """
+    Callback data для кнопок модерации драфта.
+
+    Упаковывается в строку вида "d:<action>:<draft_id>:<reason>",
+    aiogram разбирает её и фильтрует по action до вызова обработчика.
+    """
+
+    action: str
+    draft_id: int
+    reason: str = ""
+
+
+# Типовые причины отклонения: (текст кнопки, код для rejection_reason)
+REJECTION_REASONS = (
+    ("Нерелевантно", "irrelevant"),
+    ("Низкое качество", "low_quality"),
+    ("Дубликат", "duplicate"),
+    ("Неточная информация", "inaccurate"),
+    ("Другое", "other"),
+)
+REJECTION_REASON_CODES = frozenset(code for _, code in REJECTION_REASONS)
+
+
 def add_utm_params(
     url: str,
     source: str = "telegram",
@@ -52,10 +79,14 @@ def add_utm_params(
         return url
 
 
+@lru_cache(maxsize=1024)
 def get_draft_review_keyboard(draft_id: int) -> InlineKeyboardMarkup:
     """
     Клавиатура для модерации драфта.
 
+    Разметка зависит только от draft_id и не изменяется после сборки,
+    поэтому один объект переиспользуется для всех отправок драфта.
+
     Args:
         draft_id: ID драфта
 
@@ -67,17 +98,17 @@ def get_draft_review_keyboard(draft_id: int) -> InlineKeyboardMarkup:
     builder.row(
         InlineKeyboardButton(
             text="✅ Опубликовать",
-            callback_data=f"publish:{draft_id}"
+            callback_data=DraftCB(action="publish", draft_id=draft_id).pack()
         )
     )
     builder.row(
         InlineKeyboardButton(
             text="✏️ Редактировать",
-            callback_data=f"edit:{draft_id}"
+            callback_data=DraftCB(action="edit", draft_id=draft_id).pack()
         ),
         InlineKeyboardButton(
             text="❌ Отклонить",
-            callback_data=f"reject:{draft_id}"
+            callback_data=DraftCB(action="reject", draft_id=draft_id).pack()
         )
     )
     builder.row(
@@ -90,9 +121,10 @@ def get_draft_review_keyboard(draft_id: int) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@lru_cache(maxsize=256)
 def get_confirm_keyboard(action: str, draft_id: int) -> InlineKeyboardMarkup:
     """
-    Клавиатура подтверждения действия.
+    Клавиатура подтверждения действия (кэшируется по action и draft_id).
 
     Args:
         action: Действие (publish, reject)
@@ -106,11 +138,11 @@ def get_confirm_keyboard(action: str, draft_id: int) -> InlineKeyboardMarkup:
     builder.row(
         InlineKeyboardButton(
             text="✅ Да, подтвердить",
-            callback_data=f"confirm_{action}:{draft_id}"
+            callback_data=DraftCB(action=f"confirm_{action}", draft_id=draft_id).pack()
         ),
         InlineKeyboardButton(
             text="❌ Отмена",
-            callback_data=f"cancel:{draft_id}"
+            callback_data=DraftCB(action="cancel", draft_id=draft_id).pack()
         )
     )
 
@@ -171,16 +203,16 @@ def get_reader_keyboard(
     return builder.as_markup()
 
 
+@lru_cache(maxsize=1)
 def get_main_menu_keyboard() -> InlineKeyboardMarkup:
     """
     Главное меню админ панели.
 
+    Собирается один раз за процесс: MINI_APP_URL задается окружением при запуске.
+
     Returns:
         InlineKeyboardMarkup с главными командами
     """
-    from aiogram.types import WebAppInfo
-    import os
-
     builder = InlineKeyboardBuilder()
 
     # Mini App button (if URL is configured)
@@ -292,10 +324,13 @@ def get_opinion_keyboard(post_id: int) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@lru_cache(maxsize=256)
 def get_edit_mode_keyboard(draft_id: int) -> InlineKeyboardMarkup:
     """
     Клавиатура выбора способа редактирования.
 
+    Как и get_edit_result_keyboard, кэшируется по draft_id.
+
     Args:
         draft_id: ID драфта
 
@@ -307,28 +342,29 @@ def get_edit_mode_keyboard(draft_id: int) -> InlineKeyboardMarkup:
     builder.row(
         InlineKeyboardButton(
             text="✍️ Редактировать вручную",
-            callback_data=f"edit_manual:{draft_id}"
+            callback_data=DraftCB(action="edit_manual", draft_id=draft_id).pack()
         )
     )
     builder.row(
         InlineKeyboardButton(
             text="🤖 Редактировать с помощью AI",
-            callback_data=f"edit_llm:{draft_id}"
+            callback_data=DraftCB(action="edit_llm", draft_id=draft_id).pack()
         )
     )
     builder.row(
         InlineKeyboardButton(
             text="« Назад",
-            callback_data=f"back_to_draft:{draft_id}"
+            callback_data=DraftCB(action="back_to_draft", draft_id=draft_id).pack()
         )
     )
 
     return builder.as_markup()
 
 
+@lru_cache(maxsize=256)
 def get_rejection_reasons_keyboard(draft_id: int) -> InlineKeyboardMarkup:
     """
-    Клавиатура с причинами отклонения.
+    Клавиатура с причинами отклонения (кэшируется по draft_id).
 
     Args:
         draft_id: ID драфта
@@ -338,36 +374,59 @@ def get_rejection_reasons_keyboard(draft_id: int) -> InlineKeyboardMarkup:
     """
     builder = InlineKeyboardBuilder()
 
-    reasons = [
-        ("Нерелевантно", "irrelevant"),
-        ("Низкое качество", "low_quality"),
-        ("Дубликат", "duplicate"),
-        ("Неточная информация", "inaccurate"),
-        ("Другое", "other"),
-    ]
-
-    for text, reason in reasons:
+    for text, reason in REJECTION_REASONS:
         builder.row(
             InlineKeyboardButton(
                 text=text,
-                callback_data=f"reject_reason:{draft_id}:{reason}"
+                callback_data=DraftCB(action="reject_reason", draft_id=draft_id, reason=reason).pack()
             )
         )
 
     builder.row(
         InlineKeyboardButton(
             text="« Назад",
-            callback_data=f"back_to_draft:{draft_id}"
+            callback_data=DraftCB(action="back_to_draft", draft_id=draft_id).pack()
         )
     )
 
     return builder.as_markup()
 
 
+def get_reject_all_confirm_keyboard(reason: str, max_draft_id: int) -> InlineKeyboardMarkup:
+    """
+    Клавиатура подтверждения массового отклонения (/reject_all).
+
+    Args:
+        reason: Код причины отклонения
+        max_draft_id: Максимальный ID драфта на момент запроса - драфты,
+            пришедшие после показа подтверждения, не отклоняются
+
+    Returns:
+        InlineKeyboardMarkup с кнопками подтверждения
+    """
+    builder = InlineKeyboardBuilder()
+
+    builder.row(
+        InlineKeyboardButton(
+            text="✅ Да, отклонить",
+            callback_data=DraftCB(action="confirm_reject_all", draft_id=max_draft_id, reason=reason).pack()
+        ),
+        InlineKeyboardButton(
+            text="❌ Отмена",
+            callback_data=DraftCB(action="cancel_reject_all", draft_id=max_draft_id).pack()
+        )
+    )
+
+    return builder.as_markup()
+
+
+@lru_cache(maxsize=8)
 def get_llm_selection_keyboard(current_provider: str = "openai") -> InlineKeyboardMarkup:
     """
     Клавиатура для выбора LLM провайдера.
 
+    Вариантов столько же, сколько провайдеров - каждый собирается один раз.
+
     Args:
         current_provider: Текущий выбранный провайдер
 
@@ -411,3 +470,82 @@ def get_llm_selection_keyboard(current_provider: str = "openai") -> InlineKeyboa
     )
 
     return builder.as_markup()
+
+
+@lru_cache(maxsize=256)
+def get_edit_result_keyboard(draft_id: int) -> InlineKeyboardMarkup:
+    """
+    Клавиатура под новым вариантом драфта после AI-редактирования.
+
+    Клавиатура зависит только от draft_id, поэтому кэшируется:
+    повторные итерации редактирования не собирают кнопки заново.
+
+    Args:
+        draft_id: ID драфта
+
+    Returns:
+        InlineKeyboardMarkup с кнопками публикации/продолжения/отмены
+    """
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(
+                text="✅ Опубликовать",
+                callback_data=DraftCB(action="publish_edited", draft_id=draft_id).pack()
+            ),
+            InlineKeyboardButton(
+                text="✏️ Редактировать дальше",
+                callback_data=DraftCB(action="continue_edit", draft_id=draft_id).pack()
+            )
+        ],
+        [
+            InlineKeyboardButton(
+                text="❌ Отменить",
+                callback_data=DraftCB(action="cancel_edit", draft_id=draft_id).pack()
+            )
+        ]
+    ])
+
+
+@lru_cache(maxsize=1)
+def get_analytics_period_keyboard() -> InlineKeyboardMarkup:
+    """
+    Клавиатура выбора периода аналитики (/analytics и кнопка «Назад»).
+
+    Клавиатура статична, поэтому собирается один раз за процесс.
+
+    Returns:
+        InlineKeyboardMarkup с периодами и переходом к AI анализу
+    """
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="📅 7 дней", callback_data="analytics:7"),
+            InlineKeyboardButton(text="📅 30 дней", callback_data="analytics:30"),
+        ],
+        [
+            InlineKeyboardButton(text="📅 Всё время", callback_data="analytics:all"),
+        ],
+        [
+            InlineKeyboardButton(text="🤖 AI Анализ", callback_data="show_ai_analysis_menu"),
+        ]
+    ])
+
+
+@lru_cache(maxsize=1)
+def get_ai_analysis_period_keyboard() -> InlineKeyboardMarkup:
+    """
+    Клавиатура выбора периода для AI анализа.
+
+    Клавиатура статична, поэтому собирается один раз за процесс.
+
+    Returns:
+        InlineKeyboardMarkup с периодами и возвратом в меню аналитики
+    """
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="🤖 7 дней", callback_data="ai_analysis:7"),
+            InlineKeyboardButton(text="🤖 30 дней", callback_data="ai_analysis:30"),
+        ],
+        [
+            InlineKeyboardButton(text="« Назад", callback_data="back_to_analytics_menu"),
+        ]
+    ])
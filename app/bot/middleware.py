@@ -2,10 +2,13 @@
 Middleware для Telegram бота.
 """
 
-from typing import Callable, Dict, Any, Awaitable
+from typing import Callable, Dict, Any, Awaitable, Tuple
 from aiogram import BaseMiddleware
-from aiogram.types import TelegramObject
+from aiogram.types import CallbackQuery, TelegramObject
 from app.models.database import AsyncSessionLocal
+import structlog
+
+logger = structlog.get_logger()
 
 
 class DbSessionMiddleware(BaseMiddleware):
@@ -21,3 +24,31 @@ class DbSessionMiddleware(BaseMiddleware):
         async with AsyncSessionLocal() as session:
             data['db'] = session
             return await handler(event, data)
+
+
+class AdminCallbackMiddleware(BaseMiddleware):
+    """
+    Middleware проверки прав для inline-кнопок.
+
+    Регистрируется как outer middleware: проверка выполняется один раз
+    до роутинга, и callback не администратора не доходит до фильтров,
+    сессии БД и обработчика. Кнопки читателей под постами в канале
+    (public_prefixes) пропускаются для всех.
+    """
+
+    def __init__(self, admin_id: int, public_prefixes: Tuple[str, ...] = ()):
+        self.admin_id = admin_id
+        self.public_prefixes = public_prefixes
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: CallbackQuery,
+        data: Dict[str, Any]
+    ) -> Any:
+        """Отклоняет callback, если пользователь не администратор."""
+        if event.from_user.id != self.admin_id and not (event.data or "").startswith(self.public_prefixes):
+            logger.warning("callback_no_access", user_id=event.from_user.id, callback_data=event.data)
+            await event.answer("⛔️ Нет прав доступа", show_alert=True)
+            return None
+        return await handler(event, data)
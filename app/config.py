@@ -31,12 +31,22 @@ class Settings(BaseSettings):
     postgres_host: str = Field(default="postgres")
     postgres_port: int = Field(default=5432)
     database_url: Optional[str] = Field(default=None)
+    # Пул соединений - только для долгоживущих процессов с одним event loop (бот).
+    # Celery worker вызывает asyncio.run() на каждую задачу и должен оставаться на NullPool
+    database_use_pool: bool = Field(default=False)
+    database_pool_size: int = Field(default=5)
+    database_max_overflow: int = Field(default=15)
+    database_pool_recycle: int = Field(default=1800)
 
     @field_validator("database_url", mode="before")
     @classmethod
     def assemble_db_connection(cls, v: Optional[str], info) -> str:
         """Construct database URL if not provided."""
         if v:
+            # Движок асинхронный: синхронный драйвер в URL заменяем на asyncpg
+            scheme, sep, rest = v.partition("://")
+            if scheme in ("postgres", "postgresql", "postgresql+psycopg2"):
+                return f"postgresql+asyncpg{sep}{rest}"
             return v
         data = info.data
         return (
@@ -134,6 +144,7 @@ class Settings(BaseSettings):
     telegram_admin_id: int = Field(default=0)
     telegram_channel_id: str = Field(default="")
     telegram_channel_id_numeric: int = Field(default=0)
+    telegram_send_concurrency: int = Field(default=4)  # Одновременных отправок драфтов на модерацию
 
     # Reader Bot (для читателей канала)
     reader_bot_token: str = Field(default="")
@@ -7,7 +7,7 @@ from typing import AsyncGenerator, Optional, List
 from decimal import Decimal
 from sqlalchemy import (
     Column, Integer, String, Text, Float, Boolean, TIMESTAMP,
-    BigInteger, ForeignKey, CheckConstraint, Index, ARRAY, text, Date, Numeric
+    BigInteger, ForeignKey, CheckConstraint, Index, ARRAY, text, Date, Numeric, event
 )
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import (
@@ -15,7 +15,7 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
     async_sessionmaker
 )
-from sqlalchemy.orm import DeclarativeBase, relationship
+from sqlalchemy.orm import DeclarativeBase, Session, raiseload, relationship
 from sqlalchemy.sql import func
 
 from app.config import settings
@@ -81,15 +81,21 @@ class PostDraft(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     article_id = Column(Integer, ForeignKey("raw_articles.id", ondelete="CASCADE"))
+    # Денормализовано из raw_articles: превью и публикация обходятся без запроса статьи
+    source_name = Column(String(100))
+    article_url = Column(Text)
     title = Column(Text, nullable=False)
     content = Column(Text, nullable=False)
     legal_context = Column(Text)
     image_path = Column(Text)
+    telegram_photo_file_id = Column(Text)  # file_id загруженного в Telegram image_path
+    published_text = Column(Text)  # Итоговый текст для канала (сбрасывается при правке)
     audio_path = Column(Text)
     confidence_score = Column(Float)
     created_at = Column(TIMESTAMP, default=datetime.utcnow, index=True)
     reviewed_at = Column(TIMESTAMP)
     reviewed_by = Column(Integer)
+    publish_queued_at = Column(TIMESTAMP)  # Когда поставлен в очередь публикаций (NULL - не в очереди)
     status = Column(String(20), default='pending_review', index=True)
     rejection_reason = Column(Text)
 
@@ -104,6 +110,14 @@ class PostDraft(Base):
             "status IN ('pending_review', 'approved', 'rejected', 'edited')",
             name='chk_draft_status'
         ),
+        Index(
+            'idx_post_drafts_pending', created_at.desc(),
+            postgresql_where=text("status = 'pending_review'")
+        ),
+        Index(
+            'idx_post_drafts_publish_queued', 'publish_queued_at',
+            postgresql_where=text("publish_queued_at IS NOT NULL")
+        ),
     )
 
 
@@ -449,19 +463,31 @@ class LeadProfile(Base):
 # ====================
 
 # Create async engine
-# КРИТИЧНО: Используем NullPool для совместимости с Celery worker
+# КРИТИЧНО: По умолчанию используем NullPool для совместимости с Celery worker
 # NullPool не кэширует соединения и закрывает их сразу после использования
 # Это предотвращает RuntimeError: Event loop is closed при garbage collection
+# Бот живет в одном event loop и включает пул через DATABASE_USE_POOL=true,
+# чтобы не платить за новое соединение на каждый апдейт
 from sqlalchemy.pool import NullPool
 
+if settings.database_use_pool:
+    pool_kwargs = {
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_pre_ping": True,  # Отбрасываем соединения, закрытые сервером
+        "pool_recycle": settings.database_pool_recycle,  # Не держим соединения дольше таймаутов сети/PgBouncer
+    }
+else:
+    pool_kwargs = {"poolclass": NullPool}
+
 engine = create_async_engine(
     settings.database_url,
     echo=settings.debug,
-    poolclass=NullPool,  # Используем NullPool вместо обычного пула
     connect_args={
         "server_settings": {"jit": "off"},  # Отключаем JIT для стабильности
         "command_timeout": 60,  # Таймаут команд 60 секунд
-    }
+    },
+    **pool_kwargs
 )
 
 # Create async session factory
@@ -472,6 +498,25 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
+if settings.debug:
+    @event.listens_for(Session, "do_orm_execute")
+    def _raiseload_relationships(orm_execute_state):
+        """
+        В режиме отладки запрещаем неявную ленивую загрузку связей.
+
+        Каждый ORM SELECT получает raiseload("*"): обращение к незагруженной
+        связи (draft.article, publication.draft) сразу падает с InvalidRequestError,
+        а не превращается в скрытый N+1 запрос. Явные selectinload/joinedload
+        имеют приоритет над "*". Каскадное удаление при flush не затрагивается.
+        """
+        if (
+            orm_execute_state.is_select
+            and not orm_execute_state.is_column_load
+            and not orm_execute_state.is_relationship_load
+        ):
+            orm_execute_state.statement = orm_execute_state.statement.options(raiseload("*"))
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency for getting async database session.
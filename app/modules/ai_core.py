@@ -24,6 +24,19 @@ import structlog
 
 logger = structlog.get_logger()
 
+# Общий клиент OpenAI для прямых вызовов (keep-alive соединений между запросами)
+_openai_chat_client: Optional[AsyncOpenAI] = None
+
+
+def get_openai_chat_client() -> AsyncOpenAI:
+    """
+    Получить клиент OpenAI для call_openai_chat (ленивая инициализация).
+    """
+    global _openai_chat_client
+    if _openai_chat_client is None:
+        _openai_chat_client = AsyncOpenAI(api_key=settings.openai_api_key)
+    return _openai_chat_client
+
 
 # ОПТИМИЗИРОВАННЫЕ ПРОМПТЫ для снижения расходов
 RANKING_SYSTEM_PROMPT = """Оцени ценность новости для бизнеса и LegalTech (0-10):
@@ -457,6 +470,8 @@ class AICore:
             # 5. Создаем драфт
             draft = PostDraft(
                 article_id=article.id,
+                source_name=article.source_name,
+                article_url=article.url,
                 title=title_clean[:200],  # Ограничиваем длину
                 content=draft_content,
                 legal_context=legal_context_text,
@@ -619,7 +634,7 @@ async def call_openai_chat(
         Tuple[str, Dict]: (Ответ от GPT-4, статистика использования)
     """
     try:
-        client = AsyncOpenAI(api_key=settings.openai_api_key)
+        client = get_openai_chat_client()
 
         response = await client.chat.completions.create(
             model=model,
@@ -3,7 +3,7 @@ LLM Provider module
 Unified interface for different LLM providers (OpenAI, Perplexity).
 """
 
-from typing import Dict, List, Optional, Tuple
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from openai import AsyncOpenAI
 import httpx
 import structlog
@@ -63,6 +63,70 @@ class LLMProvider:
         else:
             raise ValueError(f"Unknown provider: {self.provider}")
 
+    async def stream_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = None,
+        max_tokens: int = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream completion chunks using selected provider.
+
+        OpenAI and DeepSeek stream tokens as they are generated. Perplexity
+        has no streaming support here and yields the full completion once.
+
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            temperature: Temperature for generation (default from settings)
+            max_tokens: Max tokens (default from settings)
+
+        Yields:
+            Text chunks in generation order
+        """
+        if self.provider == "openai":
+            if self._openai_client is None:
+                self._openai_client = AsyncOpenAI(api_key=settings.openai_api_key)
+            client = self._openai_client
+            model = settings.openai_model_analysis
+            temperature = temperature or settings.openai_temperature
+            max_tokens = max_tokens or settings.openai_max_tokens
+        elif self.provider == "deepseek":
+            if self._deepseek_client is None:
+                self._deepseek_client = AsyncOpenAI(
+                    api_key=settings.deepseek_api_key,
+                    base_url=settings.deepseek_base_url
+                )
+            client = self._deepseek_client
+            model = settings.deepseek_model
+            temperature = temperature or settings.deepseek_temperature
+            max_tokens = max_tokens or settings.deepseek_max_tokens
+        else:
+            yield await self.generate_completion(messages, temperature, max_tokens)
+            return
+
+        try:
+            stream = await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            )
+        except Exception as e:
+            logger.error(f"{self.provider}_stream_error", error=str(e))
+            if self.provider != "deepseek":
+                raise
+            # Fallback на OpenAI без стриминга, как и в _generate_deepseek
+            logger.warning("deepseek_fallback_to_openai", reason="DeepSeek API error")
+            yield await self._generate_openai(messages, temperature, max_tokens)
+            return
+
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+        logger.info(f"{self.provider}_completion_streamed", model=model)
+
     async def _generate_openai(
         self,
         messages: List[Dict[str, str]],
@@ -476,8 +476,10 @@ Focus on clean, magazine-quality illustration that conveys innovation in legal t
                     cover_path=cover_path
                 )
 
-            # Сохраняем путь в драфте
+            # Сохраняем путь в драфте (старый file_id и текст публикации относятся к прежней картинке)
             draft.image_path = cover_path
+            draft.telegram_photo_file_id = None
+            draft.published_text = None
 
             # Создаем запись в media_files
             media_file = MediaFile(
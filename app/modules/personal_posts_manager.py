@@ -17,6 +17,19 @@ import structlog
 
 logger = structlog.get_logger()
 
+# Общий клиент OpenAI: один пул соединений на все вызовы модуля
+_openai_client: Optional[openai.AsyncOpenAI] = None
+
+
+def get_openai_client() -> openai.AsyncOpenAI:
+    """
+    Получить клиент OpenAI (ленивая инициализация).
+    """
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = openai.AsyncOpenAI(api_key=settings.openai_api_key)
+    return _openai_client
+
 
 # ====================
 # Core Functions
@@ -87,7 +100,7 @@ async def generate_post_with_ai(
     Returns:
         Сгенерированный текст поста
     """
-    client = openai.AsyncOpenAI(api_key=settings.openai_api_key)
+    client = get_openai_client()
 
     # Формируем промпт
     system_prompt = """Ты - помощник для создания постов в личном дневнике о работе с AI.
@@ -169,7 +182,7 @@ async def analyze_post_with_ai(
     Returns:
         Dict с category, tags, sentiment
     """
-    client = openai.AsyncOpenAI(api_key=settings.openai_api_key)
+    client = get_openai_client()
 
     prompt = f"""Проанализируй этот личный пост о работе с AI и верни JSON со следующими полями:
 
@@ -230,7 +243,7 @@ async def vectorize_post(
     Returns:
         Embedding vector (1536 dimensions)
     """
-    client = openai.AsyncOpenAI(api_key=settings.openai_api_key)
+    client = get_openai_client()
 
     try:
         response = await client.embeddings.create(
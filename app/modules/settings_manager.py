@@ -291,3 +291,16 @@ async def get_dalle_config(db: AsyncSession) -> Dict[str, Any]:
             result[short_key] = value
     return result
 
+
+async def get_llm_model(operation: str, db: AsyncSession) -> str:
+    """
+    Получить модель LLM, выбранную для операции.
+
+    Args:
+        operation: Тип операции (analysis, draft_generation, ranking)
+        db: Сессия базы данных
+
+    Returns:
+        Название модели (по умолчанию deepseek-chat)
+    """
+    return await get_setting(f"llm.{operation}.model", db, default="deepseek-chat")
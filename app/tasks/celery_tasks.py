@@ -407,7 +407,7 @@ def send_drafts_to_admin_task():
             from app.config import settings
             from aiogram import Bot
             # Импортируем send_draft_for_review ЗДЕСЬ чтобы избежать создания Bot() при импорте модуля
-            from app.bot.handlers import send_draft_for_review
+            from app.bot.handlers import send_draft_for_review, load_draft_articles
 
             # Создаём Bot ВНУТРИ asyncio.run() контекста
             # чтобы aiohttp клиент привязался к правильному event loop
@@ -464,6 +464,8 @@ def send_drafts_to_admin_task():
                     max_drafts = min(len(drafts), settings.publisher_max_posts_per_day)
                     logger.info("sending_drafts", total=len(drafts), max_to_send=max_drafts)
 
+                    articles_by_id = await load_draft_articles(drafts[:max_drafts], session)
+
                     for index, draft in enumerate(drafts[:max_drafts], start=1):
                         try:
                             await send_draft_for_review(
@@ -471,7 +473,8 @@ def send_drafts_to_admin_task():
                                 draft,
                                 session,
                                 bot=bot,
-                                draft_number=index  # Порядковый номер за день
+                                draft_number=index,  # Порядковый номер за день
+                                article=articles_by_id.get(draft.article_id)
                             )
                             sent_count += 1
                             logger.info("draft_sent", draft_id=draft.id, index=index)
@@ -864,30 +867,48 @@ def collect_telegram_metrics_task():
 # ====================
 
 @app.task(max_retries=3, autoretry_for=(Exception,), retry_backoff=60)
-def vectorize_publication_task(pub_id: int, content: str, draft_id: int):
+def vectorize_publication_task(pub_id: int, content: str = None, draft_id: int = None):
     """
     Векторизация опубликованного поста в Qdrant.
 
+    В брокер передается только pub_id - текст поста читается из БД воркером.
+    content/draft_id оставлены для задач, поставленных в очередь до обновления.
+
     Args:
         pub_id: ID публикации
-        content: Текст поста
-        draft_id: ID драфта
+        content: Текст поста (устаревший параметр)
+        draft_id: ID драфта (устаревший параметр)
     """
-    logger.info("vectorize_publication_task_started", pub_id=pub_id, draft_id=draft_id)
+    logger.info("vectorize_publication_task_started", pub_id=pub_id)
 
     async def vectorize():
+        from sqlalchemy import select
+        from app.models.database import AsyncSessionLocal, Publication
         from app.modules.vector_search import get_vector_search
         from datetime import datetime
 
+        post_content, post_draft_id, published_at = content, draft_id, None
+        if post_content is None:
+            async with AsyncSessionLocal() as session:
+                row = (await session.execute(
+                    select(PostDraft.content, Publication.draft_id, Publication.published_at)
+                    .join(PostDraft, PostDraft.id == Publication.draft_id)
+                    .where(Publication.id == pub_id)
+                )).one_or_none()
+            if row is None:
+                logger.warning("vectorize_publication_not_found", pub_id=pub_id)
+                return {"status": "not_found", "pub_id": pub_id}
+            post_content, post_draft_id, published_at = row
+
         try:
             vector_search = get_vector_search()
             await vector_search.add_publication(
                 pub_id=pub_id,
-                content=content,
-                published_at=datetime.utcnow(),
+                content=post_content,
+                published_at=published_at or datetime.utcnow(),
                 reactions={}
             )
-            logger.info("vectorize_publication_task_success", pub_id=pub_id, draft_id=draft_id)
+            logger.info("vectorize_publication_task_success", pub_id=pub_id, draft_id=post_draft_id)
             return {"status": "success", "pub_id": pub_id}
         except Exception as e:
             logger.error("vectorize_publication_task_error", pub_id=pub_id, error=str(e))
@@ -901,6 +922,24 @@ def vectorize_publication_task(pub_id: int, content: str, draft_id: int):
         raise
 
 
+@app.task
+def update_quality_score_task(pub_id: int, reactions: dict):
+    """
+    Обновить реакции и quality_score публикации в Qdrant.
+
+    Вызывается после реакции читателя - сетевой запрос к Qdrant
+    не задерживает ответ на callback.
+
+    Args:
+        pub_id: ID публикации
+        reactions: Актуальный словарь реакций
+    """
+    from app.modules.vector_search import get_vector_search
+
+    get_vector_search().update_quality_score(pub_id, reactions)
+    return {"status": "success", "pub_id": pub_id}
+
+
 # ====================
 # Команды для ручного запуска
 # ====================
@@ -0,0 +1,13 @@
+-- Migration 022: Add composite index for pending drafts listing
+-- Created: 2026-10-17
+-- Description: /drafts and the "show drafts" button filter post_drafts by status
+-- and order by created_at DESC; a composite index turns this into an index range scan
+
+CREATE INDEX IF NOT EXISTS idx_post_drafts_status_created_at
+ON post_drafts (status, created_at DESC);
+
+-- Comments
+COMMENT ON INDEX idx_post_drafts_status_created_at IS 'Composite index for pending drafts listing ordered by creation time';
+
+-- Verification
+SELECT 'Post drafts status/created_at index added successfully!' as status;
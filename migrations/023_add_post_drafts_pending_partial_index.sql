@@ -0,0 +1,15 @@
+-- Migration 023: Add partial index for pending drafts
+-- Created: 2026-10-17
+-- Description: pending_review drafts are a small fraction of post_drafts; a partial index
+-- keeps /drafts and the pending counter O(pending) regardless of draft history.
+-- CONCURRENTLY: do not wrap this file in a transaction (psql -f runs it in autocommit)
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_post_drafts_pending
+ON post_drafts (created_at DESC)
+WHERE status = 'pending_review';
+
+-- Comments
+COMMENT ON INDEX idx_post_drafts_pending IS 'Partial index on pending_review drafts ordered by creation time';
+
+-- Verification
+SELECT 'Pending drafts partial index added successfully!' as status;
@@ -0,0 +1,12 @@
+-- Migration 024: Cache Telegram file_id of draft images
+-- Created: 2026-10-17
+-- Description: After the first upload Telegram returns a file_id; reusing it for
+-- repeated review sends and channel publication avoids re-uploading image_path
+
+ALTER TABLE post_drafts ADD COLUMN IF NOT EXISTS telegram_photo_file_id TEXT;
+
+-- Comments
+COMMENT ON COLUMN post_drafts.telegram_photo_file_id IS 'Telegram file_id of the uploaded image_path (NULL until first upload)';
+
+-- Verification
+SELECT 'post_drafts.telegram_photo_file_id added successfully!' as status;
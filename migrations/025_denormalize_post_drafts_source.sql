@@ -0,0 +1,22 @@
+-- Migration 025: Denormalize article source onto post_drafts
+-- Created: 2026-10-17
+-- Description: Review preview and channel publication only need the article's
+-- source_name and url; storing them on the draft removes the raw_articles lookup
+
+ALTER TABLE post_drafts ADD COLUMN IF NOT EXISTS source_name VARCHAR(100);
+ALTER TABLE post_drafts ADD COLUMN IF NOT EXISTS article_url TEXT;
+
+-- Backfill existing drafts
+UPDATE post_drafts d
+SET source_name = a.source_name,
+    article_url = a.url
+FROM raw_articles a
+WHERE d.article_id = a.id
+  AND (d.source_name IS NULL OR d.article_url IS NULL);
+
+-- Comments
+COMMENT ON COLUMN post_drafts.source_name IS 'Copy of raw_articles.source_name at draft creation';
+COMMENT ON COLUMN post_drafts.article_url IS 'Copy of raw_articles.url at draft creation';
+
+-- Verification
+SELECT 'post_drafts source columns added successfully!' as status;
@@ -0,0 +1,13 @@
+-- Migration 026: Store the final channel text on post_drafts
+-- Created: 2026-10-17
+-- Description: publish_draft builds the channel text (title stripped, truncated,
+-- source appended) once and stores it; republishing reuses it instead of rebuilding.
+-- Editing the content or the cover resets the column to NULL
+
+ALTER TABLE post_drafts ADD COLUMN IF NOT EXISTS published_text TEXT;
+
+-- Comments
+COMMENT ON COLUMN post_drafts.published_text IS 'Final text sent to the channel (NULL - not built yet or outdated)';
+
+-- Verification
+SELECT 'post_drafts.published_text column added successfully!' as status;
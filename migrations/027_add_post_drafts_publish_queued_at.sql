@@ -0,0 +1,17 @@
+-- Migration 027: Persist the publication queue marker on post_drafts
+-- Created: 2026-10-17
+-- Description: The bot's publication queue lives in process memory. enqueue_publication
+-- stamps publish_queued_at before queueing, publish_draft clears it, and on startup
+-- the bot re-queues drafts that still carry the marker
+
+ALTER TABLE post_drafts ADD COLUMN IF NOT EXISTS publish_queued_at TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS idx_post_drafts_publish_queued
+ON post_drafts(publish_queued_at)
+WHERE publish_queued_at IS NOT NULL;
+
+-- Comments
+COMMENT ON COLUMN post_drafts.publish_queued_at IS 'When the draft was put in the publication queue (NULL - not queued)';
+
+-- Verification
+SELECT 'post_drafts.publish_queued_at column added successfully!' as status;
@@ -0,0 +1,11 @@
+-- Migration 028: Drop redundant composite index on post_drafts
+-- Created: 2026-10-17
+-- Description: Every query that orders post_drafts by created_at filters status = 'pending_review',
+-- which the partial index idx_post_drafts_pending (migration 023) already covers.
+-- The composite (status, created_at DESC) index from migration 022 only adds write overhead.
+-- CONCURRENTLY: do not wrap this file in a transaction (psql -f runs it in autocommit)
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_post_drafts_status_created_at;
+
+-- Verification
+SELECT 'Redundant post_drafts status/created_at index dropped successfully!' as status;